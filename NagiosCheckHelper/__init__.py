@@ -1,23 +1,571 @@
+import os
 import sys
-import click
+import bisect
+import heapq
+from array import array
+from collections.abc import Sequence
+# threading takes milliseconds to import, its RLock is the one from _thread
+from _thread import RLock
+
+_RVALS = {"OK": 0, "WARNING": 1, "CRITICAL": 2, "UNKNOWN": 3}
+_STATUSES = ("OK", "WARNING", "CRITICAL", "UNKNOWN")
+_numpy = None
+
+
+def _getNumpy():
+    '''
+    Import numpy on first use
+
+    Returns:
+        module: The numpy module, or None if it is not installed
+    '''
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+            _numpy = numpy
+        except ImportError:
+            _numpy = False
+    return _numpy or None
+
+
+def _isNumpyArray(values):
+    '''
+    Check for a numpy array without importing numpy
+
+    Args:
+        values (any): Object to test
+
+    Returns:
+        bool: True if values is a numpy ndarray
+    '''
+    np = sys.modules.get('numpy')
+    return np is not None and isinstance(values, np.ndarray)
+
+
+_SECTIONS = (('UNKNOWN', 'unknown'), ('CRITICAL', 'critical'), ('WARNING', 'warning'))
+_SUMMARY = "... and {} more\r\n"
+
+
+def stdoutWriter(text):
+    '''
+    Write status output to sys.stdout, the default output of NagErrors
+
+    Args:
+        text (str): Text to write
+    '''
+    sys.stdout.write(text)
+    sys.stdout.flush()
+
+
+def clickWriter(text):
+    '''
+    Write status output with click.echo, click is imported on first use
+
+    Args:
+        text (str): Text to write
+    '''
+    import click
+    click.echo(text, nl=False)
+
+
+def _byteLen(text):
+    return len(text.encode('utf-8'))
+
+
+def _truncateBytes(text, maxBytes):
+    '''
+    Truncate a string to a maximum number of UTF-8 bytes, without splitting characters
+
+    Args:
+        text (str): String to truncate
+        maxBytes (int): Maximum length in bytes
+
+    Returns:
+        str: The truncated string
+    '''
+    return text.encode('utf-8')[:max(maxBytes, 0)].decode('utf-8', 'ignore')
+
+
+PERF_UNITS = ('s', 'ms', 'us', '%', 'B', 'KB', 'MB', 'GB', 'TB', 'c')
+
+
+def _perfUnits(numberUnits):
+    '''
+    Get the perfdata unit of measurement for a numberUnits string
+
+    Args:
+        numberUnits (str): Units used in error reports
+
+    Returns:
+        str: numberUnits if it is a valid Nagios UOM, otherwise ""
+    '''
+    return numberUnits if numberUnits in PERF_UNITS else ""
+
+
+def _perfThreshold(op, threshold):
+    '''
+    Express a threshold as a Nagios perfdata range
+
+    Args:
+        op (str): '>' for ascending thresholds, '<' for descending thresholds, 'range' for NagRange's
+        threshold (num or NagRange): The threshold
+
+    Returns:
+        str/num: The range, None if threshold is None
+    '''
+    if threshold is None or op == '>':
+        return threshold
+    if op == 'range':
+        return str(threshold)
+    return "{}:".format(threshold)
+
+
+def _aggregate(values, aggregate):
+    '''
+    Aggregate a list of numbers
+
+    Args:
+        values (List of num or numpy.ndarray): Values to aggregate
+        aggregate (enum str): One of 'min', 'max', 'mean', 'sum', 'count'
+
+    Returns:
+        num: The aggregated value
+    '''
+    if aggregate == 'count':
+        return len(values)
+    if _isNumpyArray(values):
+        return getattr(values, aggregate)().item()
+    if aggregate == 'min':
+        return min(values)
+    if aggregate == 'max':
+        return max(values)
+    if aggregate == 'sum':
+        return sum(values)
+    if aggregate == 'mean':
+        return sum(values) / len(values)
+    raise ValueError("Unknown aggregate {}".format(aggregate))
+
+
+class _RunningAggregate(object):
+    '''
+    Aggregate a stream of numbers in constant memory, see _aggregate
+    '''
+    __slots__ = ('count', 'total', 'minimum', 'maximum')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.minimum = None
+        self.maximum = None
+
+    def feed(self, values):
+        '''
+        Pass values through, adding each to the aggregate
+
+        Args:
+            values (iterable of num): Values to aggregate
+
+        Returns:
+            generator: The values
+        '''
+        for value in values:
+            self.count += 1
+            self.total += value
+            if self.minimum is None or value < self.minimum:
+                self.minimum = value
+            if self.maximum is None or value > self.maximum:
+                self.maximum = value
+            yield value
+
+    def result(self, aggregate):
+        '''
+        Get the aggregated value
+
+        Args:
+            aggregate (enum str): One of 'min', 'max', 'mean', 'sum', 'count'
+
+        Returns:
+            num: The aggregated value
+        '''
+        if aggregate == 'count':
+            return self.count
+        if aggregate == 'min':
+            return self.minimum
+        if aggregate == 'max':
+            return self.maximum
+        if aggregate == 'sum':
+            return self.total
+        if aggregate == 'mean':
+            return self.total / self.count
+        raise ValueError("Unknown aggregate {}".format(aggregate))
+
+
+def _isScalar(values):
+    '''
+    Check whether the values given to a list evaluator are a single value
+
+    Strings and bytes are iterable, but are treated as one value.
+
+    Args:
+        values (any): The values
+
+    Returns:
+        bool: True if values is a single value, False for lists, tuples, generators and other iterables
+    '''
+    return isinstance(values, (str, bytes)) or not hasattr(values, '__iter__')
+
+
+def _formatPerfData(point):
+    '''
+    Format a perfdata point as 'label'=value[UOM];warn;crit;min;max
+
+    Args:
+        point (tuple): (label, value, uom, warning, critical, minimum, maximum)
+
+    Returns:
+        str: The formatted point
+    '''
+    label, value, uom, warning, critical, minimum, maximum = point
+    ret = "'{}'={}{};{};{};{};{}".format(label.replace("'", "''"), value, uom,
+                                        "" if warning is None else warning, "" if critical is None else critical,
+                                        "" if minimum is None else minimum, "" if maximum is None else maximum)
+    return ret.rstrip(';')
+
+
+TEMPLATE_ABOVE = "{prefix}{value}{units} is > {threshold}{units}{postfix}"
+TEMPLATE_BELOW = "{prefix}{value}{units} is < {threshold}{units}{postfix}"
+TEMPLATE_ENUM = "{prefix}value is {value}{postfix}"
+TEMPLATE_NOTFOUND = "{prefix}value {value} not found{postfix}"
+TEMPLATE_EMPTY = "{prefix}list is Empty{postfix}"
+TEMPLATE_OUTSIDE = "{prefix}{value}{units} is outside {threshold}{postfix}"
+TEMPLATE_INSIDE = "{prefix}{value}{units} is inside {threshold}{postfix}"
+TEMPLATE_BAND = "{prefix}{value}{units} is in {threshold}{postfix}"
+TEMPLATE_AGE = "{prefix}data is {value:.0f}{units} old, older than {threshold}{units}{postfix}"
+
+
+class NagRecord(object):
+    '''
+
+    A single error record, rendered to text only when it is needed
+
+    Args:
+        severity (enum str): One of 'critical', 'warning', 'unknown'
+        template (str): str.format template with the fields prefix, value, threshold, units and postfix,
+                        or None if value is already the finished text
+        value (any): The value that caused the error, or the error text
+        threshold (num): The threshold that was breached
+        units (str): Units to append to numbers
+        prefixText (str): String to prefix the error text
+        postfixText (str): String to append to the error text
+    '''
+    __slots__ = ('severity', 'template', 'value', 'threshold', 'units', 'prefixText', 'postfixText')
+
+    def __init__(self, severity, template, value, threshold=None, units="", prefixText="", postfixText=""):
+        self.severity = severity
+        self.template = template
+        self.value = value
+        self.threshold = threshold
+        self.units = units
+        self.prefixText = prefixText
+        self.postfixText = postfixText
+
+    def render(self):
+        '''
+        Render the error text
+
+        Returns:
+            str: The error text
+        '''
+        if self.template is None:
+            return self.value
+        return self.template.format(prefix=self.prefixText, value=self.value, threshold=self.threshold, units=self.units, postfix=self.postfixText)
+
+    def excess(self):
+        '''
+        How far the value exceeds the threshold
+
+        For a NagRange threshold this is the distance to the range, and for a band the distance
+        to the nearest edge of the band.
+
+        Returns:
+            float: abs(value - threshold), or 0 for records without a numeric value and threshold
+        '''
+        threshold = self.threshold
+        try:
+            if isinstance(threshold, NagRange):
+                ret = float(threshold.excess(self.value))
+            elif self.template is TEMPLATE_BAND:
+                # bands are described as ranges, e.g. "80:90", holding the value
+                ret = float(NagRange.compile("@" + threshold).excess(self.value))
+            else:
+                ret = float(abs(self.value - threshold))
+        except (TypeError, ValueError):
+            return 0.0
+        if ret != ret:
+            return 0.0
+        return ret
+
+    def __str__(self):
+        return self.render()
+
+    def __repr__(self):
+        return "NagRecord({!r}, {!r})".format(self.severity, self.render())
+
+
+class NagRecordView(Sequence):
+    '''
+
+    A read/append view of the error texts of one severity of a NagErrors object
+
+    Texts are rendered from the records as they are accessed. The view supports the read-only
+    list operations, append, extend, +=, copy and concatenation (which returns a list). Use list()
+    or copy() for a plain list, e.g. for json.dumps.
+
+    Args:
+        errObj (NagErrors): The NagErrors object holding the records
+        etype (enum str): One of 'critical', 'warning', 'unknown'
+    '''
+    __slots__ = ('errObj', 'etype')
+
+    def __init__(self, errObj, etype):
+        self.errObj = errObj
+        self.etype = etype
+
+    def __len__(self):
+        return len(self.errObj.getRecords(self.etype))
+
+    def __getitem__(self, index):
+        recs = self.errObj.getRecords(self.etype)
+        if isinstance(index, slice):
+            return [r.render() for r in recs[index]]
+        return recs[index].render()
+
+    def __iter__(self):
+        for r in self.errObj.getRecords(self.etype):
+            yield r.render()
+
+    def __eq__(self, other):
+        try:
+            other = list(other)
+        except TypeError:
+            return NotImplemented
+        return list(self) == other
+
+    def __ne__(self, other):
+        ret = self.__eq__(other)
+        return ret if ret is NotImplemented else not ret
+
+    def __repr__(self):
+        return repr(list(self))
+
+    def __add__(self, other):
+        return list(self) + list(other)
+
+    def __radd__(self, other):
+        return list(other) + list(self)
+
+    def __iadd__(self, other):
+        self.extend(other)
+        return self
+
+    def copy(self):
+        '''
+        Render the viewed texts
+
+        Returns:
+            list of str's: The error texts
+        '''
+        return list(self)
+
+    def append(self, etext):
+        '''
+        Add a record to the viewed severity
+
+        Args:
+            etext (str): The descriptive text of the error
+        '''
+        self.errObj.addRecord(self.etype, etext)
+
+    def extend(self, etexts):
+        '''
+        Add a record to the viewed severity for each text
+
+        Args:
+            etexts (iterable of str's): The descriptive texts of the errors
+        '''
+        for etext in list(etexts):
+            self.errObj.addRecord(self.etype, etext)
+
+
+def _recordViewProperty(etype):
+    def getter(self):
+        return NagRecordView(self, etype)
+
+    def setter(self, texts):
+        if isinstance(texts, NagRecordView) and texts.errObj is self and texts.etype == etype:
+            # += extended the view in place, rebuilding it would drop the records not stored
+            return
+        self.clearRecords(etype)
+        for t in texts:
+            self.addRecord(etype, t)
+    return property(getter, setter)
+
 
 class NagErrors(object):
     '''
 
     The NagErrors object contains the processed Nagios Errors
 
+    Errors are stored as NagRecord objects, and only rendered to text when they are read or printed.
+
+    With maxRecords set, the object counts every record but only stores up to maxRecords
+    exemplars of each severity, so memory stays constant regardless of the number of errors.
+    keepRecords selects the exemplars: 'first' keeps the first ones added, 'worst' keeps the
+    ones whose value exceeds its threshold the most.
+
+    Adding records and perfdata is thread safe, and NagErrors objects can be pickled and
+    merged, so partial results from worker threads or processes can be combined.
+
     Args:
-        - None -
+        outputLimit (int): Maximum size of the printed status in bytes, None for no limit
+                           (e.g. 4096 for NRPE or 65536 for Nagios core)
+        maxRecords (int): Maximum number of records stored per severity, None for no limit
+        keepRecords (enum str): One of 'first', 'worst', which records to keep when maxRecords is set
+        output (callable): Function called with the status text by printStatus, defaults to stdoutWriter
+        perfLimit (int): Maximum number of perfdata points stored, None for no limit
 
     Attributes:
-        critical (list of str's): The list of Critical Errors
-        warning (list of str's): The list of Warning Errors
-        unknown (list of str's): The list of Unknown Errors
+        outputLimit (int): Maximum size of the printed status in bytes
+        maxRecords (int): Maximum number of records stored per severity
+        keepRecords (enum str): Which records to keep when maxRecords is set
+        output (callable): Function called with the status text by printStatus
+        perfLimit (int): Maximum number of perfdata points stored
+        perfdata (list of tuple's): The perfdata points, (label, value, uom, warning, critical, minimum, maximum)
+        perfDropped (int): The number of perfdata points not stored because of perfLimit
+        counts (dict of int's): The number of records added for each of 'critical', 'warning', 'unknown'
+        records (dict of list of NagRecord's): The stored records for each of 'critical', 'warning', 'unknown',
+                                               use getRecords to read them
+        critical (NagRecordView): The list of Critical Errors
+        warning (NagRecordView): The list of Warning Errors
+        unknown (NagRecordView): The list of Unknown Errors
     '''
-    def __init__(self):
-        self.critical = []
-        self.warning = []
-        self.unknown = []
+    critical = _recordViewProperty('critical')
+    warning = _recordViewProperty('warning')
+    unknown = _recordViewProperty('unknown')
+
+    def __init__(self, outputLimit=None, maxRecords=None, keepRecords='first', output=None, perfLimit=None):
+        if keepRecords not in ('first', 'worst'):
+            raise ValueError("keepRecords must be one of 'first', 'worst'")
+        self.outputLimit = outputLimit
+        self.maxRecords = maxRecords
+        self.keepRecords = keepRecords
+        self.output = output if output is not None else stdoutWriter
+        self.perfLimit = perfLimit
+        self.perfdata = []
+        self.perfDropped = 0
+        self.counts = {'critical': 0, 'warning': 0, 'unknown': 0}
+        self.records = {'critical': [], 'warning': [], 'unknown': []}
+        self._heaps = {'critical': [], 'warning': [], 'unknown': []}
+        self._seq = 0
+        self._lock = RLock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = RLock()
+
+    def _store(self, rec):
+        '''
+        Count a record and store it, if there is room
+
+        Args:
+            rec (NagRecord): The record
+        '''
+        etype = rec.severity
+        with self._lock:
+            self.counts[etype] += 1
+            if self.maxRecords is None:
+                self.records[etype].append(rec)
+            elif self.keepRecords == 'first':
+                if len(self.records[etype]) < self.maxRecords:
+                    self.records[etype].append(rec)
+            elif self.maxRecords > 0:
+                self._seq += 1
+                entry = (rec.excess(), -self._seq, rec)
+                heap = self._heaps[etype]
+                if len(heap) < self.maxRecords:
+                    heapq.heappush(heap, entry)
+                elif entry > heap[0]:
+                    heapq.heapreplace(heap, entry)
+                else:
+                    return
+                self.records[etype] = None
+
+    def merge(self, other):
+        '''
+        Merge the records and perfdata of another NagErrors object into this one
+
+        Records are added in the order they are stored in other, and records other
+        counted but did not store are counted here too.
+
+        Args:
+            other (NagErrors): The object to merge
+        '''
+        with self._lock:
+            for etype in ('critical', 'warning', 'unknown'):
+                recs = other.getRecords(etype)
+                for rec in recs:
+                    self._store(rec)
+                self.counts[etype] += other.counts[etype] - len(recs)
+            for point in other.perfdata:
+                self.addPerfData(*point)
+            self.perfDropped += other.perfDropped
+
+    def getRecords(self, etype):
+        '''
+        Get the stored records of a specific type
+
+        Args:
+            etype (enum str): One of 'crititcal', 'warning', 'unknown', the type of error
+
+        Returns:
+            list of NagRecord's: The stored records, worst first if keepRecords is 'worst'
+        '''
+        recs = self.records[etype]
+        if recs is None:
+            with self._lock:
+                recs = [entry[2] for entry in sorted(self._heaps[etype], reverse=True)]
+                self.records[etype] = recs
+        return recs
+
+    def getCount(self, etype):
+        '''
+        Get the number of records of a specific type, including the ones that were not stored
+
+        Args:
+            etype (enum str): One of 'crititcal', 'warning', 'unknown', the type of error
+
+        Returns:
+            int: The number of records
+        '''
+        return self.counts[etype]
+
+    def clearRecords(self, etype):
+        '''
+        Remove all records of a specific type
+
+        Args:
+            etype (enum str): One of 'crititcal', 'warning', 'unknown', the type of error
+        '''
+        with self._lock:
+            self.counts[etype] = 0
+            self.records[etype] = []
+            self._heaps[etype] = []
 
     def addRecord(self, etype, etext):
         '''
@@ -27,12 +575,26 @@ class NagErrors(object):
             etype (enum str): One of 'crititcal', 'warning', 'unknown', the type of error
             etext (str): The descriptive text of the error
         '''
-        if etype == 'critical':
-            self.critical.append(etext)
-        elif etype == 'warning':
-            self.warning.append(etext)
-        else:
-            self.unknown.append(etext)
+        if etype != 'critical' and etype != 'warning':
+            etype = 'unknown'
+        self._store(NagRecord(etype, None, etext))
+
+    def addTemplateRecord(self, etype, template, value, threshold=None, units="", prefixText="", postfixText=""):
+        '''
+        Add a record of a specific type, the text is formatted when it is rendered
+
+        Args:
+            etype (enum str): One of 'crititcal', 'warning', 'unknown', the type of error
+            template (str): str.format template with the fields prefix, value, threshold, units and postfix
+            value (any): The value that caused the error
+            threshold (num): The threshold that was breached
+            units (str): Units to append to numbers
+            prefixText (str): String to prefix the error text
+            postfixText (str): String to append to the error text
+        '''
+        if etype != 'critical' and etype != 'warning':
+            etype = 'unknown'
+        self._store(NagRecord(etype, template, value, threshold, units, prefixText, postfixText))
 
     def addCritical(self, etext):
         '''
@@ -48,289 +610,1807 @@ class NagErrors(object):
         Add a warning record
 
         Args:
-            etext (str): The descriptive text of the error
+            etext (str): The descriptive text of the error
+        '''
+        self.addRecord('warning', etext)
+    
+    def addUnknown(self, etext):
+        '''
+        Add a unknown record
+
+        Args:
+            etext (str): The descriptive text of the error
+        '''
+        self.addRecord('unknown', etext)
+
+    def addPerfData(self, label, value, uom="", warning=None, critical=None, minimum=None, maximum=None):
+        '''
+        Add a perfdata point
+
+        Args:
+            label (str): Label of the point
+            value (num): The value
+            uom (str): Unit of measurement (s, ms, us, %, B, KB, MB, GB, TB, c)
+            warning (num/str): Warning threshold or range
+            critical (num/str): Critical threshold or range
+            minimum (num): Minimum possible value
+            maximum (num): Maximum possible value
+        '''
+        with self._lock:
+            if self.perfLimit is not None and len(self.perfdata) >= self.perfLimit:
+                self.perfDropped += 1
+                return
+            self.perfdata.append((label, value, uom, warning, critical, minimum, maximum))
+
+    def addPerfDataList(self, label, values, uom="", warning=None, critical=None, minimum=None, maximum=None):
+        '''
+        Add a perfdata point for each value of a list, labeled label_0, label_1, ...
+
+        Points beyond perfLimit are counted in perfDropped without being labeled.
+
+        Args:
+            label (str): Label prefix of the points
+            values (List of num or numpy.ndarray): The values
+            uom (str): Unit of measurement (s, ms, us, %, B, KB, MB, GB, TB, c)
+            warning (num/str): Warning threshold or range
+            critical (num/str): Critical threshold or range
+            minimum (num): Minimum possible value
+            maximum (num): Maximum possible value
+        '''
+        count = values.size if _isNumpyArray(values) else len(values)
+        with self._lock:
+            if self.perfLimit is not None:
+                room = max(self.perfLimit - len(self.perfdata), 0)
+                if room < count:
+                    self.perfDropped += count - room
+                    count = room
+            if _isNumpyArray(values):
+                # python numbers, so the points render the same as from a list
+                values = values.ravel()[:count].tolist()
+            perfdata = self.perfdata
+            for i in range(count):
+                perfdata.append(("{}_{}".format(label, i), values[i], uom, warning, critical, minimum, maximum))
+
+    def renderPerfData(self, maxBytes=None):
+        '''
+        Render the perfdata section of the status output
+
+        Args:
+            maxBytes (int): Maximum size of the perfdata in bytes, None for no limit
+
+        Returns:
+            str: Space separated perfdata points
+        '''
+        if maxBytes is None:
+            return " ".join([_formatPerfData(p) for p in self.perfdata])
+        out = []
+        used = 0
+        for p in self.perfdata:
+            point = _formatPerfData(p)
+            cost = _byteLen(point) + 1
+            if used + cost > maxBytes:
+                break
+            out.append(point)
+            used += cost
+        return " ".join(out)
+
+    def formatStatus(self, stype, sarr):
+        '''
+        Format an array of status lines
+
+        Args:
+            stype (str): Error Type of array
+            sarr (List of str's): Error Messages
+
+        Returns:
+            str: Formated list of errors
+        '''
+        if len(sarr) == 1:
+            return "{} {}\r\n".format(stype, sarr[0])
+        lines = ["{}:\r\n".format(stype)]
+        lines.extend(["    {}\r\n".format(l) for l in sarr])
+        return "".join(lines)
+
+    def renderStatus(self, maxBytes=None):
+        '''
+        Render the complete Nagios status output in one pass
+
+        Perfdata is appended to the first line after a "|". Sections are rendered in order
+        of severity (UNKNOWN, CRITICAL, WARNING). If maxBytes
+        is set, rendering stops once the budget is spent, and the remaining records are summarized
+        with an "... and N more" line. Records that were not stored because of maxRecords are
+        summarized the same way at the end of their section. The first line always starts with the
+        status, with a budget too small for anything else it is the only line.
+
+        Args:
+            maxBytes (int): Maximum size of the output in bytes (UTF-8), None for no limit
+
+        Returns:
+            str: The status output
+        '''
+        perf = ""
+        if len(self.perfdata) > 0:
+            perf = self.renderPerfData(None if maxBytes is None else maxBytes // 2)
+            if perf:
+                perf = " | " + perf
+        sections = [(stype, self.counts[etype], self.getRecords(etype)) for stype, etype in _SECTIONS if self.counts[etype] > 0]
+        if len(sections) == 0:
+            return "OK{}\n".format(perf)
+
+        left = sum([count for stype, count, recs in sections])
+        if maxBytes is None:
+            remaining = float('inf')
+        else:
+            remaining = maxBytes - _byteLen(_SUMMARY.format(left)) - 1 - _byteLen(perf)
+        out = []
+        for stype, count, recs in sections:
+            if count == 1 and len(recs) == 1:
+                line = "{} {}\r\n\n".format(stype, recs[0].render())
+                cost = _byteLen(line)
+                if cost > remaining:
+                    text = _truncateBytes(line[:-3], remaining - 3)
+                    if len(out) == 0 and len(text) > len(stype) + 1:
+                        out.append(text + "\r\n")
+                        left -= 1
+                        if left == 0:
+                            out.append("\n")
+                    break
+                out.append(line)
+                remaining -= cost
+                left -= 1
+                continue
+
+            line = "{}:\r\n".format(stype)
+            cost = len(line) + 1
+            if cost > remaining:
+                break
+            out.append(line)
+            remaining -= cost
+            for r in recs:
+                line = "    {}\r\n".format(r.render())
+                cost = _byteLen(line)
+                if cost > remaining:
+                    break
+                out.append(line)
+                remaining -= cost
+                left -= 1
+            else:
+                dropped = count - len(recs)
+                if dropped > 0:
+                    line = "    " + _SUMMARY.format(dropped)
+                    cost = len(line)
+                    if cost > remaining:
+                        break
+                    out.append(line)
+                    remaining -= cost
+                    left -= dropped
+                out.append("\n")
+                continue
+            break
+
+        if len(out) == 0:
+            # not even the start of the first record fits, the status comes first, then what fits
+            status = sections[0][0]
+            for text in ("{}{}\r\n{}\n".format(status, perf, _SUMMARY.format(left)), "{}\r\n{}\n".format(status, _SUMMARY.format(left))):
+                if _byteLen(text) <= maxBytes:
+                    return text
+            return status + "\n"
+        if left > 0:
+            out.append(_SUMMARY.format(left))
+            out.append("\n")
+        if perf:
+            i = out[0].index("\r\n")
+            out[0] = out[0][:i] + perf + out[0][i:]
+        return "".join(out)
+
+    def printStatus(self, maxBytes=None):
+        '''
+        Print properly formatted Nagios status information
+
+        The output is rendered with renderStatus and passed to self.output in a single write.
+
+        Args:
+            maxBytes (int): Maximum size of the output in bytes, defaults to self.outputLimit
+        '''
+        if maxBytes is None:
+            maxBytes = self.outputLimit
+        self.output(self.renderStatus(maxBytes))
+
+    def getExitCode(self):
+        '''
+        Get the returncode that should be exited with.
+
+        Args:
+            - none -
+
+        Returns:
+            int: Calculated returncode based on the current status lines
+        '''
+        if self.counts['unknown'] > 0 :
+            return 3
+        if self.counts['critical'] > 0 :
+            return 2
+        if self.counts['warning'] > 0 :
+            return 1
+        return 0
+
+    def doExit(self):
+        '''
+        Exit with the proper returncode
+
+        Args:
+            - none -
+        '''
+        sys.exit(self.getExitCode())
+
+
+def _parseRangeNumber(text):
+    '''
+    Parse a number of a Nagios range
+
+    Args:
+        text (str): The number
+
+    Returns:
+        int/float: The number
+    '''
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+class NagRange(object):
+    '''
+
+    A compiled Nagios plugin threshold range
+
+    Supports the standard syntax: "10" (alert outside 0..10), "10:" (alert below 10), "~:10"
+    (alert above 10), "10:20" (alert outside 10..20) and "@10:20" (alert inside 10..20).
+    Use NagRange.compile to reuse compiled ranges.
+
+    Args:
+        text (str/num): The range
+
+    Attributes:
+        text (str): The range as given
+        start (num): Start of the range, -inf for ~
+        end (num): End of the range, inf if it is open
+        inside (bool): True to alert inside the range (@), False to alert outside it
+    '''
+    __slots__ = ('text', 'start', 'end', 'inside')
+    _cache = {}
+
+    def __init__(self, text):
+        self.text = str(text).strip()
+        spec = self.text
+        self.inside = spec.startswith('@')
+        if self.inside:
+            spec = spec[1:]
+        try:
+            if ':' in spec:
+                start, end = spec.split(':', 1)
+                if start == '~':
+                    self.start = float('-inf')
+                else:
+                    self.start = _parseRangeNumber(start) if start != '' else 0
+                self.end = _parseRangeNumber(end) if end != '' else float('inf')
+            else:
+                self.start = 0
+                self.end = _parseRangeNumber(spec)
+        except ValueError:
+            raise ValueError("Invalid range {!r}".format(self.text))
+        if self.start > self.end:
+            raise ValueError("Invalid range {!r}, start is greater than end".format(self.text))
+
+    @classmethod
+    def compile(cls, text):
+        '''
+        Get a compiled range, from a cache of ranges already compiled
+
+        Args:
+            text (str/num/NagRange): The range
+
+        Returns:
+            NagRange: The compiled range
+        '''
+        if isinstance(text, NagRange):
+            return text
+        ret = cls._cache.get(text)
+        if ret is None:
+            ret = cls(text)
+            cls._cache[text] = ret
+        return ret
+
+    def alert(self, value):
+        '''
+        Test a value against the range
+
+        Args:
+            value (num): Value to test
+
+        Returns:
+            bool: True if the value should generate an alert
+        '''
+        if self.inside:
+            return self.start <= value <= self.end
+        return value < self.start or value > self.end
+
+    def alertArray(self, arr):
+        '''
+        Test a numpy array against the range
+
+        Args:
+            arr (numpy.ndarray): Values to test
+
+        Returns:
+            numpy.ndarray: Boolean array, True for the values that should generate an alert
+        '''
+        if self.inside:
+            return (arr >= self.start) & (arr <= self.end)
+        return (arr < self.start) | (arr > self.end)
+
+    def excess(self, value):
+        '''
+        How far a value that alerts is into the alert region
+
+        Args:
+            value (num): Value to test
+
+        Returns:
+            num: Distance to the range for ranges alerting outside, distance to the nearest
+                 edge for ranges alerting inside, 0 if the value does not alert
+        '''
+        if not self.alert(value):
+            return 0
+        if self.inside:
+            return min(value - self.start, self.end - value)
+        return self.start - value if value < self.start else value - self.end
+
+    def template(self):
+        '''
+        Get the error report template for values that alert
+
+        Returns:
+            str: TEMPLATE_INSIDE or TEMPLATE_OUTSIDE
+        '''
+        return TEMPLATE_INSIDE if self.inside else TEMPLATE_OUTSIDE
+
+    def __str__(self):
+        return self.text
+
+    def __repr__(self):
+        return "NagRange({!r})".format(self.text)
+
+
+class NagBands(object):
+    '''
+
+    Classifies values into any number of sorted bands, each with its own status
+
+    Band i holds the values above edges[i-1] and up to edges[i], so with edges [80, 90] and
+    statuses ["OK", "WARNING", "CRITICAL"], 80 is OK, 85 is WARNING and 90.5 is CRITICAL,
+    like warningAbove=80, criticalAbove=90.
+
+    Args:
+        edges (List of num): Sorted band edges
+        statuses (List of str's): Status of each band (OK, WARNING, CRITICAL, UNKNOWN), one more than edges
+
+    Attributes:
+        edges (List of num): Sorted band edges
+        statuses (List of str's): Status of each band
+    '''
+    def __init__(self, edges, statuses):
+        self.edges = list(edges)
+        self.statuses = list(statuses)
+        if len(self.statuses) != len(self.edges) + 1:
+            raise ValueError("NagBands needs one more status than edges")
+        if self.edges != sorted(self.edges):
+            raise ValueError("NagBands edges must be sorted")
+        for status in self.statuses:
+            if status not in _RVALS:
+                raise ValueError("Invalid status {!r}".format(status))
+        self._codes = None
+
+    def index(self, value):
+        '''
+        Get the band of a value, NaN is in band 0
+
+        Args:
+            value (num): Value to classify
+
+        Returns:
+            int: Index of the band
+        '''
+        return bisect.bisect_left(self.edges, value)
+
+    def classify(self, value):
+        '''
+        Get the status of a value
+
+        Args:
+            value (num): Value to classify
+
+        Returns:
+            str: Status of the value's band
+        '''
+        return self.statuses[bisect.bisect_left(self.edges, value)]
+
+    def classifyArray(self, arr):
+        '''
+        Get the bands and status codes of a numpy array
+
+        NaN values are in band 0, as they are with index and classify.
+
+        Args:
+            arr (numpy.ndarray): Values to classify
+
+        Returns:
+            (numpy.ndarray, numpy.ndarray): Band index of each value, and status code of each value (0=OK, 1=WARNING, 2=CRITICAL, 3=UNKNOWN)
+        '''
+        np = sys.modules['numpy']
+        if self._codes is None:
+            self._codes = np.array([_RVALS[s] for s in self.statuses], dtype=np.int8)
+        idx = np.searchsorted(self.edges, arr, side='left')
+        if arr.dtype.kind in 'fc':
+            # searchsorted sorts NaN after every edge, bisect_left puts it before them
+            nan = np.isnan(arr)
+            if nan.any():
+                idx[nan] = 0
+        return idx, self._codes[idx]
+
+    def describe(self, index):
+        '''
+        Describe a band as a range, e.g. "80:90"
+
+        Args:
+            index (int): Index of the band
+
+        Returns:
+            str: The band as low:high, with ~ for no lower edge
+        '''
+        low = self.edges[index - 1] if index > 0 else "~"
+        high = self.edges[index] if index < len(self.edges) else ""
+        return "{}:{}".format(low, high)
+
+
+def _evalShard(config, evaluator, shard, kwargs, deadline=None):
+    '''
+    Evaluate a shard of a list in a worker thread or process
+
+    Args:
+        config (dict): Keyword arguments for the worker NagErrors object
+        evaluator (str or callable): Name of a NagEval list evaluator, or a function called as evaluator(neval, value)
+        shard (list): Values to test
+        kwargs (dict): Keyword arguments for the list evaluator
+        deadline (NagDeadline): Stop the shard once it is reached, None for no deadline
+
+    Returns:
+        (str, NagErrors): Result of the shard and the NagErrors object with its records
+    '''
+    errObj = NagErrors(**config)
+    neval = NagEval(errObj, deadline)
+    if not callable(evaluator):
+        return (getattr(neval, evaluator)(shard, **kwargs), errObj)
+    ret = "OK"
+    for count, value in enumerate(shard):
+        if deadline is not None and deadline.expired():
+            errObj.addUnknown("deadline of {}s reached after {} values".format(deadline.budget, count))
+            return ("UNKNOWN", errObj)
+        r = evaluator(neval, value)
+        if _RVALS[r] > _RVALS[ret]:
+            ret = r
+    return (ret, errObj)
+
+
+class NagEnumMatcher(object):
+    '''
+
+    The NagEnumMatcher object is a precompiled lookup of enumerated values to statuses
+
+    The four lists are merged once into a single value->status map, so matching a value
+    is a hash lookup instead of a scan of every list. Precedence is the same as evalEnum
+    (unknown > critical > warning > ok). Unhashable values, and lists containing
+    unhashable entries, fall back to scanning the lists.
+
+    Args:
+        okValues (List of str/num): Values to match for OK Status
+        warningValues (List of str/num): Values to match for Warning Status
+        criticalValues (List of str/num): Values to match for Critical Status
+        unknownValues (List of str/num): Values to match for Unknown Status
+
+    Attributes:
+        statusMap (dict): Map of value to status, None if the lists could not be hashed
+    '''
+    def __init__(self, okValues=[], warningValues=[], criticalValues=[], unknownValues=[]):
+        self._lists = (("UNKNOWN", unknownValues), ("CRITICAL", criticalValues), ("WARNING", warningValues), ("OK", okValues))
+        self.statusMap = {}
+        try:
+            for status, vals in reversed(self._lists):
+                if isinstance(vals, str):
+                    raise TypeError("substring match")
+                for v in vals:
+                    self.statusMap[v] = status
+        except TypeError:
+            self.statusMap = None
+
+    def scan(self, value):
+        '''
+        Match a value by scanning the lists in order of precedence
+
+        Args:
+            value (str/num): Value to match
+
+        Returns:
+            str: Matched status (OK,WARNING,CRITICAL,UNKNOWN), or None if value is in no list
+        '''
+        for status, vals in self._lists:
+            if value in vals:
+                return status
+        return None
+
+    def worstStatus(self, defaultStatus="UNKNOWN"):
+        '''
+        Get the worst status the matcher can produce
+
+        Args:
+            defaultStatus (str): Status of values that are in no list
+
+        Returns:
+            str: The worst status, One of (OK,WARNING,CRITICAL,UNKNOWN)
+        '''
+        for status, vals in self._lists:
+            if len(vals) > 0:
+                return status if _RVALS[status] > _RVALS[defaultStatus] else defaultStatus
+        return defaultStatus
+
+    def match(self, value):
+        '''
+        Match a value
+
+        Args:
+            value (str/num): Value to match
+
+        Returns:
+            str: Matched status (OK,WARNING,CRITICAL,UNKNOWN), or None if value is in no list
+        '''
+        if self.statusMap is not None:
+            try:
+                return self.statusMap.get(value)
+            except TypeError:
+                pass
+        return self.scan(value)
+
+
+class NagEval(object):
+    '''
+
+    The NagEval object provides common comparison/evaluators for testdata
+
+    Args:
+        errObj (NagErrors): NagErrors object used to store results
+        deadline (NagDeadline): Stop list evaluations once its budget is spent, None for no deadline
+
+    Attributes:
+        errObj (NagErrors): NagErrors object used to store results
+        deadline (NagDeadline): Deadline checked by list evaluations
+        vectorMinSize (int): Lists of numbers at least this long are evaluated with numpy, if it is imported
+        vectorImport (bool): Import numpy to evaluate long lists, instead of only using it once it is
+                             imported (importing it takes longer than evaluating most lists)
+        lastSkipped (int): Number of values the last list evaluation left unevaluated because of shortCircuit,
+                           None if they were not counted (iterables without a length)
+    '''
+    vectorMinSize = 256
+    vectorImport = False
+
+    def __init__(self, errObj, deadline=None):
+        self.errObj = errObj
+        self.deadline = deadline
+        self.lastSkipped = 0
+
+    def _evalEmpty(self, emptyStatus, prefixText, postfixText):
+        '''
+        Record the result of evaluating an empty list
+
+        Args:
+            emptyStatus (str): Result if values is an empty list
+            prefixText (str): String to prefix error reports
+            postfixText (str): String to append to error reports
+
+        Returns:
+            str: emptyStatus
+        '''
+        if emptyStatus != "OK":
+            self.errObj.addTemplateRecord(emptyStatus.lower(), TEMPLATE_EMPTY, None, prefixText=prefixText, postfixText=postfixText)
+        return(emptyStatus)
+
+    def _evalIter(self, values, evaluate, args, maxStatus):
+        '''
+        Evaluate values one at a time, consuming them lazily
+
+        Args:
+            values (iterable): Values to test
+            evaluate (callable): Called as evaluate(value, *args), returns the status of the value
+            args (tuple): Further arguments for evaluate
+            maxStatus (str): Stop consuming values once this status is reached, None to evaluate every value
+
+        The deadline, if any, is checked every 256 values. Once it is reached the remaining values
+        are left unevaluated and an UNKNOWN record says how many values were evaluated.
+
+        Effects:
+            self.lastSkipped (int): Number of values left unevaluated, None if values has no length
+
+        Returns:
+            (str, int): Worst result and the number of values evaluated
+        '''
+        ret = "OK"
+        worst = 0
+        stop = _RVALS[maxStatus] if maxStatus is not None else len(_STATUSES)
+        deadline = self.deadline
+        count = 0
+        for value in values:
+            count += 1
+            r = evaluate(value, *args)
+            if _RVALS[r] > worst:
+                worst = _RVALS[r]
+                ret = r
+            if worst >= stop:
+                self.lastSkipped = len(values) - count if hasattr(values, '__len__') else None
+                break
+            if deadline is not None and count & 0xff == 0 and deadline.expired():
+                self.errObj.addUnknown("deadline of {}s reached after {} values".format(deadline.budget, count))
+                self.lastSkipped = len(values) - count if hasattr(values, '__len__') else None
+                ret = "UNKNOWN"
+                break
+        return (ret, count)
+
+    def _deadlineReached(self, size):
+        '''
+        Check the deadline before evaluating a whole array, recording UNKNOWN if it is reached
+
+        Args:
+            size (int): Number of values that would be evaluated
+
+        Effects:
+            self.lastSkipped (int): size, if the deadline is reached
+
+        Returns:
+            bool: True if the values should not be evaluated
+        '''
+        deadline = self.deadline
+        if deadline is None or not deadline.expired():
+            return False
+        self.errObj.addUnknown("deadline of {}s reached after 0 values".format(deadline.budget))
+        self.lastSkipped = size
+        return True
+
+    def _evalDedup(self, values, evaluate, postfixText, maxStatus):
+        '''
+        Evaluate each distinct value once, with one record counting its repeats
+
+        The values are counted first (numpy arrays with numpy.unique), then each distinct value
+        is evaluated in the order it first appears. Records of repeated values get " (xN)"
+        appended to the postfix, so the worst result is the same as evaluating every value.
+        Lists with unhashable values are evaluated value by value, without grouping.
+
+        Args:
+            values (iterable or numpy.ndarray): Values to test
+            evaluate (callable): Called as evaluate(value, postfixText), returns the status of the value
+            postfixText (str): String to append to error reports
+            maxStatus (str): Stop evaluating distinct values once this status is reached, None to evaluate all of them
+
+        Effects:
+            self.lastSkipped (int): Number of distinct values left unevaluated
+
+        Returns:
+            (str, int): Worst result and the number of values
+        '''
+        if _isNumpyArray(values):
+            np = sys.modules['numpy']
+            uniq, first, counts = np.unique(values.ravel(), return_index=True, return_counts=True)
+            order = np.argsort(first)
+            groups = list(zip(uniq[order].tolist(), counts[order].tolist()))
+            total = values.size
+        else:
+            from collections import Counter
+            if not hasattr(values, '__len__'):
+                values = list(values)
+            try:
+                counted = Counter(values)
+            except TypeError:
+                # unhashable values can't be grouped, evaluate each of them
+                ret, count = self._evalIter(values, evaluate, (postfixText,), maxStatus)
+                return (ret, count)
+            groups = list(counted.items())
+            total = sum(counted.values())
+
+        def evalGroup(group):
+            value, n = group
+            return evaluate(value, postfixText if n == 1 else "{} (x{})".format(postfixText, n))
+        ret, _ = self._evalIter(groups, evalGroup, (), maxStatus)
+        return (ret, total)
+
+    def _asVector(self, values):
+        '''
+        Convert a list of numbers to a numpy array, if it is worth doing
+
+        Lists shorter than vectorMinSize, lists that are not purely int/float,
+        lists converted to floats with a magnitude of 2**53 or more (where ints
+        would lose precision) and processes that have not imported numpy (unless
+        vectorImport is set) return None so the caller uses the scalar path.
+
+        Args:
+            values (List of num): Values to convert
+
+        Returns:
+            numpy.ndarray: The converted values, or None
+        '''
+        if len(values) < self.vectorMinSize:
+            return None
+        np = _getNumpy() if self.vectorImport else sys.modules.get('numpy')
+        if np is None:
+            return None
+        try:
+            arr = np.asarray(values)
+        except (ValueError, TypeError):
+            return None
+        if arr.ndim != 1 or arr.dtype.kind not in 'iuf':
+            return None
+        if arr.dtype.kind == 'f' and (np.abs(arr) >= 2 ** 53).any():
+            return None
+        return arr
+
+    def _evalVectorNumber(self, arr, values, op, warning, critical, prefixText, postfixText, numberUnits, maxStatus=None):
+        '''
+        Evaluate a numpy array against thresholds as whole-array operations
+
+        Records are only created for the values that breach a threshold, and match
+        the ones generated by evalNumberAsc/evalNumberDesc/evalRange.
+
+        Args:
+            arr (numpy.ndarray): Values to test
+            values (List of num or numpy.ndarray): Values to format in error reports, aligned with arr
+            op (str): '>' for ascending thresholds, '<' for descending thresholds, 'range' for NagRange's
+            warning (num or NagRange): Warning threshold
+            critical (num or NagRange): Critical threshold
+            prefixText (str): String to prefix error reports
+            postfixText (str): String to append to error reports
+            numberUnits (str): Units to append to numbers in error reports
+            maxStatus (str): Ignore the values after the first one reaching this status, like _evalIter,
+                             None to evaluate every value
+
+        Effects:
+            self.errObj (NagErrors): Updated with error records
+            self.lastSkipped (int): Number of values ignored because of maxStatus
+
+        Returns:
+            str: Result of test, One of (OK,WARNING,CRITICAL)
+        '''
+        np = sys.modules['numpy']
+        if arr.ndim != 1:
+            arr = arr.ravel()
+            values = arr
+        if op == 'range':
+            mask = lambda threshold: threshold.alertArray(arr)
+            template = lambda threshold: threshold.template()
+        else:
+            compare = np.greater if op == '>' else np.less
+            mask = lambda threshold: compare(arr, threshold)
+            template = lambda threshold: TEMPLATE_ABOVE if op == '>' else TEMPLATE_BELOW
+        crit = mask(critical) if critical is not None else np.zeros(arr.shape, dtype=bool)
+        if warning is not None:
+            warn = mask(warning)
+            warn &= ~crit
+        else:
+            warn = np.zeros(arr.shape, dtype=bool)
+        if maxStatus is not None:
+            reached = {"OK": np.ones(arr.shape, dtype=bool), "WARNING": crit | warn, "CRITICAL": crit}[maxStatus]
+            if reached.any():
+                # the values after the first one reaching maxStatus are not evaluated
+                stop = int(reached.argmax()) + 1
+                crit[stop:] = False
+                warn[stop:] = False
+                self.lastSkipped = arr.size - stop
+
+        addTemplateRecord = self.errObj.addTemplateRecord
+        if critical is not None:
+            critTemplate = template(critical)
+            for i in np.flatnonzero(crit).tolist():
+                addTemplateRecord('critical', critTemplate, values[i], critical, numberUnits, prefixText, postfixText)
+        if warning is not None:
+            warnTemplate = template(warning)
+            for i in np.flatnonzero(warn).tolist():
+                addTemplateRecord('warning', warnTemplate, values[i], warning, numberUnits, prefixText, postfixText)
+        if crit.any():
+            return("CRITICAL")
+        if warn.any():
+            return("WARNING")
+        return("OK")
+
+    def _evalListNumber(self, values, op, emptyStatus, warning, critical, prefixText, postfixText, numberUnits, perfLabel, perfAggregate, shortCircuit, dedup=False):
+        '''
+        Evaluate a list of values based on ascending or descending thresholds
+
+        Args:
+            values (iterable of num or numpy.ndarray): Values to test
+            op (str): '>' for ascending thresholds, '<' for descending thresholds, 'range' for NagRange's
+            emptyStatus (str): Result if values is an empty list
+            warning (num or NagRange): Warning threshold
+            critical (num or NagRange): Critical threshold
+            prefixText (str): String to prefix error reports
+            postfixText (str): String to append to error reports
+            numberUnits (str): Units to append to numbers in error reports
+            perfLabel (str): Record perfdata with this label
+            perfAggregate (enum str): None to record each value, or one of 'min', 'max', 'mean', 'sum', 'count'
+            shortCircuit (bool): Stop evaluating once the worst possible status is reached
+            dedup (bool): Evaluate each distinct value once, see _evalDedup
+
+        Effects:
+            self.errObj (NagErrors): Updated with error records
+            self.lastSkipped (int): Number of values left unevaluated by shortCircuit
+
+        Returns:
+            str: Result of test, One of (OK,WARNING,CRITICAL,UNKNOWN)
+        '''
+        evalNumber = {'>': self.evalNumberAsc, '<': self.evalNumberDesc, 'range': self.evalRange}[op]
+        self.lastSkipped = 0
+        arr = None
+        acc = None
+        if _isNumpyArray(values):
+            if values.size == 0:
+                return self._evalEmpty(emptyStatus, prefixText, postfixText)
+            arr = values
+        elif _isScalar(values):
+            if values == "":
+                return self._evalEmpty(emptyStatus, prefixText, postfixText)
+            return evalNumber(values, warning, critical, prefixText, postfixText, numberUnits, perfLabel)
+        else:
+            if not hasattr(values, '__len__') and perfLabel is not None:
+                if perfAggregate is None:
+                    # every value becomes a perfdata point, so they are kept anyway
+                    values = list(values)
+                else:
+                    acc = _RunningAggregate()
+                    values = acc.feed(values)
+            if hasattr(values, '__len__'):
+                if len(values) == 0:
+                    return self._evalEmpty(emptyStatus, prefixText, postfixText)
+                arr = self._asVector(values)
+
+        maxStatus = None
+        if shortCircuit:
+            maxStatus = "CRITICAL" if critical is not None else "WARNING" if warning is not None else "OK"
+        if dedup:
+            ret, count = self._evalDedup(values, lambda value, postfix: evalNumber(value, warning, critical, prefixText, postfix, numberUnits), postfixText, maxStatus)
+            if count == 0:
+                return self._evalEmpty(emptyStatus, prefixText, postfixText)
+        elif arr is not None:
+            if self._deadlineReached(arr.size):
+                ret = "UNKNOWN"
+            else:
+                ret = self._evalVectorNumber(arr, values, op, warning, critical, prefixText, postfixText, numberUnits, maxStatus)
+        else:
+            ret, count = self._evalIter(values, evalNumber, (warning, critical, prefixText, postfixText, numberUnits), maxStatus)
+            if count == 0:
+                return self._evalEmpty(emptyStatus, prefixText, postfixText)
+            if acc is not None:
+                # the aggregate covers the values left unevaluated by shortCircuit
+                for _ in values:
+                    pass
+
+        if perfLabel is not None:
+            uom = _perfUnits(numberUnits)
+            warning = _perfThreshold(op, warning)
+            critical = _perfThreshold(op, critical)
+            if perfAggregate is None:
+                self.errObj.addPerfDataList(perfLabel, values, uom, warning, critical)
+            elif acc is not None:
+                self.errObj.addPerfData(perfLabel, acc.result(perfAggregate), uom, warning, critical)
+            else:
+                self.errObj.addPerfData(perfLabel, _aggregate(arr if arr is not None else values, perfAggregate), uom, warning, critical)
+        return ret
+
+    def evalListParallel(self, values, evaluator, executor=None, workers=4, chunkSize=None, useProcesses=False, **kwargs):
+        '''
+        Evaluate a list of values in shards across a thread or process pool
+
+        Each shard is evaluated with its own NagErrors object in a worker, and the results are
+        merged back into self.errObj in the order of the shards, so the records are in the same
+        order as a serial evaluation. With processes, values, evaluator and kwargs must be picklable.
+
+        The deadline, if any, is checked before each shard is merged. Once it is reached the
+        remaining shards are abandoned and an UNKNOWN record says how many values were merged.
+        Thread workers also get the deadline, so their shards stop early.
+
+        Args:
+            values (List of any): Values to test
+            evaluator (str or callable): Name of a NagEval list evaluator (e.g. 'evalListNumberAsc') called with
+                                         each shard and kwargs, or a function called as evaluator(neval, value)
+                                         for each value that returns the status
+            executor (concurrent.futures.Executor): Executor to use, None to create one for this call
+            workers (int): Number of workers when creating an executor
+            chunkSize (int): Number of values per shard, defaults to spreading the values over 4 shards per worker
+            useProcesses (bool): Create a ProcessPoolExecutor instead of a ThreadPoolExecutor
+            **kwargs: Keyword arguments for the list evaluator
+
+        Effects:
+            self.errObj (NagErrors): Updated with error records
+            self.lastSkipped (int): Number of values in the shards abandoned because of the deadline
+
+        Returns:
+            str: Worst result of the shards, One of (OK,WARNING,CRITICAL,UNKNOWN)
+        '''
+        self.lastSkipped = 0
+        if 'perfLabel' in kwargs:
+            raise ValueError("perfLabel is not supported by evalListParallel, the shards would label their points separately")
+        values = list(values)
+        if len(values) == 0:
+            if callable(evaluator):
+                return self._evalEmpty(kwargs.get('emptyStatus', "UNKNOWN"), kwargs.get('prefixText', ""), kwargs.get('postfixText', ""))
+            return getattr(self, evaluator)(values, **kwargs)
+        if chunkSize is None:
+            chunkSize = max(1, -(-len(values) // (workers * 4)))
+        if self._deadlineReached(len(values)):
+            return "UNKNOWN"
+        shards = [values[i:i + chunkSize] for i in range(0, len(values), chunkSize)]
+        config = {'maxRecords': self.errObj.maxRecords, 'keepRecords': self.errObj.keepRecords, 'perfLimit': self.errObj.perfLimit}
+
+        import concurrent.futures
+        ownExecutor = executor is None
+        if ownExecutor:
+            pool = concurrent.futures.ProcessPoolExecutor if useProcesses else concurrent.futures.ThreadPoolExecutor
+            executor = pool(max_workers=workers)
+        deadline = self.deadline
+        # the deadline can't be shared with worker processes
+        workerDeadline = None if isinstance(executor, concurrent.futures.ProcessPoolExecutor) else deadline
+        ret = "OK"
+        merged = 0
+        abandoned = False
+        try:
+            futures = [executor.submit(_evalShard, config, evaluator, shard, kwargs, workerDeadline) for shard in shards]
+            for shard, future in zip(shards, futures):
+                try:
+                    if deadline is not None and deadline.expired():
+                        raise concurrent.futures.TimeoutError()
+                    r, errObj = future.result(timeout=deadline.remaining() if deadline is not None else None)
+                except concurrent.futures.TimeoutError:
+                    abandoned = True
+                    break
+                self.errObj.merge(errObj)
+                merged += len(shard)
+                if _RVALS[r] > _RVALS[ret]:
+                    ret = r
+        finally:
+            if abandoned:
+                for future in futures:
+                    future.cancel()
+            if ownExecutor:
+                executor.shutdown(wait=not abandoned)
+
+        if abandoned:
+            self.errObj.addUnknown("deadline of {}s reached after {} values".format(deadline.budget, merged))
+            self.lastSkipped = len(values) - merged
+            ret = "UNKNOWN"
+        return ret
+
+    def evalListEnum(self, values, emptyStatus="UNKNOWN", unknownValueStatus="UNKNOWN", okValues=[], warningValues=[], criticalValues=[], unknownValues=[], prefixText="", postfixText= "", matcher=None, shortCircuit=False, dedup=False):
+        '''
+        Evaluate a list of values based on lists of enumerated values
+
+        Args:
+            values (iterable of str/num): Values to test, consumed lazily
+            emptyStatus (str): Result if values is an empty list
+            unknownValueStatus (str): Status to assign to values that are not in any lists (OK, WARNING, CRITICAL, or UNKNOWN)
+            okValues (List of str/num): Values to match for OK Status
+            warningValues (List of str/num): Values to match for Warning Status
+            criticalValues (List of str/num): Values to match for Critical Status
+            unknownValues (List of str/num): Values to match for Unknown Status
+            prefixText (str): String to prefix error reports
+            postfixText (str): String to append to error reports
+            matcher (NagEnumMatcher): Precompiled matcher, used instead of the value lists
+            shortCircuit (bool): Stop consuming values once the worst possible status is reached,
+                                 the number of values skipped is stored in lastSkipped
+            dedup (bool): Evaluate each distinct value once, with one record per distinct value
+                          ending in " (xN)" when it was repeated N times
+
+        Effects:
+            self.errObj (NagErrors): Updated with error records
+
+        Returns:
+            str: Result of test, One of (OK,WARNING,CRITICAL,UNKNOWN)
+        '''
+        self.lastSkipped = 0
+        if _isScalar(values):
+            if values == "":
+                return self._evalEmpty(emptyStatus, prefixText, postfixText)
+            return self.evalEnum(values, unknownValueStatus, okValues, warningValues, criticalValues, unknownValues, prefixText, postfixText, matcher)
+
+        if matcher is None:
+            matcher = NagEnumMatcher(okValues, warningValues, criticalValues, unknownValues)
+        maxStatus = matcher.worstStatus(unknownValueStatus) if shortCircuit else None
+        if dedup:
+            ret, count = self._evalDedup(values, lambda value, postfix: self.evalEnum(value, unknownValueStatus, (), (), (), (), prefixText, postfix, matcher), postfixText, maxStatus)
+        else:
+            ret, count = self._evalIter(values, self.evalEnum, (unknownValueStatus, (), (), (), (), prefixText, postfixText, matcher), maxStatus)
+        if count == 0:
+            return self._evalEmpty(emptyStatus, prefixText, postfixText)
+        return ret
+
+
+    def evalEnum(self, value, defaultStatus="UNKNOWN", okValues=[], warningValues=[], criticalValues=[], unknownValues=[], prefixText="", postfixText= "", matcher=None):
+        '''
+        Evaluate a value based on lists of enumerated values
+
+        Args:
+            value (str/num): Value to test
+            defaultStatus (str): Result if value does not match any list
+            okValues (List of str/num): Values to match for OK Status
+            warningValues (List of str/num): Values to match for Warning Status
+            criticalValues (List of str/num): Values to match for Critical Status
+            unknownValues (List of str/num): Values to match for Unknown Status
+            prefixText (str): String to prefix error reports
+            postfixText (str): String to append to error reports
+            matcher (NagEnumMatcher): Precompiled matcher, used instead of the value lists
+
+        Effects:
+            self.errObj (NagErrors): Updated with error records
+
+        Returns:
+            str: Result of test, One of (OK,WARNING,CRITICAL,UNKNOWN)
+        '''
+        if matcher is not None:
+            status = matcher.match(value)
+        elif value in unknownValues:
+            status = "UNKNOWN"
+        elif value in criticalValues:
+            status = "CRITICAL"
+        elif value in warningValues:
+            status = "WARNING"
+        elif value in okValues:
+            status = "OK"
+        else:
+            status = None
+        if status == "OK":
+            return("OK")
+        if status is not None:
+            self.errObj.addTemplateRecord(status.lower(), TEMPLATE_ENUM, value, prefixText=prefixText, postfixText=postfixText)
+            return(status)
+        if defaultStatus != "OK":
+            self.errObj.addTemplateRecord(defaultStatus.lower(), TEMPLATE_NOTFOUND, value, prefixText=prefixText, postfixText=postfixText)
+        return(defaultStatus)
+    
+
+    def evalListNumberAsc(self, values, emptyStatus="UNKNOWN", warningAbove=None, criticalAbove=None, prefixText="", postfixText="", numberUnits="", perfLabel=None, perfAggregate=None, shortCircuit=False, dedup=False):
+        '''
+        Evaluate a list of values based on ascending thresholds
+
+        Args:
+            values (iterable of num or numpy.ndarray): Values to test, consumed lazily unless they are vectorized
+            emptyStatus (str): Result if values is an empty list
+            warningAbove (num): Generate a warning if value is above this threshold
+            criticalAbove (num): Generate a critical error if value is above this threshold
+            prefixText (str): String to prefix error reports
+            postfixText (str): String to append to error reports
+            numberUnits (str): Units to append to numbers in error reports
+            perfLabel (str): Record perfdata with this label, see NagErrors.addPerfDataList
+            perfAggregate (enum str): None to record each value, or one of 'min', 'max', 'mean', 'sum', 'count'
+                                      to record a single aggregated value
+            shortCircuit (bool): Stop consuming values once the worst possible status is reached,
+                                 the number of values skipped is stored in lastSkipped
+            dedup (bool): Evaluate each distinct value once, with one record per distinct value
+                          ending in " (xN)" when it was repeated N times
+
+        Effects:
+            self.errObj (NagErrors): Updated with error records
+
+        Returns:
+            str: Result of test, One of (OK,WARNING,CRITICAL,UNKNOWN)
+        '''
+        return self._evalListNumber(values, '>', emptyStatus, warningAbove, criticalAbove, prefixText, postfixText, numberUnits, perfLabel, perfAggregate, shortCircuit, dedup)
+
+
+    def evalNumberAsc(self, value, warningAbove=None, criticalAbove=None, prefixText="", postfixText="", numberUnits="", perfLabel=None):
+        '''
+        Evaluate a number, generate warning or critical if above certain thresholds
+
+        Args:
+            value (num): Value to test
+            warningAbove (num): Generate a warning if value is above this threshold
+            criticalAbove (num): Generate a critical error if value is above this threshold
+            prefixText (str): String to prefix error reports
+            postfixText (str): String to append to error reports
+            numberUnits (str): Units to append to numbers in error reports
+            perfLabel (str): Record the value as perfdata with this label
+
+        Effects:
+            self.errObj (NagErrors): Updated with error records
+
+        Returns:
+            str: Result of test, One of (OK,WARNING,CRITICAL)
+        '''
+        if perfLabel is not None:
+            self.errObj.addPerfData(perfLabel, value, _perfUnits(numberUnits), _perfThreshold('>', warningAbove), _perfThreshold('>', criticalAbove))
+        if criticalAbove is not None and value > criticalAbove:
+            self.errObj.addTemplateRecord('critical', TEMPLATE_ABOVE, value, criticalAbove, numberUnits, prefixText, postfixText)
+            return("CRITICAL")
+        if warningAbove is not None and value > warningAbove:
+            self.errObj.addTemplateRecord('warning', TEMPLATE_ABOVE, value, warningAbove, numberUnits, prefixText, postfixText)
+            return("WARNING")
+        return("OK")
+    
+
+    def evalListNumberDesc(self, values, emptyStatus="UNKNOWN", warningBelow=None, criticalBelow=None, prefixText="", postfixText="", numberUnits="", perfLabel=None, perfAggregate=None, shortCircuit=False, dedup=False):
+        '''
+        Evaluate a list of values based on descending thresholds
+
+        Args:
+            values (iterable of num or numpy.ndarray): Values to test, consumed lazily unless they are vectorized
+            emptyStatus (str): Result if values is an empty list
+            warningBelow (num): Generate a warning if value is below this threshold
+            criticalBelow (num): Generate a critical error if value is below this threshold
+            prefixText (str): String to prefix error reports
+            postfixText (str): String to append to error reports
+            numberUnits (str): Units to append to numbers in error reports
+            perfLabel (str): Record perfdata with this label, see NagErrors.addPerfDataList
+            perfAggregate (enum str): None to record each value, or one of 'min', 'max', 'mean', 'sum', 'count'
+                                      to record a single aggregated value
+            shortCircuit (bool): Stop consuming values once the worst possible status is reached,
+                                 the number of values skipped is stored in lastSkipped
+            dedup (bool): Evaluate each distinct value once, with one record per distinct value
+                          ending in " (xN)" when it was repeated N times
+
+        Effects:
+            self.errObj (NagErrors): Updated with error records
+
+        Returns:
+            str: Result of test, One of (OK,WARNING,CRITICAL,UNKNOWN)
         '''
-        self.addRecord('warning', etext)
+        return self._evalListNumber(values, '<', emptyStatus, warningBelow, criticalBelow, prefixText, postfixText, numberUnits, perfLabel, perfAggregate, shortCircuit, dedup)
     
-    def addUnknown(self, etext):
+    def evalNumberDesc(self, value, warningBelow=None, criticalBelow=None, prefixText="", postfixText= "", numberUnits="", perfLabel=None):
         '''
-        Add a unknown record
+        Evaluate a number, generate warning or critical if below certain thresholds
 
         Args:
-            etext (str): The descriptive text of the error
+            value (num): Value to test
+            warningBelow (num): Generate a warning if value is below this threshold
+            criticalBelow (num): Generate a critical error if value is below this threshold
+            prefixText (str): String to prefix error reports
+            postfixText (str): String to append to error reports
+            numberUnits (str): Units to append to numbers in error reports
+            perfLabel (str): Record the value as perfdata with this label
+
+        Effects:
+            self.errObj (NagErrors): Updated with error records
+
+        Returns:
+            str: Result of test, One of (OK,WARNING,CRITICAL)
         '''
-        self.addRecord('unknown', etext)
+        if perfLabel is not None:
+            self.errObj.addPerfData(perfLabel, value, _perfUnits(numberUnits), _perfThreshold('<', warningBelow), _perfThreshold('<', criticalBelow))
+        if criticalBelow is not None and value < criticalBelow:
+            self.errObj.addTemplateRecord('critical', TEMPLATE_BELOW, value, criticalBelow, numberUnits, prefixText, postfixText)
+            return("CRITICAL")
+        if warningBelow is not None and value < warningBelow:
+            self.errObj.addTemplateRecord('warning', TEMPLATE_BELOW, value, warningBelow, numberUnits, prefixText, postfixText)
+            return("WARNING")
+        return("OK")
 
-    def formatStatus(self, stype, sarr):
+    def evalDataAge(self, age, maxAge, status="UNKNOWN", prefixText="", postfixText=""):
         '''
-        Format an array of status lines
+        Evaluate the age of probe data, e.g. the age of a NagCacheEntry
 
         Args:
-            stype (str): Error Type of array
-            sarr (List of str's): Error Messages
+            age (num): Age of the data in seconds
+            maxAge (num): Generate a record if the data is older than this
+            status (str): Status if the data is too old (WARNING, CRITICAL, or UNKNOWN)
+            prefixText (str): String to prefix error reports
+            postfixText (str): String to append to error reports
+
+        Effects:
+            self.errObj (NagErrors): Updated with error records
 
         Returns:
-            str: Formated list of errors
+            str: Result of test, OK or status
         '''
-        ret = ""
-        if len(sarr) == 1:
-            ret += "{} {}\r\n".format(stype, sarr[0])
-        else:
-            ret += "{}:\r\n".format(stype)
-            for l in sarr:
-                ret += "    {}\r\n".format(l)
-        return(ret)
+        if age > maxAge:
+            self.errObj.addTemplateRecord(status.lower(), TEMPLATE_AGE, age, maxAge, "s", prefixText, postfixText)
+            return(status)
+        return("OK")
 
-    def printStatus(self):
+    def evalCounterRate(self, store, key, value, warningAbove=None, criticalAbove=None, perSeconds=1, counterMax=None, prefixText="", postfixText="", numberUnits="", perfLabel=None, now=None):
         '''
-        Print properly formatted Nagios status information
+        Evaluate the rate of a counter, generate warning or critical if above certain thresholds
+
+        The counter value is stored in a NagStateStore, and the rate is computed from the previous
+        sample. The first sample, and samples after a counter reset, are OK.
 
         Args:
-            - none -
+            store (NagStateStore): Store holding the previous samples
+            key (str): Stable key of the series, e.g. "eth0 rx_bytes"
+            value (num): Current counter value
+            warningAbove (num): Generate a warning if the rate is above this threshold
+            criticalAbove (num): Generate a critical error if the rate is above this threshold
+            perSeconds (num): Rate interval, e.g. 60 for a rate per minute
+            counterMax (num): Value at which the counter wraps to 0 (e.g. 2**32), None if it doesn't wrap
+            prefixText (str): String to prefix error reports
+            postfixText (str): String to append to error reports
+            numberUnits (str): Units to append to numbers in error reports
+            perfLabel (str): Record the rate as perfdata with this label
+            now (float): Time of the sample, defaults to time.time()
+
+        Effects:
+            self.errObj (NagErrors): Updated with error records
+
+        Returns:
+            str: Result of test, One of (OK,WARNING,CRITICAL)
         '''
-        if len(self.unknown) > 0 :
-            click.echo(self.formatStatus('UNKNOWN', self.unknown))
-        if len(self.critical) > 0 :
-            click.echo(self.formatStatus('CRITICAL', self.critical))
-        if len(self.warning) > 0 :
-            click.echo(self.formatStatus('WARNING', self.warning))
-        if len(self.unknown) + len(self.critical) + len(self.warning) == 0 :
-            click.echo('OK')
-        
-    def getExitCode(self):
+        rate = store.counterRate(key, value, now, counterMax)
+        if rate is None:
+            return("OK")
+        return self.evalNumberAsc(rate * perSeconds, warningAbove, criticalAbove, prefixText, postfixText, numberUnits, perfLabel)
+
+    def evalEwmaDeviation(self, store, key, value, warningDeviation=None, criticalDeviation=None, alpha=0.3, minSamples=5, prefixText="", postfixText="", now=None):
         '''
-        Get the returncode that should be exited with.
+        Evaluate how far a value deviates from its exponentially weighted baseline
+
+        The deviation is measured in standard deviations of the baseline. The baseline is kept
+        in a NagStateStore, and the value is added to it after the evaluation.
 
         Args:
-            - none -
+            store (NagStateStore): Store holding the baseline
+            key (str): Stable key of the series, e.g. "queue depth"
+            value (num): Current value
+            warningDeviation (num): Generate a warning if the value is more than this many standard deviations from the baseline
+            criticalDeviation (num): Generate a critical error if the value is more than this many standard deviations from the baseline
+            alpha (float): Weight of new samples in the baseline, between 0 and 1
+            minSamples (int): Number of samples needed before the baseline is used, values are OK until then
+            prefixText (str): String to prefix error reports
+            postfixText (str): String to append to error reports
+            now (float): Time of the sample, defaults to time.time()
+
+        Effects:
+            self.errObj (NagErrors): Updated with error records
 
         Returns:
-            int: Calculated returncode based on the current status lines
+            str: Result of test, One of (OK,WARNING,CRITICAL)
         '''
-        if len(self.unknown) > 0 :
-            return 3
-        if len(self.critical) > 0 :
-            return 2
-        if len(self.warning) > 0 :
-            return 1
-        return 0
+        mean, stddev, count = store.ewma(key, value, alpha, now)
+        if count < minSamples:
+            return("OK")
+        if stddev > 0:
+            deviation = round(abs(value - mean) / stddev, 2)
+        else:
+            deviation = 0.0 if value == mean else float('inf')
+        return self.evalNumberAsc(deviation, warningDeviation, criticalDeviation, "{}{} deviation ".format(prefixText, value), postfixText, " sigma")
 
-    def doExit(self):
+    def evalWindowCount(self, window, value, warningAbove=None, criticalAbove=None, warningBelow=None, criticalBelow=None, warningCount=1, criticalCount=1, prefixText="", postfixText="", numberUnits="", now=None):
         '''
-        Exit with the proper returncode
+        Evaluate how many samples in a time window breached a threshold, e.g. above 90% for 5 of the last 10 minutes
+
+        The sample and its status are added to the NagWindowStore, whose running per-status
+        counts give the number of breaching samples in the window.
 
         Args:
-            - none -
+            window (NagWindowStore): Store holding the samples of the window
+            value (num): The sample
+            warningAbove (num): A sample is a warning if it is above this threshold
+            criticalAbove (num): A sample is critical if it is above this threshold
+            warningBelow (num): A sample is a warning if it is below this threshold
+            criticalBelow (num): A sample is critical if it is below this threshold
+            warningCount (int): Generate a warning if at least this many samples in the window are warnings (or critical)
+            criticalCount (int): Generate a critical error if at least this many samples in the window are critical
+            prefixText (str): String to prefix error reports
+            postfixText (str): String to append to error reports
+            numberUnits (str): Units to append to numbers in error reports
+            now (float): Time of the sample, defaults to time.time()
+
+        Effects:
+            self.errObj (NagErrors): Updated with error records
+
+        Returns:
+            str: Result of test, One of (OK,WARNING,CRITICAL)
         '''
-        sys.exit(self.getExitCode())
+        def breaches(above, below):
+            return (above is not None and value > above) or (below is not None and value < below)
 
+        code = 2 if breaches(criticalAbove, criticalBelow) else 1 if breaches(warningAbove, warningBelow) else 0
+        stats = window.add(value, code, now)
+        for status, code, above, below, minCount in (("CRITICAL", 2, criticalAbove, criticalBelow, criticalCount),
+                                                     ("WARNING", 1, warningAbove, warningBelow, warningCount)):
+            count = stats.atLeast(code)
+            if (above is not None or below is not None) and count >= minCount:
+                desc = []
+                if above is not None:
+                    desc.append("> {}{}".format(above, numberUnits))
+                if below is not None:
+                    desc.append("< {}{}".format(below, numberUnits))
+                self.errObj.addRecord(status.lower(), "{}{} of {} samples in the last {:g}s are {}{}".format(
+                    prefixText, count, stats.count, window.window, " or ".join(desc), postfixText))
+                return(status)
+        return("OK")
 
-class NagEval(object):
-    '''
+    def evalWindowAverage(self, window, value, warningAbove=None, criticalAbove=None, warningBelow=None, criticalBelow=None, prefixText="", postfixText="", numberUnits="", perfLabel=None, now=None):
+        '''
+        Evaluate the average of the samples in a time window, e.g. the average over the last 15 minutes
 
-    The NagEval object provides common comparison/evaluators for testdata
+        The sample is added to the NagWindowStore, whose running sum gives the average.
 
-    Args:
-        errObj (NagErrors): NagErrors object used to store results
+        Args:
+            window (NagWindowStore): Store holding the samples of the window
+            value (num): The sample
+            warningAbove (num): Generate a warning if the average is above this threshold
+            criticalAbove (num): Generate a critical error if the average is above this threshold
+            warningBelow (num): Generate a warning if the average is below this threshold
+            criticalBelow (num): Generate a critical error if the average is below this threshold
+            prefixText (str): String to prefix error reports
+            postfixText (str): String to append to error reports
+            numberUnits (str): Units to append to numbers in error reports
+            perfLabel (str): Record the average as perfdata with this label
+            now (float): Time of the sample, defaults to time.time()
 
-    Attributes:
-        errObj (NagErrors): NagErrors object used to store results
-    '''
-    def __init__(self, errObj):
-        self.errObj = errObj
+        Effects:
+            self.errObj (NagErrors): Updated with error records
 
+        Returns:
+            str: Result of test, One of (OK,WARNING,CRITICAL)
+        '''
+        stats = window.add(value, 0, now)
+        mean = round(stats.mean, 2)
+        prefixText = "{}{:g}s average ".format(prefixText, window.window)
+        hasAbove = warningAbove is not None or criticalAbove is not None
+        hasBelow = warningBelow is not None or criticalBelow is not None
+        if hasAbove or not hasBelow:
+            r = self.evalNumberAsc(mean, warningAbove, criticalAbove, prefixText, postfixText, numberUnits, perfLabel)
+            if r != "OK" or not hasBelow:
+                return r
+        return self.evalNumberDesc(mean, warningBelow, criticalBelow, prefixText, postfixText, numberUnits, None if hasAbove else perfLabel)
 
-    def evalListEnum(self, values, emptyStatus="UNKNOWN", unknownValueStatus="UNKNOWN", okValues=[], warningValues=[], criticalValues=[], unknownValues=[], prefixText="", postfixText= ""):
+    def evalLogScan(self, scanner, warningAbove=None, criticalAbove=None, prefixText="", postfixText="", perf=False):
         '''
-        Evaluate a list of values based on lists of enumerated values
+        Evaluate the number of new log lines matching each pattern of a NagLogScanner
 
         Args:
-            values (List of str/num): Values to test
-            emptyStatus (str): Result if values is an empty list
-            unknownValueStatus (str): Status to assign to values that are not in any lists (OK, WARNING, CRITICAL, or UNKNOWN)
-            okValues (List of str/num): Values to match for OK Status
-            warningValues (List of str/num): Values to match for Warning Status
-            criticalValues (List of str/num): Values to match for Critical Status
-            unknownValues (List of str/num): Values to match for Unknown Status
-            prefixText (str): String to prefix error reports
+            scanner (NagLogScanner): Scanner of the log
+            warningAbove (num or dict): Generate a warning if a count is above this threshold, or a map of pattern name to threshold
+            criticalAbove (num or dict): Generate a critical error if a count is above this threshold, or a map of pattern name to threshold
+            prefixText (str): String to prefix error reports, followed by "<pattern name> lines "
             postfixText (str): String to append to error reports
+            perf (bool): Record each count as perfdata labeled with the pattern name
 
         Effects:
-            self.errObj (NagErrors): Updated with error strings
+            self.errObj (NagErrors): Updated with error records
 
         Returns:
             str: Result of test, One of (OK,WARNING,CRITICAL,UNKNOWN)
         '''
-        if (type(values) == list and len(values) == 0) or (type(values) != list and values == ""):
-            if emptyStatus != "OK":
-                self.errObj.addRecord(emptyStatus.lower(),"{}list is Empty{}".format(prefixText, postfixText))
-            return(emptyStatus)
-        if type(values) != list:
-            return self.evalEnum(values, unknownValueStatus, okValues, warningValues, criticalValues, unknownValues, prefixText, postfixText)
-
+        try:
+            counts = scanner.scan()
+        except OSError as e:
+            self.errObj.addUnknown("{}log {} not readable: {}".format(prefixText, scanner.path, e))
+            return("UNKNOWN")
         ret = "OK"
-        rvals = {"OK": 0, "WARNING": 1, "CRITICAL": 2, "UNKNOWN": 3}
-        for value in values:
-            r = self.evalEnum(value, unknownValueStatus, okValues, warningValues, criticalValues, unknownValues, prefixText, postfixText)
-            if rvals[r] > rvals[ret]:
+        for name, count in counts.items():
+            warning = warningAbove.get(name) if isinstance(warningAbove, dict) else warningAbove
+            critical = criticalAbove.get(name) if isinstance(criticalAbove, dict) else criticalAbove
+            r = self.evalNumberAsc(count, warning, critical, "{}{} lines ".format(prefixText, name), postfixText, perfLabel=name if perf else None)
+            if _RVALS[r] > _RVALS[ret]:
                 ret = r
         return ret
 
-
-    def evalEnum(self, value, defaultStatus="UNKNOWN", okValues=[], warningValues=[], criticalValues=[], unknownValues=[], prefixText="", postfixText= ""):
+    def evalListRange(self, values, emptyStatus="UNKNOWN", warningRange=None, criticalRange=None, prefixText="", postfixText="", numberUnits="", perfLabel=None, perfAggregate=None, shortCircuit=False, dedup=False):
         '''
-        Evaluate a value based on lists of enumerated values
+        Evaluate a list of values based on Nagios ranges
 
         Args:
-            value (str/num): Value to test
-            defaultStatus (str): Result if value does not match any list
-            okValues (List of str/num): Values to match for OK Status
-            warningValues (List of str/num): Values to match for Warning Status
-            criticalValues (List of str/num): Values to match for Critical Status
-            unknownValues (List of str/num): Values to match for Unknown Status
+            values (iterable of num or numpy.ndarray): Values to test, consumed lazily unless they are vectorized
+            emptyStatus (str): Result if values is an empty list
+            warningRange (str or NagRange): Generate a warning if value alerts on this range (e.g. "10:20", "~:5", "@10:20")
+            criticalRange (str or NagRange): Generate a critical error if value alerts on this range
             prefixText (str): String to prefix error reports
             postfixText (str): String to append to error reports
+            numberUnits (str): Units to append to numbers in error reports
+            perfLabel (str): Record perfdata with this label, see NagErrors.addPerfDataList
+            perfAggregate (enum str): None to record each value, or one of 'min', 'max', 'mean', 'sum', 'count'
+                                      to record a single aggregated value
+            shortCircuit (bool): Stop consuming values once the worst possible status is reached,
+                                 the number of values skipped is stored in lastSkipped
+            dedup (bool): Evaluate each distinct value once, with one record per distinct value
+                          ending in " (xN)" when it was repeated N times
 
         Effects:
-            self.errObj (NagErrors): Updated with error strings
+            self.errObj (NagErrors): Updated with error records
 
         Returns:
             str: Result of test, One of (OK,WARNING,CRITICAL,UNKNOWN)
         '''
-        if value in unknownValues:
-            self.errObj.addUnknown("{}value is {}{}".format(prefixText, value, postfixText))
-            return("UNKNOWN")
-        if value in criticalValues:
-            self.errObj.addCritical("{}value is {}{}".format(prefixText, value, postfixText))
+        warningRange = NagRange.compile(warningRange) if warningRange is not None else None
+        criticalRange = NagRange.compile(criticalRange) if criticalRange is not None else None
+        return self._evalListNumber(values, 'range', emptyStatus, warningRange, criticalRange, prefixText, postfixText, numberUnits, perfLabel, perfAggregate, shortCircuit, dedup)
+
+    def evalRange(self, value, warningRange=None, criticalRange=None, prefixText="", postfixText="", numberUnits="", perfLabel=None):
+        '''
+        Evaluate a number based on Nagios ranges
+
+        Args:
+            value (num): Value to test
+            warningRange (str or NagRange): Generate a warning if value alerts on this range (e.g. "10:20", "~:5", "@10:20")
+            criticalRange (str or NagRange): Generate a critical error if value alerts on this range
+            prefixText (str): String to prefix error reports
+            postfixText (str): String to append to error reports
+            numberUnits (str): Units to append to numbers in error reports
+            perfLabel (str): Record the value as perfdata with this label
+
+        Effects:
+            self.errObj (NagErrors): Updated with error records
+
+        Returns:
+            str: Result of test, One of (OK,WARNING,CRITICAL)
+        '''
+        if criticalRange is not None:
+            criticalRange = NagRange.compile(criticalRange)
+        if warningRange is not None:
+            warningRange = NagRange.compile(warningRange)
+        if perfLabel is not None:
+            self.errObj.addPerfData(perfLabel, value, _perfUnits(numberUnits), _perfThreshold('range', warningRange), _perfThreshold('range', criticalRange))
+        if criticalRange is not None and criticalRange.alert(value):
+            self.errObj.addTemplateRecord('critical', criticalRange.template(), value, criticalRange, numberUnits, prefixText, postfixText)
             return("CRITICAL")
-        if value in warningValues:
-            self.errObj.addWarning("{}value is {}{}".format(prefixText, value, postfixText))
+        if warningRange is not None and warningRange.alert(value):
+            self.errObj.addTemplateRecord('warning', warningRange.template(), value, warningRange, numberUnits, prefixText, postfixText)
             return("WARNING")
-        if value in okValues:
-            return("OK")
-        if defaultStatus != "OK":
-            self.errObj.addRecord(defaultStatus.lower(), "{}value {} not found{}".format(prefixText, value, postfixText))
-        return(defaultStatus)
-    
+        return("OK")
 
-    def evalListNumberAsc(self, values, emptyStatus="UNKNOWN", warningAbove=None, criticalAbove=None, prefixText="", postfixText="", numberUnits=""):
+    def evalListBands(self, values, bands, emptyStatus="UNKNOWN", prefixText="", postfixText="", numberUnits="", shortCircuit=False, dedup=False):
         '''
-        Evaluate a list of values based on ascending thresholds
+        Evaluate a list of values based on sorted bands
+
+        numpy arrays, and lists of at least vectorMinSize numbers if numpy is imported,
+        are classified as whole-array operations.
 
         Args:
-            values (List of num): Values to test
+            values (iterable of num or numpy.ndarray): Values to test, consumed lazily unless they are vectorized
+            bands (NagBands): Bands to classify the values with
             emptyStatus (str): Result if values is an empty list
-            warningAbove (num): Generate a warning if value is above this threshold
-            criticalAbove (num): Generate a critical error if value is above this threshold
             prefixText (str): String to prefix error reports
             postfixText (str): String to append to error reports
             numberUnits (str): Units to append to numbers in error reports
+            shortCircuit (bool): Stop consuming values once the worst possible status is reached,
+                                 the number of values skipped is stored in lastSkipped
+            dedup (bool): Evaluate each distinct value once, with one record per distinct value
+                          ending in " (xN)" when it was repeated N times
 
         Effects:
-            self.errObj (NagErrors): Updated with error strings
+            self.errObj (NagErrors): Updated with error records
 
         Returns:
             str: Result of test, One of (OK,WARNING,CRITICAL,UNKNOWN)
         '''
-        if (type(values) == list and len(values) == 0) or (type(values) != list and values == ""):
-            if emptyStatus != "OK":
-                self.errObj.addRecord(emptyStatus.lower(),"{}list is Empty{}".format(prefixText, postfixText))
-            return(emptyStatus)
-        if type(values) != list:
-            return self.evalNumberAsc(values, warningAbove, criticalAbove, prefixText, postfixText, numberUnits)
+        self.lastSkipped = 0
+        arr = None
+        if _isNumpyArray(values):
+            if values.size == 0:
+                return self._evalEmpty(emptyStatus, prefixText, postfixText)
+            arr = values.ravel()
+            values = arr
+        elif _isScalar(values):
+            if values == "":
+                return self._evalEmpty(emptyStatus, prefixText, postfixText)
+            return self.evalBands(values, bands, prefixText, postfixText, numberUnits)
+        elif hasattr(values, '__len__'):
+            if len(values) == 0:
+                return self._evalEmpty(emptyStatus, prefixText, postfixText)
+            arr = self._asVector(values)
 
-        ret = "OK"
-        rvals = {"OK": 0, "WARNING": 1, "CRITICAL": 2, "UNKNOWN": 3}
-        for value in values:
-            r = self.evalNumberAsc(value, warningAbove, criticalAbove, prefixText, postfixText, numberUnits)
-            if rvals[r] > rvals[ret]:
-                ret = r
-        return ret
+        maxStatus = max(bands.statuses, key=_RVALS.get) if shortCircuit else None
+        if arr is None or dedup:
+            if dedup:
+                ret, count = self._evalDedup(values, lambda value, postfix: self.evalBands(value, bands, prefixText, postfix, numberUnits), postfixText, maxStatus)
+            else:
+                ret, count = self._evalIter(values, self.evalBands, (bands, prefixText, postfixText, numberUnits), maxStatus)
+            if count == 0:
+                return self._evalEmpty(emptyStatus, prefixText, postfixText)
+            return ret
 
+        if self._deadlineReached(arr.size):
+            return "UNKNOWN"
+        np = sys.modules['numpy']
+        idx, codes = bands.classifyArray(arr)
+        if maxStatus is not None:
+            reached = codes >= _RVALS[maxStatus]
+            if reached.any():
+                # the values after the first one reaching maxStatus are not evaluated
+                stop = int(reached.argmax()) + 1
+                codes = codes[:stop]
+                self.lastSkipped = arr.size - stop
+        addTemplateRecord = self.errObj.addTemplateRecord
+        for i in np.flatnonzero(codes).tolist():
+            band = int(idx[i])
+            status = bands.statuses[band]
+            addTemplateRecord(status.lower(), TEMPLATE_BAND, values[i], bands.describe(band), numberUnits, prefixText, postfixText)
+        return _STATUSES[int(codes.max())]
 
-    def evalNumberAsc(self, value, warningAbove=None, criticalAbove=None, prefixText="", postfixText="", numberUnits=""):
+    def evalBands(self, value, bands, prefixText="", postfixText="", numberUnits=""):
         '''
-        Evaluate a number, generate warning or critical if above certain thresholds
+        Evaluate a number based on sorted bands
 
         Args:
             value (num): Value to test
-            warningAbove (num): Generate a warning if value is above this threshold
-            criticalAbove (num): Generate a critical error if value is above this threshold
+            bands (NagBands): Bands to classify the value with
             prefixText (str): String to prefix error reports
             postfixText (str): String to append to error reports
             numberUnits (str): Units to append to numbers in error reports
 
         Effects:
-            self.errObj (NagErrors): Updated with error strings
+            self.errObj (NagErrors): Updated with error records
 
         Returns:
-            str: Result of test, One of (OK,WARNING,CRITICAL)
+            str: Result of test, the status of the value's band
         '''
-        if criticalAbove is not None and value > criticalAbove:
-            self.errObj.addCritical("{}{}{} is > {}{}{}".format(prefixText, value, numberUnits, criticalAbove, numberUnits, postfixText))
-            return("CRITICAL")
-        if warningAbove is not None and value > warningAbove:
-            self.errObj.addWarning("{}{}{} is > {}{}{}".format(prefixText, value, numberUnits, warningAbove, numberUnits, postfixText))
-            return("WARNING")
-        return("OK")
-    
+        band = bands.index(value)
+        status = bands.statuses[band]
+        if status != "OK":
+            self.errObj.addTemplateRecord(status.lower(), TEMPLATE_BAND, value, bands.describe(band), numberUnits, prefixText, postfixText)
+        return(status)
 
-    def evalListNumberDesc(self, values, emptyStatus="UNKNOWN", warningBelow=None, criticalBelow=None, prefixText="", postfixText="", numberUnits=""):
+    def _evalAggregate(self, values, aggregate, op, emptyStatus, warning, critical, prefixText, postfixText, numberUnits, perfLabel, sketchSize):
         '''
-        Evaluate a list of values based on descending thresholds
+        Evaluate an aggregate of values based on ascending or descending thresholds
 
         Args:
-            values (List of num): Values to test
-            emptyStatus (str): Result if values is an empty list
-            warningBelow (num): Generate a warning if value is below this threshold
-            criticalBelow (num): Generate a critical error if value is below this threshold
+            values (iterable of num, numpy.ndarray or NagQuantileSketch): Values to aggregate
+            aggregate (str): Name of the aggregate, see NagiosCheckHelper.sketch.parseAggregate
+            op (str): '>' for ascending thresholds, '<' for descending thresholds
+            emptyStatus (str): Result if values is empty
+            warning (num): Warning threshold
+            critical (num): Critical threshold
             prefixText (str): String to prefix error reports
             postfixText (str): String to append to error reports
             numberUnits (str): Units to append to numbers in error reports
+            perfLabel (str): Record the aggregated value as perfdata with this label
+            sketchSize (int): k of the NagQuantileSketch used for iterables
 
         Effects:
-            self.errObj (NagErrors): Updated with error strings
+            self.errObj (NagErrors): Updated with error records
 
         Returns:
             str: Result of test, One of (OK,WARNING,CRITICAL,UNKNOWN)
         '''
-        if (type(values) == list and len(values) == 0) or (type(values) != list and values == ""):
-            if emptyStatus != "OK":
-                self.errObj.addRecord(emptyStatus.lower(),"{}list is Empty{}".format(prefixText, postfixText))
-            return(emptyStatus)
-        if type(values) != list:
-            return self.evalNumberDesc(values, warningBelow, criticalBelow, prefixText, postfixText, numberUnits)
+        from NagiosCheckHelper.sketch import NagQuantileSketch, aggregateArray, parseAggregate
+        parseAggregate(aggregate)
+        if _isNumpyArray(values):
+            value = aggregateArray(values, aggregate)
+        else:
+            if not isinstance(values, NagQuantileSketch):
+                if _isScalar(values):
+                    values = [values]
+                sketch = NagQuantileSketch(sketchSize)
+                sketch.update(values)
+                values = sketch
+            value = values.aggregate(aggregate)
+        if value is None or (aggregate == 'count' and value == 0):
+            return self._evalEmpty(emptyStatus, prefixText, postfixText)
+        evalNumber = self.evalNumberAsc if op == '>' else self.evalNumberDesc
+        return evalNumber(value, warning, critical, "{}{} ".format(prefixText, aggregate), postfixText, numberUnits, perfLabel)
 
-        ret = "OK"
-        rvals = {"OK": 0, "WARNING": 1, "CRITICAL": 2, "UNKNOWN": 3}
-        for value in values:
-            r = self.evalNumberDesc(value, warningBelow, criticalBelow, prefixText, postfixText, numberUnits)
-            if rvals[r] > rvals[ret]:
-                ret = r
-        return ret
-    
-    def evalNumberDesc(self, value, warningBelow=None, criticalBelow=None, prefixText="", postfixText= "", numberUnits=""):
+    def evalAggregateAsc(self, values, aggregate, emptyStatus="UNKNOWN", warningAbove=None, criticalAbove=None, prefixText="", postfixText="", numberUnits="", perfLabel=None, sketchSize=200):
         '''
-        Evaluate a number, generate warning or critical if below certain thresholds
+        Evaluate an aggregate of values (e.g. the 95th percentile) based on ascending thresholds
+
+        The values are consumed in a single pass. Percentiles of iterables come from a
+        NagQuantileSketch, and are exact for numpy arrays. A NagQuantileSketch can also be
+        passed as values, e.g. to evaluate several aggregates of one pass over a stream.
 
         Args:
-            value (num): Value to test
-            warningBelow (num): Generate a warning if value is below this threshold
-            criticalBelow (num): Generate a critical error if value is below this threshold
-            prefixText (str): String to prefix error reports
+            values (iterable of num, numpy.ndarray or NagQuantileSketch): Values to aggregate
+            aggregate (str): One of 'min', 'max', 'mean', 'stddev', 'sum', 'count', 'median',
+                             or a percentile as 'p' and a number (e.g. 'p95', 'p99.9')
+            emptyStatus (str): Result if values is empty
+            warningAbove (num): Generate a warning if the aggregate is above this threshold
+            criticalAbove (num): Generate a critical error if the aggregate is above this threshold
+            prefixText (str): String to prefix error reports, followed by the aggregate name
             postfixText (str): String to append to error reports
             numberUnits (str): Units to append to numbers in error reports
+            perfLabel (str): Record the aggregated value as perfdata with this label
+            sketchSize (int): k of the NagQuantileSketch used for iterables
 
         Effects:
-            self.errObj (NagErrors): Updated with error strings
+            self.errObj (NagErrors): Updated with error records
 
         Returns:
-            str: Result of test, One of (OK,WARNING,CRITICAL)
+            str: Result of test, One of (OK,WARNING,CRITICAL,UNKNOWN)
         '''
-        if criticalBelow is not None and value < criticalBelow:
-            self.errObj.addCritical("{}{}{} is < {}{}{}".format(prefixText, value, numberUnits, criticalBelow, numberUnits, postfixText))
-            return("CRITICAL")
-        if warningBelow is not None and value < warningBelow:
-            self.errObj.addWarning("{}{}{} is < {}{}{}".format(prefixText, value, numberUnits, warningBelow, numberUnits, postfixText))
-            return("WARNING")
-        return("OK")
+        return self._evalAggregate(values, aggregate, '>', emptyStatus, warningAbove, criticalAbove, prefixText, postfixText, numberUnits, perfLabel, sketchSize)
+
+    def evalAggregateDesc(self, values, aggregate, emptyStatus="UNKNOWN", warningBelow=None, criticalBelow=None, prefixText="", postfixText="", numberUnits="", perfLabel=None, sketchSize=200):
+        '''
+        Evaluate an aggregate of values (e.g. the 5th percentile) based on descending thresholds
+
+        See evalAggregateAsc.
+
+        Args:
+            values (iterable of num, numpy.ndarray or NagQuantileSketch): Values to aggregate
+            aggregate (str): One of 'min', 'max', 'mean', 'stddev', 'sum', 'count', 'median',
+                             or a percentile as 'p' and a number (e.g. 'p5', 'p0.1')
+            emptyStatus (str): Result if values is empty
+            warningBelow (num): Generate a warning if the aggregate is below this threshold
+            criticalBelow (num): Generate a critical error if the aggregate is below this threshold
+            prefixText (str): String to prefix error reports, followed by the aggregate name
+            postfixText (str): String to append to error reports
+            numberUnits (str): Units to append to numbers in error reports
+            perfLabel (str): Record the aggregated value as perfdata with this label
+            sketchSize (int): k of the NagQuantileSketch used for iterables
+
+        Effects:
+            self.errObj (NagErrors): Updated with error records
+
+        Returns:
+            str: Result of test, One of (OK,WARNING,CRITICAL,UNKNOWN)
+        '''
+        return self._evalAggregate(values, aggregate, '<', emptyStatus, warningBelow, criticalBelow, prefixText, postfixText, numberUnits, perfLabel, sketchSize)
+
+
+    def _classifyNumbers(self, values, op, warning, critical):
+        '''
+        Get the status code of each value based on ascending or descending thresholds, without creating records
+
+        Args:
+            values (iterable of num or numpy.ndarray): Values to classify
+            op (str): '>' for ascending thresholds, '<' for descending thresholds, 'range' for NagRange's
+            warning (num or NagRange): Warning threshold
+            critical (num or NagRange): Critical threshold
+
+        Returns:
+            (array or numpy.ndarray, list or numpy.ndarray): Status codes and indices of the values with a non-OK status
+        '''
+        if _isScalar(values):
+            values = [values]
+        arr = values if _isNumpyArray(values) else self._asVector(values) if hasattr(values, '__len__') else None
+        if arr is not None:
+            np = sys.modules['numpy']
+            arr = arr.ravel()
+            if op == 'range':
+                mask = lambda threshold: threshold.alertArray(arr)
+            else:
+                compare = np.greater if op == '>' else np.less
+                mask = lambda threshold: compare(arr, threshold)
+            codes = np.zeros(arr.shape, dtype=np.int8)
+            if warning is not None:
+                codes[mask(warning)] = 1
+            if critical is not None:
+                codes[mask(critical)] = 2
+            return codes, np.flatnonzero(codes)
+
+        if op == 'range':
+            breach = lambda value, threshold: threshold is not None and threshold.alert(value)
+        elif op == '>':
+            breach = lambda value, threshold: threshold is not None and value > threshold
+        else:
+            breach = lambda value, threshold: threshold is not None and value < threshold
+        codes = array('b')
+        breaching = []
+        for i, value in enumerate(values):
+            code = 2 if breach(value, critical) else 1 if breach(value, warning) else 0
+            codes.append(code)
+            if code:
+                breaching.append(i)
+        return codes, breaching
+
+    def classifyListNumberAsc(self, values, warningAbove=None, criticalAbove=None):
+        '''
+        Get the status of each value based on ascending thresholds, without creating any records
+
+        Codes are 0=OK, 1=WARNING, 2=CRITICAL, aligned with values. numpy arrays, and lists of at least
+        vectorMinSize numbers if numpy is imported, give numpy int8 codes and indices, other iterables
+        an array('b') of codes and a list of indices.
+
+        Args:
+            values (iterable of num or numpy.ndarray): Values to classify
+            warningAbove (num): A value is a warning if it is above this threshold
+            criticalAbove (num): A value is critical if it is above this threshold
+
+        Returns:
+            (array or numpy.ndarray, list or numpy.ndarray): Status codes and indices of the values with a non-OK status
+        '''
+        return self._classifyNumbers(values, '>', warningAbove, criticalAbove)
+
+    def classifyListNumberDesc(self, values, warningBelow=None, criticalBelow=None):
+        '''
+        Get the status of each value based on descending thresholds, without creating any records
+
+        See classifyListNumberAsc.
+
+        Args:
+            values (iterable of num or numpy.ndarray): Values to classify
+            warningBelow (num): A value is a warning if it is below this threshold
+            criticalBelow (num): A value is critical if it is below this threshold
+
+        Returns:
+            (array or numpy.ndarray, list or numpy.ndarray): Status codes and indices of the values with a non-OK status
+        '''
+        return self._classifyNumbers(values, '<', warningBelow, criticalBelow)
+
+    def classifyListRange(self, values, warningRange=None, criticalRange=None):
+        '''
+        Get the status of each value based on Nagios ranges, without creating any records
+
+        See classifyListNumberAsc.
+
+        Args:
+            values (iterable of num or numpy.ndarray): Values to classify
+            warningRange (str or NagRange): A value is a warning if it alerts on this range
+            criticalRange (str or NagRange): A value is critical if it alerts on this range
+
+        Returns:
+            (array or numpy.ndarray, list or numpy.ndarray): Status codes and indices of the values with a non-OK status
+        '''
+        warningRange = NagRange.compile(warningRange) if warningRange is not None else None
+        criticalRange = NagRange.compile(criticalRange) if criticalRange is not None else None
+        return self._classifyNumbers(values, 'range', warningRange, criticalRange)
+
+    def classifyListEnum(self, values, unknownValueStatus="UNKNOWN", okValues=[], warningValues=[], criticalValues=[], unknownValues=[], matcher=None):
+        '''
+        Get the status of each value based on lists of enumerated values, without creating any records
+
+        Args:
+            values (iterable of str/num): Values to classify
+            unknownValueStatus (str): Status of values that are not in any lists
+            okValues (List of str/num): Values to match for OK Status
+            warningValues (List of str/num): Values to match for Warning Status
+            criticalValues (List of str/num): Values to match for Critical Status
+            unknownValues (List of str/num): Values to match for Unknown Status
+            matcher (NagEnumMatcher): Precompiled matcher, used instead of the value lists
+
+        Returns:
+            (array, list): Status codes (0=OK, 1=WARNING, 2=CRITICAL, 3=UNKNOWN) as an array('b'), and indices of the values with a non-OK status
+        '''
+        if _isScalar(values):
+            values = [values]
+        if matcher is None:
+            matcher = NagEnumMatcher(okValues, warningValues, criticalValues, unknownValues)
+        match = matcher.match
+        default = _RVALS[unknownValueStatus]
+        codes = array('b')
+        breaching = []
+        for i, value in enumerate(values):
+            status = match(value)
+            code = default if status is None else _RVALS[status]
+            codes.append(code)
+            if code:
+                breaching.append(i)
+        return codes, breaching
+
+    def classifyListBands(self, values, bands):
+        '''
+        Get the status of each value based on sorted bands, without creating any records
+
+        See classifyListNumberAsc.
+
+        Args:
+            values (iterable of num or numpy.ndarray): Values to classify
+            bands (NagBands): Bands to classify the values with
+
+        Returns:
+            (array or numpy.ndarray, list or numpy.ndarray): Status codes and indices of the values with a non-OK status
+        '''
+        if _isScalar(values):
+            values = [values]
+        arr = values if _isNumpyArray(values) else self._asVector(values) if hasattr(values, '__len__') else None
+        if arr is not None:
+            codes = bands.classifyArray(arr.ravel())[1]
+            return codes, sys.modules['numpy'].flatnonzero(codes)
+        statusCodes = [_RVALS[status] for status in bands.statuses]
+        edges = bands.edges
+        bisectLeft = bisect.bisect_left
+        codes = array('b')
+        breaching = []
+        for i, value in enumerate(values):
+            code = statusCodes[bisectLeft(edges, value)]
+            codes.append(code)
+            if code:
+                breaching.append(i)
+        return codes, breaching
+
+if os.environ.get('NAGIOSCHECKHELPER_INSTRUMENT') or os.environ.get('NAGIOSCHECKHELPER_INSTRUMENT_SIDECAR') or os.environ.get('NAGIOSCHECKHELPER_PROFILE'):
+    from NagiosCheckHelper.instrument import enableFromEnvironment
+    enableFromEnvironment()
@@ -0,0 +1,259 @@
+import errno
+import fcntl
+import hashlib
+import os
+import pickle
+import stat
+import tempfile
+import time
+
+
+class NagCacheEntry(object):
+    '''
+
+    A cached probe result
+
+    Args:
+        value (any): The probe result
+        created (float): Time the probe finished, in seconds since the epoch
+        stale (bool): True if the entry is older than the cache ttl
+
+    Attributes:
+        value (any): The probe result
+        created (float): Time the probe finished, in seconds since the epoch
+        age (float): Age of the entry in seconds
+        stale (bool): True if the entry is older than the cache ttl
+    '''
+    __slots__ = ('value', 'created', 'age', 'stale')
+
+    def __init__(self, value, created, stale=False):
+        self.value = value
+        self.created = created
+        self.age = max(time.time() - created, 0.0)
+        self.stale = stale
+
+
+class NagCache(object):
+    '''
+
+    The NagCache object shares expensive probe results between checks through an on-disk cache
+
+    Entries are keyed by probe name and arguments, and refreshed when they are older than ttl.
+    Only one process refreshes an entry at a time (a file lock per entry): while it runs,
+    other callers get the stale entry if it is younger than staleTtl, or wait for the refresh.
+    With maxBytes set, the least recently written entries are removed once the cache is larger.
+
+    Entries are pickled, and loading a pickle can run code, so the directory must be private:
+    it is created with mode 0700, and an existing directory must be owned by the current user
+    and not accessible by group or others (a PermissionError is raised otherwise). Don't point
+    it at a shared directory such as /tmp, use a subdirectory.
+
+    Args:
+        directory (str): Directory holding the cache files, created with mode 0700 if needed
+        ttl (num): Seconds an entry is fresh
+        staleTtl (num): Seconds a stale entry may be returned while another process refreshes it,
+                        None for no limit, 0 to always wait for the refresh
+        maxBytes (int): Maximum total size of the cache files, None for no limit
+        lockTimeout (num): Seconds to wait for another process's refresh before running the probe anyway
+
+    Attributes:
+        directory (str): Directory holding the cache files
+        ttl (num): Seconds an entry is fresh
+        staleTtl (num): Seconds a stale entry may be returned while another process refreshes it
+        maxBytes (int): Maximum total size of the cache files
+        lockTimeout (num): Seconds to wait for another process's refresh
+    '''
+    def __init__(self, directory, ttl=60, staleTtl=None, maxBytes=None, lockTimeout=30):
+        self.directory = directory
+        self.ttl = ttl
+        self.staleTtl = staleTtl
+        self.maxBytes = maxBytes
+        self.lockTimeout = lockTimeout
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        self._checkDirectory()
+
+    def _checkDirectory(self):
+        '''
+        Make sure no other user can plant cache files, they are unpickled
+
+        Raises:
+            PermissionError: The directory is a symlink, owned by another user or accessible by group or others
+        '''
+        st = os.lstat(self.directory)
+        if not stat.S_ISDIR(st.st_mode):
+            raise PermissionError(errno.EPERM, "cache directory is not a directory", self.directory)
+        if st.st_uid != os.geteuid():
+            raise PermissionError(errno.EPERM, "cache directory is owned by another user", self.directory)
+        if st.st_mode & 0o077:
+            raise PermissionError(errno.EPERM, "cache directory must have mode 0700, not {:04o}".format(stat.S_IMODE(st.st_mode)), self.directory)
+
+    def path(self, name, args=(), kwargs={}):
+        '''
+        Get the cache file path of a probe
+
+        Args:
+            name (str): Name of the probe
+            args (tuple): Positional arguments of the probe
+            kwargs (dict): Keyword arguments of the probe
+
+        Returns:
+            str: Path of the cache file
+        '''
+        key = repr((name, tuple(args), sorted(kwargs.items()))).encode('utf-8')
+        return os.path.join(self.directory, hashlib.sha256(key).hexdigest() + '.cache')
+
+    def _read(self, path):
+        '''
+        Read a cache file
+
+        Args:
+            path (str): Path of the cache file
+
+        Any failure to load the file counts as a missing entry, e.g. an entry written by an older
+        version of a probe whose pickled classes moved, so the probe runs again and replaces it.
+
+        Returns:
+            NagCacheEntry: The entry, or None if there is no valid entry
+        '''
+        try:
+            with open(path, 'rb') as f:
+                created, value = pickle.load(f)
+        except Exception:
+            return None
+        entry = NagCacheEntry(value, created)
+        entry.stale = entry.age >= self.ttl
+        return entry
+
+    def _write(self, path, value):
+        '''
+        Atomically write a cache file
+
+        Args:
+            path (str): Path of the cache file
+            value (any): The probe result
+
+        Returns:
+            NagCacheEntry: The new entry
+        '''
+        created = time.time()
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump((created, value), f, pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        if self.maxBytes is not None:
+            self.evict()
+        return NagCacheEntry(value, created)
+
+    def _lock(self, path, blocking):
+        '''
+        Lock a cache entry
+
+        Args:
+            path (str): Path of the cache file
+            blocking (bool): Wait up to lockTimeout for the lock
+
+        The lock file may be removed by evict() while another process waits on it, so a lock is
+        only held once it is on the file currently at the path.
+
+        Returns:
+            int: File descriptor holding the lock, or None if it could not be locked
+        '''
+        lockPath = path + '.lock'
+        fd = os.open(lockPath, os.O_RDWR | os.O_CREAT, 0o600)
+        deadline = time.monotonic() + self.lockTimeout
+        while True:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError as e:
+                if e.errno not in (errno.EAGAIN, errno.EACCES):
+                    os.close(fd)
+                    raise
+            else:
+                try:
+                    current = os.stat(lockPath).st_ino
+                except FileNotFoundError:
+                    current = None
+                if current == os.fstat(fd).st_ino:
+                    return fd
+                # locked a removed lock file, lock the one at the path now
+                os.close(fd)
+                fd = os.open(lockPath, os.O_RDWR | os.O_CREAT, 0o600)
+                continue
+            if not blocking or time.monotonic() >= deadline:
+                os.close(fd)
+                return None
+            time.sleep(0.05)
+
+    def _unlock(self, fd):
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+    def get(self, name, probe, args=(), kwargs={}):
+        '''
+        Get a probe result from the cache, running the probe if the entry is missing or stale
+
+        Args:
+            name (str): Name of the probe
+            probe (callable): Called as probe(*args, **kwargs) to get a fresh result
+            args (tuple): Positional arguments of the probe
+            kwargs (dict): Keyword arguments of the probe
+
+        Returns:
+            NagCacheEntry: The entry, its stale attribute is set if another process is refreshing it
+        '''
+        path = self.path(name, args, kwargs)
+        entry = self._read(path)
+        if entry is not None and not entry.stale:
+            return entry
+
+        fd = self._lock(path, blocking=False)
+        if fd is None:
+            if entry is not None and (self.staleTtl is None or entry.age < self.staleTtl):
+                return entry
+            fd = self._lock(path, blocking=True)
+        try:
+            entry = self._read(path)
+            if entry is not None and not entry.stale:
+                return entry
+            return self._write(path, probe(*args, **kwargs))
+        finally:
+            if fd is not None:
+                self._unlock(fd)
+
+    def evict(self):
+        '''
+        Remove the least recently written entries until the cache is no larger than maxBytes
+
+        The lock file of a removed entry is removed as well, unless another process holds it.
+        '''
+        files = []
+        total = 0
+        for fname in os.listdir(self.directory):
+            if not fname.endswith('.cache'):
+                continue
+            try:
+                st = os.stat(os.path.join(self.directory, fname))
+            except OSError:
+                continue
+            files.append((st.st_mtime, st.st_size, fname))
+            total += st.st_size
+        files.sort()
+        for mtime, size, fname in files:
+            if total <= self.maxBytes:
+                break
+            path = os.path.join(self.directory, fname)
+            fd = self._lock(path, blocking=False)
+            try:
+                os.unlink(path)
+                if fd is not None:
+                    os.unlink(path + '.lock')
+            except OSError:
+                pass
+            finally:
+                if fd is not None:
+                    self._unlock(fd)
+            total -= size
@@ -0,0 +1,67 @@
+import json
+import os
+import socket
+import sys
+
+DEFAULT_SOCKET = os.environ.get('NAGIOSCHECKHELPER_SOCKET', '/run/nagioscheckhelper.sock')
+
+
+def runCheck(socketPath, name, argv, timeout=60):
+    '''
+    Run a check on a NagCheckServer
+
+    Args:
+        socketPath (str): Path of the server's Unix socket
+        name (str): Name of the check
+        argv (list of str's): Arguments for the check
+        timeout (num): Timeout in seconds
+
+    Returns:
+        (str, int): The rendered status and the exit code
+    '''
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(socketPath)
+        sock.sendall(json.dumps({'check': name, 'argv': list(argv)}).encode('utf-8') + b"\n")
+        chunks = []
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    finally:
+        sock.close()
+    response = json.loads(b"".join(chunks).decode('utf-8'))
+    return (response['output'], response['code'])
+
+
+def main(argv=None):
+    '''
+    Thin client for Nagios: python -m NagiosCheckHelper.client [-s SOCKET] CHECK [ARGS...]
+
+    Prints the output of the check and exits with its exit code, or UNKNOWN if the server can't be reached.
+
+    Args:
+        argv (list of str's): Command line arguments, defaults to sys.argv[1:]
+    '''
+    if argv is None:
+        argv = sys.argv[1:]
+    socketPath = DEFAULT_SOCKET
+    if len(argv) >= 2 and argv[0] == '-s':
+        socketPath = argv[1]
+        argv = argv[2:]
+    if len(argv) < 1:
+        sys.stdout.write("UNKNOWN usage: python -m NagiosCheckHelper.client [-s SOCKET] CHECK [ARGS...]\n")
+        sys.exit(3)
+    try:
+        output, code = runCheck(socketPath, argv[0], argv[1:])
+    except (OSError, ValueError, KeyError) as e:
+        output, code = "UNKNOWN check server {} not reachable: {}\n".format(socketPath, e), 3
+    sys.stdout.write(output)
+    sys.stdout.flush()
+    sys.exit(code)
+
+
+if __name__ == '__main__':
+    main()
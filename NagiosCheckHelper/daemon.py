@@ -0,0 +1,154 @@
+import importlib
+import json
+import os
+import socketserver
+import sys
+
+from NagiosCheckHelper import NagErrors
+
+
+def loadCheck(spec):
+    '''
+    Import a check function
+
+    Args:
+        spec (str): "module:function" of the check
+
+    Returns:
+        callable: The check function
+    '''
+    module, _, func = spec.partition(':')
+    return getattr(importlib.import_module(module), func)
+
+
+class _CheckHandler(socketserver.StreamRequestHandler):
+    '''
+    Handle one request: a JSON line {"check": name, "argv": [...]}, answered with {"output": str, "code": int}
+    '''
+    def handle(self):
+        line = self.rfile.readline()
+        try:
+            request = json.loads(line.decode('utf-8'))
+            name = request['check']
+            argv = list(request.get('argv', []))
+        except (ValueError, KeyError, TypeError) as e:
+            output, code = "UNKNOWN invalid request: {}\n".format(e), 3
+        else:
+            output, code = self.server.checkServer.runCheck(name, argv)
+        self.wfile.write(json.dumps({'output': output, 'code': code}).encode('utf-8') + b"\n")
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class NagCheckServer(object):
+    '''
+
+    The NagCheckServer object runs preloaded checks for NagCheckClient requests over a Unix socket
+
+    A check is a function called as check(nerr, argv) with a fresh NagErrors object and the
+    arguments from the client. The rendered status and getExitCode() are sent back to the
+    client. A check that raises an exception results in an UNKNOWN status instead of stopping
+    the server. Calls to nerr.printStatus() and nerr.doExit() from the check are captured.
+
+    Args:
+        socketPath (str): Path of the Unix socket to listen on
+        checks (dict): Map of check name to check function
+        outputLimit (int): outputLimit of the NagErrors object given to each check
+
+    Attributes:
+        socketPath (str): Path of the Unix socket to listen on
+        checks (dict): Map of check name to check function
+        outputLimit (int): outputLimit of the NagErrors object given to each check
+    '''
+    def __init__(self, socketPath, checks=None, outputLimit=None):
+        self.socketPath = socketPath
+        self.checks = dict(checks or {})
+        self.outputLimit = outputLimit
+        self._server = None
+
+    def addCheck(self, name, check):
+        '''
+        Add a check
+
+        Args:
+            name (str): Name the client uses for the check
+            check (callable or str): Check function, or "module:function" to import it now
+        '''
+        if not callable(check):
+            check = loadCheck(check)
+        self.checks[name] = check
+
+    def runCheck(self, name, argv):
+        '''
+        Run a check with a fresh NagErrors object
+
+        Args:
+            name (str): Name of the check
+            argv (list of str's): Arguments for the check
+
+        Returns:
+            (str, int): The rendered status and the exit code
+        '''
+        printed = []
+        nerr = NagErrors(outputLimit=self.outputLimit, output=printed.append)
+        check = self.checks.get(name)
+        if check is None:
+            nerr.addUnknown("unknown check {}".format(name))
+        else:
+            try:
+                check(nerr, argv)
+            except SystemExit:
+                pass
+            except Exception as e:
+                nerr.addUnknown("check {} failed: {}: {}".format(name, type(e).__name__, e))
+                printed = []
+        if len(printed) > 0:
+            return ("".join(printed), nerr.getExitCode())
+        return (nerr.renderStatus(self.outputLimit), nerr.getExitCode())
+
+    def serveForever(self):
+        '''
+        Listen on the socket and serve requests until shutdown() is called
+        '''
+        if os.path.exists(self.socketPath):
+            os.unlink(self.socketPath)
+        self._server = _UnixServer(self.socketPath, _CheckHandler)
+        self._server.checkServer = self
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+            if os.path.exists(self.socketPath):
+                os.unlink(self.socketPath)
+
+    def shutdown(self):
+        '''
+        Stop serving requests
+        '''
+        if self._server is not None:
+            self._server.shutdown()
+
+
+def main(argv=None):
+    '''
+    Run a check server: python -m NagiosCheckHelper.daemon SOCKET NAME=MODULE:FUNCTION ...
+
+    Args:
+        argv (list of str's): Command line arguments, defaults to sys.argv[1:]
+    '''
+    if argv is None:
+        argv = sys.argv[1:]
+    if len(argv) < 2:
+        sys.stderr.write("usage: python -m NagiosCheckHelper.daemon SOCKET NAME=MODULE:FUNCTION ...\n")
+        sys.exit(2)
+    server = NagCheckServer(argv[0])
+    for arg in argv[1:]:
+        name, _, spec = arg.partition('=')
+        server.addCheck(name, spec)
+    server.serveForever()
+
+
+if __name__ == '__main__':
+    main()
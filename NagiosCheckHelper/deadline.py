@@ -0,0 +1,176 @@
+import os
+import signal
+import sys
+import time
+
+
+class NagDeadline(object):
+    '''
+
+    The NagDeadline object gives a check a total time budget, so it reports what it has before the plugin is killed
+
+    Probes and evaluators check the deadline cooperatively: timeout() caps the timeout of a probe
+    to the time left, check() skips work once the budget is spent, and list evaluators of a
+    NagEval object created with the deadline stop consuming values when it is reached. As a
+    backstop for code that hangs without checking, a SIGALRM fires grace seconds after the
+    budget, records UNKNOWN for every task still running (or for the check itself), prints the
+    status with everything evaluated so far and exits. Set the budget a few seconds below the
+    service_check_timeout of the core.
+
+    The alarm is armed by start() or by entering a with block, which must happen in the main
+    thread, and disarmed by cancel() or by leaving the with block, before printStatus is called.
+
+    Args:
+        errObj (NagErrors): NagErrors object used to store results
+        budget (num): Seconds the check may take, from the creation of the object
+        grace (num): Seconds after the budget before the alarm fires
+        alarm (bool): Use the SIGALRM backstop, False for cooperative checks only
+        hardExit (bool): Exit with os._exit from the alarm, so code catching SystemExit cannot keep running
+
+    Attributes:
+        errObj (NagErrors): NagErrors object used to store results
+        budget (num): Seconds the check may take
+        grace (num): Seconds after the budget before the alarm fires
+        alarm (bool): Use the SIGALRM backstop
+        hardExit (bool): Exit with os._exit from the alarm
+        expires (float): time.monotonic() at which the budget is spent
+        tasks (List of str's): Names of the tasks that are running
+        fired (bool): The alarm fired
+    '''
+    def __init__(self, errObj, budget, grace=1.0, alarm=True, hardExit=False):
+        self.errObj = errObj
+        self.budget = budget
+        self.grace = grace
+        self.alarm = alarm
+        self.hardExit = hardExit
+        self.expires = time.monotonic() + budget
+        self.tasks = []
+        self.fired = False
+        self._previousHandler = None
+        self._armed = False
+
+    def remaining(self):
+        '''
+        Get the time left
+
+        Returns:
+            float: Seconds until the budget is spent, 0 once it is
+        '''
+        return max(0.0, self.expires - time.monotonic())
+
+    def expired(self):
+        '''
+        Check if the budget is spent
+
+        Returns:
+            bool: True once the budget is spent
+        '''
+        return time.monotonic() >= self.expires
+
+    def timeout(self, default=None):
+        '''
+        Get the timeout for a probe, capped to the time left
+
+        Args:
+            default (num): Timeout of the probe, None for no timeout of its own
+
+        Returns:
+            float: The smaller of default and the time left
+        '''
+        remaining = self.remaining()
+        if default is None or remaining < default:
+            return remaining
+        return default
+
+    def check(self, name):
+        '''
+        Check if there is time left for some work, recording UNKNOWN if there is not
+
+        Args:
+            name (str): Name of the work, used in the error report
+
+        Returns:
+            bool: True if the work should run, False if the budget is spent
+        '''
+        if not self.expired():
+            return True
+        self.errObj.addUnknown("{} skipped, deadline of {}s reached".format(name, self.budget))
+        return False
+
+    def task(self, name):
+        '''
+        Mark a block as a task, e.g. with deadline.task('api'): ...
+
+        If the alarm fires while the block runs, an UNKNOWN record names the task.
+
+        Args:
+            name (str): Name of the task
+
+        Returns:
+            context manager: Registers the task for the with block
+        '''
+        return _Task(self, name)
+
+    def start(self):
+        '''
+        Arm the SIGALRM backstop, from the main thread
+        '''
+        if not self.alarm:
+            return
+        self._previousHandler = signal.signal(signal.SIGALRM, self._onAlarm)
+        self._armed = True
+        signal.setitimer(signal.ITIMER_REAL, self.remaining() + self.grace)
+
+    def cancel(self):
+        '''
+        Disarm the SIGALRM backstop
+        '''
+        if not self._armed:
+            return
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, self._previousHandler)
+        self._armed = False
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.cancel()
+
+    def _onAlarm(self, signum, frame):
+        self.fire()
+
+    def fire(self):
+        '''
+        Record UNKNOWN for the unfinished work, print the status and exit
+
+        Called by the alarm, can be called directly by code that notices it is out of time.
+        '''
+        self.fired = True
+        if self.tasks:
+            for name in self.tasks:
+                self.errObj.addUnknown("{} did not finish within the deadline of {}s".format(name, self.budget))
+        else:
+            self.errObj.addUnknown("check did not finish within the deadline of {}s".format(self.budget))
+        self.errObj.printStatus()
+        if self.hardExit:
+            sys.stdout.flush()
+            os._exit(self.errObj.getExitCode())
+        self.errObj.doExit()
+
+
+class _Task(object):
+    '''
+    Context manager registering a task of a NagDeadline for the duration of a with block
+    '''
+    def __init__(self, deadline, name):
+        self.deadline = deadline
+        self.name = name
+
+    def __enter__(self):
+        self.deadline.tasks.append(self.name)
+        return self
+
+    def __exit__(self, *exc):
+        self.deadline.tasks.remove(self.name)
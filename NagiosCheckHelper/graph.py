@@ -0,0 +1,202 @@
+from NagiosCheckHelper import NagErrors, NagEval, _RVALS, _STATUSES
+
+
+class NagCheckGraph(object):
+    '''
+
+    The NagCheckGraph object runs the sub-checks of a composite check in dependency order
+
+    Each sub-check is a function called with its own NagEval object, and declares the sub-checks
+    it depends on. Sub-checks whose dependencies are done run in parallel in daemon threads. A
+    sub-check fails if it raises an exception, exits (e.g. sys.exit() or errObj.doExit()) or its
+    records reach its failStatus. The sub-checks depending on a failed one, directly or not, are
+    not run: a single UNKNOWN record per failed sub-check lists them, instead of each of them
+    burning its own timeout.
+
+    The records of each sub-check are merged into errObj as soon as it finishes, so they are
+    there if the check runs out of time. With a deadline, sub-checks are not started once it is
+    reached, sub-checks still running then are reported UNKNOWN and left behind (their threads
+    do not keep the process from exiting), and the NagEval objects of the sub-checks get the
+    deadline (neval.deadline.timeout() caps the timeouts of their probes).
+
+    Args:
+        errObj (NagErrors): NagErrors object used to store results
+        workers (int): Maximum number of sub-checks running at the same time
+        deadline (NagDeadline): Deadline of the sub-checks, None for no deadline
+
+    Attributes:
+        errObj (NagErrors): NagErrors object used to store results
+        workers (int): Maximum number of sub-checks running at the same time
+        deadline (NagDeadline): Deadline of the sub-checks
+        nodes (dict): The sub-checks by name, in the order they were added
+        results (dict): Return value of each sub-check that finished, by name
+        statuses (dict): Status of each sub-check that finished, by name
+        skipped (List of str's): Names of the sub-checks that were not run
+    '''
+    def __init__(self, errObj, workers=4, deadline=None):
+        self.errObj = errObj
+        self.workers = workers
+        self.deadline = deadline
+        self.nodes = {}
+        self.results = {}
+        self.statuses = {}
+        self.skipped = []
+
+    def add(self, name, check, after=(), args=(), kwargs={}, failStatus="CRITICAL"):
+        '''
+        Add a sub-check
+
+        Args:
+            name (str): Name of the sub-check, used in error reports
+            check (callable): Called as check(neval, *args, **kwargs), its return value is stored in results
+            after (List of str's): Names of the sub-checks this one depends on, they must be added first
+            args (tuple): Positional arguments for check
+            kwargs (dict): Keyword arguments for check
+            failStatus (str): The sub-check fails if its records reach this status (WARNING, CRITICAL or UNKNOWN)
+        '''
+        if name in self.nodes:
+            raise ValueError("Sub-check {} was already added".format(name))
+        for dep in after:
+            if dep not in self.nodes:
+                raise ValueError("Sub-check {} depends on {}, which was not added before it".format(name, dep))
+        self.nodes[name] = {'name': name, 'check': check, 'after': list(after), 'args': args, 'kwargs': kwargs,
+                            'failStatus': failStatus}
+
+    def _runNode(self, node):
+        '''
+        Run a sub-check in a worker thread
+
+        Args:
+            node (dict): The sub-check
+
+        Returns:
+            (str, any, NagErrors): Status of the sub-check, its return value and the NagErrors object with its records
+        '''
+        errObj = NagErrors(maxRecords=self.errObj.maxRecords, keepRecords=self.errObj.keepRecords, perfLimit=self.errObj.perfLimit)
+        neval = NagEval(errObj, self.deadline)
+        try:
+            result = node['check'](neval, *node['args'], **node['kwargs'])
+        except Exception as e:
+            errObj.addUnknown("{} failed: {}".format(node['name'], e))
+            return ("UNKNOWN", None, errObj)
+        except BaseException:
+            # sys.exit() or doExit() in a sub-check would otherwise only end its thread
+            errObj.addUnknown("{} exited".format(node['name']))
+            return ("UNKNOWN", None, errObj)
+        return (_STATUSES[errObj.getExitCode()], result, errObj)
+
+    def _skip(self, name, reason, skipped):
+        '''
+        Skip a sub-check and, recursively, the sub-checks depending on it
+
+        Args:
+            name (str): Name of the sub-check
+            reason (str): Name of the failed sub-check causing the skip, None for the deadline
+            skipped (dict): Map of reason to the names skipped for it, updated
+        '''
+        if name in self.statuses or name in self.skipped:
+            return
+        self.skipped.append(name)
+        skipped.setdefault(reason, []).append(name)
+        for other in self.nodes.values():
+            if name in other['after']:
+                self._skip(other['name'], reason, skipped)
+
+    def run(self):
+        '''
+        Run the sub-checks
+
+        Effects:
+            self.errObj (NagErrors): Updated with the records of the sub-checks and the skip reports
+            self.results (dict): Updated with the return values of the sub-checks
+            self.statuses (dict): Updated with the statuses of the sub-checks
+
+        Returns:
+            str: Worst status of the sub-checks that ran, UNKNOWN if any were skipped
+        '''
+        import queue
+        import threading
+        failed = set()
+        skipped = {}
+        waiting = dict((name, set(node['after'])) for name, node in self.nodes.items())
+        ready = []
+        running = set()
+        finished = queue.Queue()
+
+        def work(node):
+            # something must be put on the queue, run() waits for it without a deadline
+            try:
+                ret = self._runNode(node)
+            except BaseException:
+                errObj = NagErrors()
+                errObj.addUnknown("{} exited".format(node['name']))
+                ret = ("UNKNOWN", None, errObj)
+            finished.put((node['name'], ret))
+
+        try:
+            while True:
+                for name in [n for n, deps in waiting.items() if not deps]:
+                    del waiting[name]
+                    if name not in self.skipped:
+                        ready.append(name)
+                while ready and len(running) < self.workers:
+                    name = ready.pop(0)
+                    if name in self.skipped:
+                        continue
+                    if self.deadline is not None and self.deadline.expired():
+                        self._skip(name, None, skipped)
+                        continue
+                    # daemon threads, so a hung sub-check does not keep the check from exiting
+                    threading.Thread(target=work, args=(self.nodes[name],), name="NagCheckGraph " + name, daemon=True).start()
+                    running.add(name)
+                    if self.deadline is not None:
+                        # named by the alarm of the deadline if it is still running then
+                        self.deadline.tasks.append(name)
+                if not running:
+                    break
+                try:
+                    name, (status, result, errObj) = finished.get(timeout=self.deadline.remaining() if self.deadline is not None else None)
+                except queue.Empty:
+                    for name in sorted(running, key=list(self.nodes).index):
+                        self.errObj.addUnknown("{} did not finish within the deadline of {}s".format(name, self.deadline.budget))
+                        failed.add(name)
+                        for other in self.nodes.values():
+                            if name in other['after']:
+                                self._skip(other['name'], None, skipped)
+                    for name in ready + list(waiting):
+                        self._skip(name, None, skipped)
+                    break
+                running.discard(name)
+                if self.deadline is not None:
+                    self.deadline.tasks.remove(name)
+                self.errObj.merge(errObj)
+                self.statuses[name] = status
+                self.results[name] = result
+                if _RVALS[status] >= _RVALS[self.nodes[name]['failStatus']]:
+                    failed.add(name)
+                    for other in self.nodes.values():
+                        if name in other['after']:
+                            self._skip(other['name'], name, skipped)
+                for deps in waiting.values():
+                    deps.discard(name)
+        finally:
+            if self.deadline is not None:
+                for name in running:
+                    self.deadline.tasks.remove(name)
+
+        for reason in [name for name in self.nodes if name in skipped] + ([None] if None in skipped else []):
+            names = skipped[reason]
+            if reason is None:
+                self.errObj.addUnknown("deadline of {}s reached, skipped {}: {}".format(self.deadline.budget, _checks(len(names), ""), ", ".join(names)))
+            else:
+                self.errObj.addUnknown("{} failed, skipped {}: {}".format(reason, _checks(len(names), "dependent "), ", ".join(names)))
+
+        ret = "UNKNOWN" if self.skipped or (failed - set(self.statuses)) else "OK"
+        for status in self.statuses.values():
+            if _RVALS[status] > _RVALS[ret]:
+                ret = status
+        return ret
+
+
+def _checks(count, kind):
+    return "1 {}check".format(kind) if count == 1 else "{} {}checks".format(count, kind)
@@ -0,0 +1,359 @@
+import json
+import os
+import sys
+import threading
+import time
+from functools import wraps
+
+import NagiosCheckHelper
+from NagiosCheckHelper import NagErrors, NagEval, _isNumpyArray, _isScalar
+
+_active = None
+
+
+class NagInstrument(object):
+    '''
+
+    The NagInstrument object measures where a check spends its time and memory
+
+    While installed, every NagEval evaluator called by the check (not the evaluators they call
+    internally) is counted and timed, with the number of values it processed, and renderStatus
+    is timed. Other phases, such as probes, are timed with the phase() context manager. Peak
+    memory is tracked with tracemalloc. Evaluators may run on several threads: the nesting is
+    tracked per thread, and the shards of evalListParallel count as part of its call. When
+    printStatus is called, the measurements are added to the perfdata (nch_* points), and
+    written to a JSON sidecar file and a cProfile dump if requested. Nothing is wrapped until
+    install() is called, so checks that don't enable instrumentation run the plain methods.
+
+    Enable it from the environment with NAGIOSCHECKHELPER_INSTRUMENT=1, and optionally
+    NAGIOSCHECKHELPER_INSTRUMENT_SIDECAR=path.json and NAGIOSCHECKHELPER_PROFILE=path.prof,
+    or from code with enable().
+
+    Args:
+        perfData (bool): Add the measurements to the perfdata
+        sidecarPath (str): Write the measurements to this JSON file, None for no file
+        profilePath (str): Run cProfile and dump the statistics to this file, None to not profile
+        traceMemory (bool): Track peak memory with tracemalloc
+
+    Attributes:
+        perfData (bool): Add the measurements to the perfdata
+        sidecarPath (str): JSON file of the measurements
+        profilePath (str): cProfile dump file
+        traceMemory (bool): Track peak memory with tracemalloc
+        evaluators (dict): Map of evaluator name to [calls, values, seconds]
+        phases (dict): Map of phase name to seconds
+    '''
+    def __init__(self, perfData=True, sidecarPath=None, profilePath=None, traceMemory=True):
+        self.perfData = perfData
+        self.sidecarPath = sidecarPath
+        self.profilePath = profilePath
+        self.traceMemory = traceMemory
+        self.evaluators = {}
+        self.phases = {}
+        self._originals = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._start = None
+        self._profiler = None
+        self._startedTracemalloc = False
+
+    def _wrapEvaluator(self, name, func):
+        '''
+        Wrap a NagEval evaluator to count and time its outermost calls
+
+        Args:
+            name (str): Name of the evaluator
+            func (callable): The evaluator
+
+        Returns:
+            callable: The wrapped evaluator
+        '''
+        instrument = self
+
+        @wraps(func)
+        def wrapper(neval, *args, **kwargs):
+            local = instrument._local
+            if getattr(local, 'depth', 0) > 0:
+                return func(neval, *args, **kwargs)
+            with instrument._lock:
+                stats = instrument.evaluators.setdefault(name, [0, 0, 0.0])
+                values = args[0] if args else None
+                if _isNumpyArray(values):
+                    stats[1] += values.size
+                elif _isScalar(values):
+                    stats[1] += 1
+                elif hasattr(values, '__len__'):
+                    stats[1] += len(values)
+                else:
+                    args = (instrument._countValues(values, stats),) + args[1:]
+            local.depth = 1
+            start = time.perf_counter()
+            try:
+                return func(neval, *args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                local.depth = 0
+                with instrument._lock:
+                    stats[0] += 1
+                    stats[2] += elapsed
+                    instrument.phases['eval'] = instrument.phases.get('eval', 0.0) + elapsed
+        return wrapper
+
+    def _wrapNested(self, func):
+        '''
+        Wrap a function so the evaluators it calls count as nested calls
+
+        Args:
+            func (callable): The function, e.g. the shard worker of evalListParallel
+
+        Returns:
+            callable: The wrapped function
+        '''
+        local = self._local
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            depth = getattr(local, 'depth', 0)
+            local.depth = depth + 1
+            try:
+                return func(*args, **kwargs)
+            finally:
+                local.depth = depth
+        return wrapper
+
+    def _countValues(self, values, stats):
+        '''
+        Pass the values of an iterable through, counting them
+
+        Args:
+            values (iterable): The values
+            stats (list): [calls, values, seconds] of the evaluator, updated
+
+        Returns:
+            generator: The values
+        '''
+        count = 0
+        try:
+            for value in values:
+                count += 1
+                yield value
+        finally:
+            with self._lock:
+                stats[1] += count
+
+    def install(self):
+        '''
+        Wrap the evaluators and rendering, and start tracemalloc and cProfile
+        '''
+        global _active
+        if _active is not None:
+            _active.uninstall()
+        instrument = self
+        for name in dir(NagEval):
+            if name.startswith('eval') and callable(getattr(NagEval, name)):
+                self._originals[(NagEval, name)] = NagEval.__dict__[name]
+                setattr(NagEval, name, self._wrapEvaluator(name, NagEval.__dict__[name]))
+        self._originals[(NagiosCheckHelper, '_evalShard')] = NagiosCheckHelper._evalShard
+        NagiosCheckHelper._evalShard = self._wrapNested(NagiosCheckHelper._evalShard)
+
+        renderStatus = NagErrors.__dict__['renderStatus']
+        printStatus = NagErrors.__dict__['printStatus']
+
+        @wraps(renderStatus)
+        def timedRenderStatus(nerr, *args, **kwargs):
+            with instrument.phase('render'):
+                return renderStatus(nerr, *args, **kwargs)
+
+        @wraps(printStatus)
+        def reportingPrintStatus(nerr, *args, **kwargs):
+            if instrument.perfData:
+                instrument.addPerfData(nerr)
+            try:
+                return printStatus(nerr, *args, **kwargs)
+            finally:
+                instrument.finish()
+
+        self._originals[(NagErrors, 'renderStatus')] = renderStatus
+        self._originals[(NagErrors, 'printStatus')] = printStatus
+        NagErrors.renderStatus = timedRenderStatus
+        NagErrors.printStatus = reportingPrintStatus
+
+        if self.traceMemory:
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._startedTracemalloc = True
+        if self.profilePath is not None:
+            import cProfile
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        self._start = time.perf_counter()
+        _active = self
+
+    def uninstall(self):
+        '''
+        Restore the evaluators and rendering, and stop tracemalloc and cProfile
+        '''
+        global _active
+        for (cls, name), func in self._originals.items():
+            setattr(cls, name, func)
+        self._originals = {}
+        if self._profiler is not None:
+            self._profiler.disable()
+        if self._startedTracemalloc:
+            import tracemalloc
+            tracemalloc.stop()
+            self._startedTracemalloc = False
+        if _active is self:
+            _active = None
+
+    def phase(self, name):
+        '''
+        Time a phase of the check, e.g. with instrument.phase('probe'): ...
+
+        Args:
+            name (str): Name of the phase, repeated phases add up
+
+        Returns:
+            context manager: Times the with block
+        '''
+        return _Phase(self, name)
+
+    def peakMemory(self):
+        '''
+        Get the peak memory traced by tracemalloc
+
+        Returns:
+            int: Peak traced memory in bytes, None if memory is not traced
+        '''
+        if 'tracemalloc' not in sys.modules or not sys.modules['tracemalloc'].is_tracing():
+            return None
+        return sys.modules['tracemalloc'].get_traced_memory()[1]
+
+    def report(self):
+        '''
+        Get the measurements
+
+        Returns:
+            dict: total, phases and evaluators (calls, values, seconds), peakMemory in bytes
+        '''
+        with self._lock:
+            phases = dict(self.phases)
+            evaluators = dict((name, {'calls': s[0], 'values': s[1], 'seconds': s[2]}) for name, s in self.evaluators.items())
+        return {
+            'total': time.perf_counter() - self._start if self._start is not None else 0.0,
+            'phases': phases,
+            'evaluators': evaluators,
+            'peakMemory': self.peakMemory(),
+        }
+
+    def addPerfData(self, nerr):
+        '''
+        Add the measurements to the perfdata of a NagErrors object
+
+        Args:
+            nerr (NagErrors): The object to add nch_* points to
+        '''
+        with self._lock:
+            calls = sum(s[0] for s in self.evaluators.values())
+            values = sum(s[1] for s in self.evaluators.values())
+            phases = dict(self.phases)
+        nerr.addPerfData('nch_eval_calls', calls)
+        nerr.addPerfData('nch_eval_values', values)
+        for name in sorted(phases):
+            nerr.addPerfData('nch_{}_time'.format(name), round(phases[name], 6), 's')
+        peak = self.peakMemory()
+        if peak is not None:
+            nerr.addPerfData('nch_peak_memory', peak, 'B')
+
+    def finish(self):
+        '''
+        Write the sidecar file and the cProfile dump
+        '''
+        if self.sidecarPath is not None:
+            with open(self.sidecarPath, 'w') as f:
+                json.dump(self.report(), f, indent=2, sort_keys=True)
+        if self._profiler is not None:
+            self._profiler.disable()
+            self._profiler.dump_stats(self.profilePath)
+            self._profiler.enable()
+
+
+class _Phase(object):
+    '''
+    Context manager adding the time of a with block to a phase of a NagInstrument
+    '''
+    def __init__(self, instrument, name):
+        self.instrument = instrument
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        with self.instrument._lock:
+            phases = self.instrument.phases
+            phases[self.name] = phases.get(self.name, 0.0) + elapsed
+
+
+def enable(perfData=True, sidecarPath=None, profilePath=None, traceMemory=True):
+    '''
+    Create and install a NagInstrument, replacing the active one
+
+    Args:
+        perfData (bool): Add the measurements to the perfdata
+        sidecarPath (str): Write the measurements to this JSON file, None for no file
+        profilePath (str): Run cProfile and dump the statistics to this file, None to not profile
+        traceMemory (bool): Track peak memory with tracemalloc
+
+    Returns:
+        NagInstrument: The installed instrument
+    '''
+    instrument = NagInstrument(perfData, sidecarPath, profilePath, traceMemory)
+    instrument.install()
+    return instrument
+
+
+def disable():
+    '''
+    Uninstall the active NagInstrument, if any
+    '''
+    if _active is not None:
+        _active.uninstall()
+
+
+def active():
+    '''
+    Get the active NagInstrument
+
+    Returns:
+        NagInstrument: The installed instrument, None if instrumentation is disabled
+    '''
+    return _active
+
+
+def enableFromEnvironment(environ=None):
+    '''
+    Enable instrumentation as configured by the environment
+
+    NAGIOSCHECKHELPER_INSTRUMENT=1 adds perfdata, NAGIOSCHECKHELPER_INSTRUMENT_SIDECAR and
+    NAGIOSCHECKHELPER_PROFILE give the sidecar and cProfile files, and
+    NAGIOSCHECKHELPER_INSTRUMENT_MEMORY=0 turns off tracemalloc.
+
+    Args:
+        environ (dict): Environment, defaults to os.environ
+
+    Returns:
+        NagInstrument: The installed instrument, None if the environment doesn't enable it
+    '''
+    if environ is None:
+        environ = os.environ
+    perfData = environ.get('NAGIOSCHECKHELPER_INSTRUMENT', '') not in ('', '0')
+    sidecarPath = environ.get('NAGIOSCHECKHELPER_INSTRUMENT_SIDECAR') or None
+    profilePath = environ.get('NAGIOSCHECKHELPER_PROFILE') or None
+    if not perfData and sidecarPath is None and profilePath is None:
+        return None
+    traceMemory = environ.get('NAGIOSCHECKHELPER_INSTRUMENT_MEMORY', '1') != '0'
+    return enable(perfData, sidecarPath, profilePath, traceMemory)
@@ -0,0 +1,214 @@
+import os
+import re
+import struct
+import tempfile
+
+_MAGIC = b'NCHLOGSC'
+# magic, device, inode, offset of the first unread byte
+_STATE = struct.Struct('<8sQQQ')
+# leading inline flags, e.g. (?i), and numbered group references, which change meaning once combined
+_GLOBAL_FLAGS = re.compile(rb'^\(\?([aiLmsux]+)\)')
+_NUMBERED_REFS = re.compile(rb'\\[1-9]|\(\?\([1-9]')
+
+
+def _combinePatterns(patterns):
+    '''
+    Build the regular expressions finding the candidate lines of a set of patterns
+
+    The patterns are combined into one alternation when that keeps their meaning: leading
+    (?i), (?m) and (?s) flags become scoped groups, and a pattern using numbered group
+    references must not follow a pattern with groups. Otherwise each pattern is searched alone.
+
+    Args:
+        patterns (dict): Map of name to compiled bytes pattern
+
+    Returns:
+        List of (compiled pattern, dict): Each expression and the patterns of the lines it finds
+    '''
+    alternatives = []
+    groups = 0
+    for pattern in patterns.values():
+        source = pattern.pattern
+        m = _GLOBAL_FLAGS.match(source)
+        if m is not None:
+            if set(m.group(1)) - set(b'ims'):
+                break
+            source = b"(?" + m.group(1) + b":" + source[m.end():] + b")"
+        if groups and _NUMBERED_REFS.search(source) is not None:
+            break
+        groups += pattern.groups
+        alternatives.append(b"(?:" + source + b")")
+    else:
+        try:
+            return [(re.compile(b"|".join(alternatives), re.MULTILINE), patterns)]
+        except re.error:
+            pass
+    return [(pattern, {name: pattern}) for name, pattern in patterns.items()]
+
+
+class NagLogScanner(object):
+    '''
+
+    The NagLogScanner object counts the log lines matching a set of patterns, reading only what was appended since the last run
+
+    The device, inode and offset of the log are kept in a small state file. A log that was
+    truncated is read from the start, and after a rotation the rest of the old file is read
+    from the first of rotatedPaths that is still the same file, then the new file from the start.
+    The new bytes are read in large chunks and searched with one regular expression combining
+    all patterns, so only lines matching at least one pattern are tested against each pattern.
+    Patterns that can't be combined, e.g. with a leading (?x) flag, are searched one at a time.
+    An incomplete last line is left for the next run.
+
+    Args:
+        path (str): Path of the log
+        statePath (str): Path of the state file, created if needed
+        patterns (dict): Map of name to regular expression (str or bytes), tested against each line
+        rotatedPaths (List of str's): Where the log may be after a rotation, defaults to [path + ".1"]
+        chunkSize (int): Number of bytes to read at once
+        fromStart (bool): On the first run, read the log from the start instead of only counting new lines
+
+    Attributes:
+        path (str): Path of the log
+        statePath (str): Path of the state file
+        patterns (dict): Map of name to compiled bytes pattern
+        rotatedPaths (List of str's): Where the log may be after a rotation
+        chunkSize (int): Number of bytes to read at once
+        fromStart (bool): On the first run, read the log from the start
+        bytesRead (int): Number of bytes read by the last scan
+    '''
+    def __init__(self, path, statePath, patterns, rotatedPaths=None, chunkSize=4 * 1024 * 1024, fromStart=False):
+        self.path = path
+        self.statePath = statePath
+        self.patterns = {}
+        for name, pattern in patterns.items():
+            if isinstance(pattern, str):
+                pattern = pattern.encode('utf-8')
+            self.patterns[name] = re.compile(pattern, re.MULTILINE)
+        self._searches = _combinePatterns(self.patterns)
+        self.rotatedPaths = [path + ".1"] if rotatedPaths is None else list(rotatedPaths)
+        self.chunkSize = chunkSize
+        self.fromStart = fromStart
+        self.bytesRead = 0
+
+    def _loadState(self):
+        '''
+        Read the state file
+
+        Returns:
+            (int, int, int): Device, inode and offset of the log, None if there is no valid state
+        '''
+        try:
+            with open(self.statePath, 'rb') as f:
+                magic, dev, ino, offset = _STATE.unpack(f.read(_STATE.size))
+        except (OSError, struct.error):
+            return None
+        if magic != _MAGIC:
+            return None
+        return (dev, ino, offset)
+
+    def _saveState(self, st, offset):
+        '''
+        Atomically write the state file
+
+        Args:
+            st (os.stat_result): Stat of the log
+            offset (int): Offset of the first unread byte
+        '''
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.statePath)), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(_STATE.pack(_MAGIC, st.st_dev, st.st_ino, offset))
+            os.replace(tmp, self.statePath)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def _countLines(self, buf, end, counts):
+        '''
+        Count the lines of buf[:end] matching each pattern
+
+        Args:
+            buf (bytes): The data
+            end (int): End of the complete lines in buf
+            counts (dict): Map of name to count, updated
+        '''
+        for combined, patterns in self._searches:
+            search = combined.search
+            pos = 0
+            while pos < end:
+                m = search(buf, pos, end)
+                if m is None:
+                    break
+                start = buf.rfind(b"\n", 0, m.start()) + 1
+                stop = buf.find(b"\n", m.start(), end)
+                if stop < 0:
+                    stop = end
+                line = buf[start:stop]
+                for name, pattern in patterns.items():
+                    if pattern.search(line) is not None:
+                        counts[name] += 1
+                pos = stop + 1
+
+    def _scanFile(self, f, offset, counts, final):
+        '''
+        Count the matching lines of a file from offset
+
+        Args:
+            f (file): The log, opened in binary mode
+            offset (int): Where to start reading
+            counts (dict): Map of name to count, updated
+            final (bool): Count an incomplete last line too, the file will not grow any more
+
+        Returns:
+            int: Offset of the first byte not counted
+        '''
+        f.seek(offset)
+        carry = b""
+        while True:
+            chunk = f.read(self.chunkSize)
+            self.bytesRead += len(chunk)
+            if not chunk:
+                break
+            buf = carry + chunk if carry else chunk
+            end = buf.rfind(b"\n") + 1
+            if end == 0 and len(buf) >= self.chunkSize:
+                # a line longer than a chunk is counted in pieces rather than buffered
+                end = len(buf)
+            self._countLines(buf, end, counts)
+            offset += end
+            carry = buf[end:]
+        if final and carry:
+            self._countLines(carry, len(carry), counts)
+            offset += len(carry)
+        return offset
+
+    def scan(self):
+        '''
+        Count the lines appended to the log since the last scan
+
+        Returns:
+            dict: Map of pattern name to number of matching new lines
+        '''
+        counts = dict((name, 0) for name in self.patterns)
+        self.bytesRead = 0
+        state = self._loadState()
+        with open(self.path, 'rb') as f:
+            st = os.fstat(f.fileno())
+            if state is None:
+                offset = 0 if self.fromStart else st.st_size
+            elif (state[0], state[1]) == (st.st_dev, st.st_ino):
+                offset = state[2] if state[2] <= st.st_size else 0
+            else:
+                for rotated in self.rotatedPaths:
+                    try:
+                        with open(rotated, 'rb') as old:
+                            ost = os.fstat(old.fileno())
+                            if (ost.st_dev, ost.st_ino) == (state[0], state[1]) and state[2] <= ost.st_size:
+                                self._scanFile(old, state[2], counts, True)
+                                break
+                    except OSError:
+                        continue
+                offset = 0
+            offset = self._scanFile(f, offset, counts, False)
+        self._saveState(st, offset)
+        return counts
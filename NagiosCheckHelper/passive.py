@@ -0,0 +1,244 @@
+import errno
+import os
+import select
+import tempfile
+import time
+
+PIPE_BUF = getattr(select, 'PIPE_BUF', 4096)
+
+
+def _escapeOutput(text):
+    '''
+    Make plugin output fit on one line of the external command file
+
+    Args:
+        text (str): Rendered status of a NagErrors object
+
+    Returns:
+        str: The output with line breaks as literal \\n
+    '''
+    return text.rstrip("\r\n").replace("\r\n", "\\n").replace("\n", "\\n")
+
+
+def formatPassiveResult(host, service, code, output, timestamp=None):
+    '''
+    Format a passive check result as an external command
+
+    Args:
+        host (str): Host name
+        service (str): Service description, None for a host check result
+        code (int): Exit code of the check, 0-3
+        output (str): Plugin output, may have several lines
+        timestamp (int): Time of the result, defaults to now
+
+    Returns:
+        str: The command line, PROCESS_SERVICE_CHECK_RESULT or PROCESS_HOST_CHECK_RESULT
+    '''
+    if timestamp is None:
+        timestamp = time.time()
+    if service is None:
+        return "[{}] PROCESS_HOST_CHECK_RESULT;{};{};{}\n".format(int(timestamp), host, code, _escapeOutput(output))
+    return "[{}] PROCESS_SERVICE_CHECK_RESULT;{};{};{};{}\n".format(int(timestamp), host, service, code, _escapeOutput(output))
+
+
+class NagPassiveWriter(object):
+    '''
+
+    The NagPassiveWriter object submits many check results from one process as passive results
+
+    Results are buffered and written either to the external command file (the Nagios/Icinga
+    command FIFO) or, with spoolDir, as check result files for the check_result_path directory.
+    Writes to the FIFO are non-blocking and batched into chunks of whole lines of at most
+    batchBytes (PIPE_BUF by default, so each write is atomic and never interleaves with other
+    writers). When the pipe is full, flush waits for it to drain for up to timeout seconds.
+    Results that could not be written stay buffered for the next flush.
+
+    Args:
+        commandFile (str): Path of the external command file
+        spoolDir (str): Check result directory, used instead of commandFile
+        batchBytes (int): Maximum size of one write to the command file
+        timeout (num): Seconds flush waits for a full pipe to drain
+        outputLimit (int): Maximum bytes of each rendered status, see NagErrors.renderStatus
+
+    Attributes:
+        commandFile (str): Path of the external command file
+        spoolDir (str): Check result directory
+        batchBytes (int): Maximum size of one write to the command file
+        timeout (num): Seconds flush waits for a full pipe to drain
+        outputLimit (int): Maximum bytes of each rendered status
+        pending (list): Buffered results, (host, service, code, output, timestamp) tuples
+    '''
+    def __init__(self, commandFile=None, spoolDir=None, batchBytes=PIPE_BUF, timeout=10, outputLimit=None):
+        if (commandFile is None) == (spoolDir is None):
+            raise ValueError("NagPassiveWriter needs either commandFile or spoolDir")
+        self.commandFile = commandFile
+        self.spoolDir = spoolDir
+        self.batchBytes = batchBytes
+        self.timeout = timeout
+        self.outputLimit = outputLimit
+        self.pending = []
+
+    def add(self, host, service, nerr, timestamp=None):
+        '''
+        Buffer the result of a NagErrors object
+
+        Args:
+            host (str): Host name
+            service (str): Service description, None for a host check result
+            nerr (NagErrors): The result
+            timestamp (int): Time of the result, defaults to now
+        '''
+        self.addResult(host, service, nerr.getExitCode(), nerr.renderStatus(self.outputLimit), timestamp)
+
+    def addResult(self, host, service, code, output, timestamp=None):
+        '''
+        Buffer a result
+
+        Args:
+            host (str): Host name
+            service (str): Service description, None for a host check result
+            code (int): Exit code of the check, 0-3
+            output (str): Plugin output
+            timestamp (int): Time of the result, defaults to now
+        '''
+        if timestamp is None:
+            timestamp = time.time()
+        self.pending.append((host, service, code, output, timestamp))
+
+    def _batches(self, lines):
+        '''
+        Group encoded lines into batches of at most batchBytes, a longer line is a batch by itself
+
+        Args:
+            lines (List of bytes): The lines
+
+        Returns:
+            List of (bytes, int): Each batch and its number of lines
+        '''
+        batches = []
+        batch = []
+        size = 0
+        for line in lines:
+            if batch and size + len(line) > self.batchBytes:
+                batches.append((b"".join(batch), len(batch)))
+                batch = []
+                size = 0
+            batch.append(line)
+            size += len(line)
+        if batch:
+            batches.append((b"".join(batch), len(batch)))
+        return batches
+
+    def _writeAll(self, fd, data, deadline):
+        '''
+        Write data to a non-blocking descriptor, waiting while the pipe is full
+
+        Args:
+            fd (int): The descriptor
+            data (bytes): Data to write
+            deadline (float): time.monotonic() after which to give up
+
+        Returns:
+            bool: True if all of data was written, False if nothing was written before the deadline
+        '''
+        view = memoryview(data)
+        poller = select.poll()
+        poller.register(fd, select.POLLOUT)
+        extended = False
+        while len(view) > 0:
+            try:
+                n = os.write(fd, view)
+                view = view[n:]
+                continue
+            except BlockingIOError:
+                pass
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                if len(view) == len(data):
+                    return False
+                if extended:
+                    raise TimeoutError(errno.ETIMEDOUT, "command file stalled in the middle of a write")
+                # finish a started batch, a partial line would corrupt the command file
+                extended = True
+                remaining = self.timeout
+                deadline = time.monotonic() + remaining
+            events = poller.poll(remaining * 1000)
+            for _, event in events:
+                if event & (select.POLLERR | select.POLLHUP):
+                    raise BrokenPipeError(errno.EPIPE, "command file reader went away")
+        return True
+
+    def _flushCommandFile(self):
+        '''
+        Write the buffered results to the command file
+
+        Returns:
+            int: Number of results written
+        '''
+        lines = [formatPassiveResult(*result).encode('utf-8') for result in self.pending]
+        fd = os.open(self.commandFile, os.O_WRONLY | os.O_APPEND | os.O_NONBLOCK)
+        written = 0
+        try:
+            deadline = time.monotonic() + self.timeout
+            for data, count in self._batches(lines):
+                if not self._writeAll(fd, data, deadline):
+                    break
+                written += count
+        finally:
+            os.close(fd)
+            del self.pending[:written]
+        return written
+
+    def _flushSpool(self):
+        '''
+        Write the buffered results as one check result file
+
+        Returns:
+            int: Number of results written
+        '''
+        now = int(time.time())
+        parts = ["### Passive Check Result File ###\nfile_time={}\n\n".format(now)]
+        for host, service, code, output, timestamp in self.pending:
+            parts.append("### Nagios {} Check Result ###\n# Time: {}\nhost_name={}\n".format(
+                "Host" if service is None else "Service", time.ctime(timestamp), host))
+            if service is not None:
+                parts.append("service_description={}\n".format(service))
+            parts.append("check_type=1\ncheck_options=0\nscheduled_check=0\nreschedule_check=0\nlatency=0.0\n"
+                         "start_time={0:.6f}\nfinish_time={0:.6f}\nearly_timeout=0\nexited_ok=1\nreturn_code={1}\noutput={2}\n\n"
+                         .format(timestamp, code, _escapeOutput(output)))
+        data = "".join(parts).encode('utf-8')
+        fd, tmp = tempfile.mkstemp(dir=self.spoolDir, prefix='.nch', suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        # the core reads files named c + 6 characters, once their .ok file exists
+        while True:
+            name = os.path.join(self.spoolDir, "c" + os.urandom(3).hex())
+            try:
+                os.close(os.open(name, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644))
+                break
+            except FileExistsError:
+                continue
+        os.replace(tmp, name)
+        os.close(os.open(name + ".ok", os.O_WRONLY | os.O_CREAT, 0o644))
+        written = len(self.pending)
+        del self.pending[:]
+        return written
+
+    def flush(self):
+        '''
+        Write the buffered results
+
+        Returns:
+            int: Number of results written, the rest stay in pending
+        '''
+        if len(self.pending) == 0:
+            return 0
+        if self.spoolDir is not None:
+            return self._flushSpool()
+        return self._flushCommandFile()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.flush()
@@ -0,0 +1,174 @@
+import fnmatch
+import re
+
+from NagiosCheckHelper import NagEval, NagEnumMatcher, NagRange, _RVALS
+
+# kind: (list evaluator, evaluator arguments a rule may set)
+_KINDS = {
+    'asc': ('evalListNumberAsc', ('emptyStatus', 'warningAbove', 'criticalAbove', 'postfixText', 'perfAggregate')),
+    'desc': ('evalListNumberDesc', ('emptyStatus', 'warningBelow', 'criticalBelow', 'postfixText', 'perfAggregate')),
+    'range': ('evalListRange', ('emptyStatus', 'warningRange', 'criticalRange', 'postfixText', 'perfAggregate')),
+    'enum': ('evalListEnum', ('emptyStatus', 'unknownValueStatus', 'okValues', 'warningValues', 'criticalValues', 'unknownValues', 'postfixText')),
+    'bands': ('evalListBands', ('emptyStatus', 'bands', 'postfixText')),
+}
+_RULE_KEYS = ('match', 'kind', 'units', 'label', 'perf')
+
+
+class NagRule(object):
+    '''
+
+    A compiled rule of a NagRuleSet
+
+    Args:
+        spec (dict): The rule, see NagRuleSet
+
+    Attributes:
+        match (str): Metric name or fnmatch pattern
+        method (str): Name of the NagEval list evaluator
+        kwargs (dict): Evaluator arguments, without prefixText
+        label (str): Prefix of error reports, formatted with the metric name as {name}
+        perf (bool): Record perfdata labeled with the metric name
+    '''
+    __slots__ = ('match', 'method', 'kwargs', 'label', 'perf')
+
+    def __init__(self, spec):
+        spec = dict(spec)
+        if 'match' not in spec or 'kind' not in spec:
+            raise ValueError("rule needs 'match' and 'kind': {!r}".format(spec))
+        if spec['kind'] not in _KINDS:
+            raise ValueError("unknown rule kind {!r}".format(spec['kind']))
+        self.method, allowed = _KINDS[spec['kind']]
+        for key in spec:
+            if key not in _RULE_KEYS and key not in allowed:
+                raise ValueError("unknown argument {!r} for a {} rule".format(key, spec['kind']))
+        self.match = spec['match']
+        self.label = spec.get('label', "{name} ")
+        self.perf = bool(spec.get('perf', False))
+        self.kwargs = dict([(k, v) for k, v in spec.items() if k in allowed])
+        if spec['kind'] == 'enum':
+            self.kwargs['matcher'] = NagEnumMatcher(self.kwargs.pop('okValues', []), self.kwargs.pop('warningValues', []),
+                                                    self.kwargs.pop('criticalValues', []), self.kwargs.pop('unknownValues', []))
+        elif spec['kind'] == 'range':
+            for key in ('warningRange', 'criticalRange'):
+                if self.kwargs.get(key) is not None:
+                    self.kwargs[key] = NagRange.compile(self.kwargs[key])
+        if spec['kind'] != 'enum':
+            self.kwargs['numberUnits'] = spec.get('units', "")
+
+    def bind(self, name):
+        '''
+        Get the evaluator arguments for a metric
+
+        Args:
+            name (str): Name of the metric
+
+        Returns:
+            dict: Evaluator arguments including prefixText and perfLabel
+        '''
+        kwargs = dict(self.kwargs)
+        kwargs['prefixText'] = self.label.format(name=name)
+        if self.perf and self.method != 'evalListEnum' and self.method != 'evalListBands':
+            kwargs['perfLabel'] = name
+        return kwargs
+
+
+class NagRuleSet(object):
+    '''
+
+    The NagRuleSet object evaluates a dict of labeled metrics with a table of rules
+
+    Each rule is a dict with:
+        match: the metric name, or an fnmatch pattern (e.g. "disk_*")
+        kind: one of 'asc', 'desc', 'range', 'enum', 'bands', which evaluator to use
+        units: numberUnits of the evaluator
+        label: prefix of error reports, formatted with the metric name as {name} (default "{name} ")
+        perf: True to record perfdata labeled with the metric name
+    and the arguments of the evaluator, e.g. warningAbove/criticalAbove for 'asc' or okValues/criticalValues for 'enum'.
+
+    Rules are compiled once. Exact names are found with a dict lookup, patterns are combined
+    into one regular expression (the first matching rule wins), and the rule and evaluator
+    arguments of each metric name are cached after the first lookup.
+
+    Args:
+        rules (List of dict's): The rules
+        unmatchedStatus (str): Status of metrics without a rule, None to ignore them
+        missingStatus (str): Status of exact-name rules without a metric, None to ignore them
+
+    Attributes:
+        rules (List of NagRule's): The compiled rules
+        unmatchedStatus (str): Status of metrics without a rule
+        missingStatus (str): Status of exact-name rules without a metric
+    '''
+    def __init__(self, rules, unmatchedStatus=None, missingStatus=None):
+        self.rules = [NagRule(r) for r in rules]
+        self.unmatchedStatus = unmatchedStatus
+        self.missingStatus = missingStatus
+        self._exact = {}
+        patterns = []
+        for i, rule in enumerate(self.rules):
+            if any(c in rule.match for c in '*?['):
+                patterns.append("(?P<r{}>{})".format(i, fnmatch.translate(rule.match)))
+            elif rule.match not in self._exact:
+                self._exact[rule.match] = rule
+        self._pattern = re.compile("|".join(patterns)) if patterns else None
+        self._bound = {}
+
+    def lookup(self, name):
+        '''
+        Get the rule and evaluator arguments of a metric
+
+        Args:
+            name (str): Name of the metric
+
+        Returns:
+            (str, dict): Name of the evaluator and its arguments, or None if no rule matches
+        '''
+        try:
+            return self._bound[name]
+        except KeyError:
+            pass
+        rule = self._exact.get(name)
+        if rule is None and self._pattern is not None:
+            m = self._pattern.match(name)
+            if m is not None:
+                rule = self.rules[int(m.lastgroup[1:])]
+        ret = None if rule is None else (rule.method, rule.bind(name))
+        self._bound[name] = ret
+        return ret
+
+    def evaluate(self, neval, metrics):
+        '''
+        Evaluate a dict of metrics
+
+        Args:
+            neval (NagEval or NagErrors): Evaluator, or the NagErrors object to store results in
+            metrics (dict): Map of metric name to value (or list of values)
+
+        Effects:
+            neval.errObj (NagErrors): Updated with error records
+
+        Returns:
+            str: Worst result, One of (OK,WARNING,CRITICAL,UNKNOWN)
+        '''
+        if not isinstance(neval, NagEval):
+            neval = NagEval(neval)
+        ret = "OK"
+        for name, value in metrics.items():
+            bound = self.lookup(name)
+            if bound is None:
+                if self.unmatchedStatus is None:
+                    continue
+                r = self.unmatchedStatus
+                if r != "OK":
+                    neval.errObj.addRecord(r.lower(), "no rule for metric {}".format(name))
+            else:
+                r = getattr(neval, bound[0])(value, **bound[1])
+            if _RVALS[r] > _RVALS[ret]:
+                ret = r
+        if self.missingStatus is not None and self.missingStatus != "OK":
+            for name in self._exact:
+                if name not in metrics:
+                    neval.errObj.addRecord(self.missingStatus.lower(), "metric {} is missing".format(name))
+                    if _RVALS[self.missingStatus] > _RVALS[ret]:
+                        ret = self.missingStatus
+        return ret
@@ -0,0 +1,122 @@
+import asyncio
+
+from NagiosCheckHelper import NagEval
+
+
+class NagAsyncRunner(object):
+    '''
+
+    The NagAsyncRunner object runs coroutine probes concurrently and evaluates their results
+
+    Probes run under a concurrency limit, each with its own timeout. Once all probes are
+    done, the evaluate function of each successful probe is called with a NagEval object
+    and the probe result, in the order the probes were added. A probe that times out or
+    raises an exception adds an UNKNOWN record instead.
+
+    Args:
+        errObj (NagErrors): NagErrors object used to store results
+        concurrency (int): Maximum number of probes running at the same time
+        timeout (num): Default timeout in seconds for each probe, None for no timeout
+        deadline (NagDeadline): Caps the timeout of each probe to the time left, None for no deadline
+
+    Attributes:
+        errObj (NagErrors): NagErrors object used to store results
+        concurrency (int): Maximum number of probes running at the same time
+        timeout (num): Default timeout in seconds for each probe
+        deadline (NagDeadline): Deadline of the probes and of the NagEval object passed to evaluate
+        probes (list of dict's): The probes that were added
+        results (dict): Result of each probe by name, None for probes that failed
+    '''
+    def __init__(self, errObj, concurrency=10, timeout=None, deadline=None):
+        self.errObj = errObj
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.deadline = deadline
+        self.probes = []
+        self.results = {}
+
+    def addProbe(self, name, probe, evaluate=None, args=(), kwargs={}, timeout=None):
+        '''
+        Add a probe
+
+        Args:
+            name (str): Name of the probe, used in error reports
+            probe (coroutine function): Called as probe(*args, **kwargs) to run the probe
+            evaluate (callable): Called as evaluate(neval, result) with a NagEval object and the probe result
+            args (tuple): Positional arguments for probe
+            kwargs (dict): Keyword arguments for probe
+            timeout (num): Timeout in seconds for this probe, defaults to the runner timeout
+        '''
+        self.probes.append({'name': name, 'probe': probe, 'evaluate': evaluate, 'args': args, 'kwargs': kwargs,
+                            'timeout': self.timeout if timeout is None else timeout})
+
+    async def _runProbe(self, semaphore, p):
+        '''
+        Run a single probe under the concurrency limit
+
+        Args:
+            semaphore (asyncio.Semaphore): Concurrency limit
+            p (dict): The probe
+
+        Returns:
+            (str, any): Status of the probe ("OK" or "UNKNOWN") and its result
+        '''
+        async with semaphore:
+            timeout = p['timeout']
+            if self.deadline is not None:
+                if not self.deadline.check(p['name']):
+                    return ("UNKNOWN", None)
+                timeout = self.deadline.timeout(timeout)
+            try:
+                result = await asyncio.wait_for(p['probe'](*p['args'], **p['kwargs']), timeout)
+            except asyncio.TimeoutError:
+                if timeout != p['timeout']:
+                    self.errObj.addUnknown("{} did not finish within the deadline of {}s".format(p['name'], self.deadline.budget))
+                else:
+                    self.errObj.addUnknown("{} timed out after {}s".format(p['name'], p['timeout']))
+                return ("UNKNOWN", None)
+            except Exception as e:
+                self.errObj.addUnknown("{} failed: {}".format(p['name'], e))
+                return ("UNKNOWN", None)
+        return ("OK", result)
+
+    async def runAsync(self):
+        '''
+        Run all probes and evaluate their results, from a running event loop
+
+        Effects:
+            self.errObj (NagErrors): Updated with error records
+            self.results (dict): Updated with the probe results
+
+        Returns:
+            dict: Result of each probe by name, None for probes that failed
+        '''
+        semaphore = asyncio.Semaphore(self.concurrency)
+        done = await asyncio.gather(*[self._runProbe(semaphore, p) for p in self.probes])
+        neval = NagEval(self.errObj, self.deadline)
+        for p, (status, result) in zip(self.probes, done):
+            self.results[p['name']] = result
+            if status != "OK" or p['evaluate'] is None:
+                continue
+            try:
+                p['evaluate'](neval, result)
+            except Exception as e:
+                self.errObj.addUnknown("{} evaluation failed: {}".format(p['name'], e))
+        return self.results
+
+    def run(self):
+        '''
+        Run all probes and evaluate their results in a new event loop
+
+        Effects:
+            self.errObj (NagErrors): Updated with error records
+            self.results (dict): Updated with the probe results
+
+        Returns:
+            dict: Result of each probe by name, None for probes that failed
+        '''
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(self.runAsync())
+        finally:
+            loop.close()
@@ -0,0 +1,297 @@
+import itertools
+import math
+import random
+
+_BATCH = 1024
+
+
+def parseAggregate(aggregate):
+    '''
+    Parse the name of an aggregate
+
+    Args:
+        aggregate (str): One of 'min', 'max', 'mean', 'stddev', 'sum', 'count', 'median',
+                         or a percentile as 'p' and a number (e.g. 'p95', 'p99.9')
+
+    Returns:
+        (str, float): The aggregate ('quantile' for percentiles) and the quantile between 0 and 1, or None
+    '''
+    if aggregate in ('min', 'max', 'mean', 'stddev', 'sum', 'count'):
+        return (aggregate, None)
+    if aggregate == 'median':
+        return ('quantile', 0.5)
+    if aggregate.startswith('p'):
+        try:
+            q = float(aggregate[1:]) / 100
+        except ValueError:
+            q = -1
+        if 0 <= q <= 1:
+            return ('quantile', q)
+    raise ValueError("Unknown aggregate {}".format(aggregate))
+
+
+def aggregateArray(arr, aggregate):
+    '''
+    Compute an aggregate of a numpy array exactly
+
+    Percentiles are the smallest value with at least that fraction of the values at or below it,
+    the same definition NagQuantileSketch uses.
+
+    Args:
+        arr (numpy.ndarray): The values
+        aggregate (str): Name of the aggregate, see parseAggregate
+
+    Returns:
+        num: The aggregated value, None if arr is empty
+    '''
+    kind, q = parseAggregate(aggregate)
+    if kind == 'count':
+        return arr.size
+    if arr.size == 0:
+        return None
+    if kind == 'quantile':
+        import numpy
+        return numpy.quantile(arr, q, method='inverted_cdf').item()
+    if kind == 'stddev':
+        return arr.std().item()
+    return getattr(arr, kind)().item()
+
+
+class NagQuantileSketch(object):
+    '''
+
+    The NagQuantileSketch object summarizes a stream of numbers in bounded memory
+
+    Count, sum, min, max, mean and standard deviation are exact. Percentiles come from a KLL sketch:
+    values are kept in levels of sorted buffers, and a full level is compacted by keeping every
+    other value with twice the weight, so memory stays around 3 * k values however many are added,
+    with a rank error of roughly 1.7 / k. Below about k values the percentiles are exact.
+
+    Sketches built from parts of a stream (by workers, or by earlier check runs) can be merged,
+    and converted to and from a dict of plain lists and numbers for JSON or pickle.
+
+    Args:
+        k (int): Size of the largest level, trades memory for accuracy
+        seed (int): Seed of the random compaction offsets, None for a random seed
+
+    Attributes:
+        k (int): Size of the largest level
+        count (int): Number of values added
+        total (num): Sum of the values
+        minimum (num): Smallest value, None if empty
+        maximum (num): Largest value, None if empty
+    '''
+    def __init__(self, k=200, seed=None):
+        self.k = k
+        self.count = 0
+        self.total = 0
+        self.minimum = None
+        self.maximum = None
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._levels = [[]]
+        self._size = 0
+        self._random = random.Random(seed)
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def mean(self):
+        '''
+        float: Mean of the values, None if empty
+        '''
+        return self._mean if self.count > 0 else None
+
+    @property
+    def stddev(self):
+        '''
+        float: Population standard deviation of the values, None if empty
+        '''
+        return math.sqrt(self._m2 / self.count) if self.count > 0 else None
+
+    def _capacity(self, level):
+        '''
+        Get the number of values a level holds before it is compacted
+
+        Args:
+            level (int): The level, 0 holds the values as added
+
+        Returns:
+            int: The capacity
+        '''
+        depth = len(self._levels) - level - 1
+        return int(math.ceil((2.0 / 3.0) ** depth * self.k)) + 1
+
+    def _maxSize(self):
+        return sum(self._capacity(level) for level in range(len(self._levels)))
+
+    def _compress(self):
+        '''
+        Compact full levels until the sketch is within its memory bound
+        '''
+        while self._size >= self._maxSize():
+            for level in range(len(self._levels)):
+                buf = self._levels[level]
+                if len(buf) >= self._capacity(level):
+                    if level + 1 == len(self._levels):
+                        self._levels.append([])
+                    buf.sort()
+                    keep = len(buf) - len(buf) % 2
+                    offset = self._random.randint(0, 1)
+                    self._levels[level + 1].extend(buf[offset:keep:2])
+                    self._levels[level] = buf[keep:]
+                    self._size -= keep // 2
+                    break
+
+    def _addStats(self, count, total, minimum, maximum, mean, m2):
+        '''
+        Combine the exact statistics of another batch of values
+
+        Args:
+            count (int): Number of values
+            total (num): Sum of the values
+            minimum (num): Smallest value
+            maximum (num): Largest value
+            mean (float): Mean of the values
+            m2 (float): Sum of squared differences from the mean
+        '''
+        n = self.count + count
+        delta = mean - self._mean
+        self._mean += delta * count / n
+        self._m2 += m2 + delta * delta * self.count * count / n
+        self.count = n
+        self.total += total
+        if self.minimum is None or minimum < self.minimum:
+            self.minimum = minimum
+        if self.maximum is None or maximum > self.maximum:
+            self.maximum = maximum
+
+    def add(self, value):
+        '''
+        Add a value
+
+        Args:
+            value (num): The value
+        '''
+        self.update((value,))
+
+    def update(self, values):
+        '''
+        Add values from an iterable, consumed lazily in batches
+
+        Args:
+            values (iterable of num or numpy.ndarray): The values
+        '''
+        if hasattr(values, 'tolist') and hasattr(values, 'ravel'):
+            values = values.ravel().tolist()
+        it = iter(values)
+        while True:
+            batch = list(itertools.islice(it, _BATCH))
+            if len(batch) == 0:
+                return
+            total = sum(batch)
+            mean = total / len(batch)
+            m2 = sum((v - mean) * (v - mean) for v in batch)
+            self._addStats(len(batch), total, min(batch), max(batch), mean, m2)
+            self._levels[0].extend(batch)
+            self._size += len(batch)
+            self._compress()
+
+    def merge(self, other):
+        '''
+        Add the values summarized by another sketch
+
+        Args:
+            other (NagQuantileSketch): The sketch to merge, left unchanged
+        '''
+        if other.count == 0:
+            return
+        self._addStats(other.count, other.total, other.minimum, other.maximum, other._mean, other._m2)
+        while len(self._levels) < len(other._levels):
+            self._levels.append([])
+        for level, buf in enumerate(other._levels):
+            self._levels[level].extend(buf)
+            self._size += len(buf)
+        self._compress()
+
+    def quantile(self, q):
+        '''
+        Get the approximate value at a quantile
+
+        Args:
+            q (float): The quantile, between 0 and 1 (0.95 for the 95th percentile)
+
+        Returns:
+            num: The smallest value with at least q of the values at or below it, None if empty
+        '''
+        if self.count == 0:
+            return None
+        if q <= 0:
+            return self.minimum
+        if q >= 1:
+            return self.maximum
+        weighted = []
+        for level, buf in enumerate(self._levels):
+            weight = 1 << level
+            weighted.extend((v, weight) for v in buf)
+        weighted.sort(key=lambda item: item[0])
+        target = q * sum(weight for v, weight in weighted)
+        seen = 0
+        for value, weight in weighted:
+            seen += weight
+            if seen >= target:
+                return value
+        return self.maximum
+
+    def aggregate(self, aggregate):
+        '''
+        Get an aggregate of the values
+
+        Args:
+            aggregate (str): Name of the aggregate, see parseAggregate
+
+        Returns:
+            num: The aggregated value, None if empty (except count)
+        '''
+        kind, q = parseAggregate(aggregate)
+        if kind == 'quantile':
+            return self.quantile(q)
+        if kind == 'count':
+            return self.count
+        if self.count == 0:
+            return None
+        return {'min': self.minimum, 'max': self.maximum, 'sum': self.total, 'mean': self.mean, 'stddev': self.stddev}[kind]
+
+    def toDict(self):
+        '''
+        Convert the sketch to a dict of plain lists and numbers, e.g. for json.dumps
+
+        Returns:
+            dict: The sketch
+        '''
+        return {'k': self.k, 'count': self.count, 'total': self.total, 'minimum': self.minimum, 'maximum': self.maximum,
+                'mean': self._mean, 'm2': self._m2, 'levels': [list(buf) for buf in self._levels]}
+
+    @classmethod
+    def fromDict(cls, data, seed=None):
+        '''
+        Create a sketch from the output of toDict
+
+        Args:
+            data (dict): The sketch
+            seed (int): Seed of the random compaction offsets, None for a random seed
+
+        Returns:
+            NagQuantileSketch: The sketch
+        '''
+        sketch = cls(data['k'], seed)
+        sketch.count = data['count']
+        sketch.total = data['total']
+        sketch.minimum = data['minimum']
+        sketch.maximum = data['maximum']
+        sketch._mean = data['mean']
+        sketch._m2 = data['m2']
+        sketch._levels = [list(buf) for buf in data['levels']]
+        sketch._size = sum(len(buf) for buf in sketch._levels)
+        return sketch
@@ -0,0 +1,167 @@
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import time
+from _thread import RLock
+
+_MAGIC = b'NCHSTATE'
+_HEADER = struct.Struct('<8sII')
+# keyhash, time, value, ewma mean, ewma variance, sample count
+_RECORD = struct.Struct('<QddddQ')
+
+
+def _keyHash(key):
+    '''
+    Hash a series key to a non-zero 64 bit integer
+
+    Args:
+        key (str): The series key
+
+    Returns:
+        int: The hash
+    '''
+    digest = hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little') | 1
+
+
+class NagStateStore(object):
+    '''
+
+    The NagStateStore object keeps per-series state between check runs in a memory-mapped file
+
+    The file is a fixed-size hash table of fixed-size records, updated in place, so a check
+    only touches the records of the series it evaluates. Each record is locked with a
+    byte-range lock while it is read and updated, so concurrent check processes can share
+    a store.
+
+    Args:
+        path (str): Path of the state file, created if needed
+        slots (int): Number of series the file can hold, only used when creating the file
+
+    Attributes:
+        path (str): Path of the state file
+        slots (int): Number of series the file can hold
+    '''
+    def __init__(self, path, slots=4096):
+        self.path = path
+        self._lock = RLock()
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, _HEADER.size, 0)
+            try:
+                if os.fstat(self._fd).st_size == 0:
+                    os.ftruncate(self._fd, _HEADER.size + slots * _RECORD.size)
+                    os.pwrite(self._fd, _HEADER.pack(_MAGIC, 1, slots), 0)
+                magic, version, self.slots = _HEADER.unpack(os.pread(self._fd, _HEADER.size, 0))
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, _HEADER.size, 0)
+            if magic != _MAGIC or version != 1:
+                raise ValueError("{} is not a NagStateStore file".format(path))
+            self._map = mmap.mmap(self._fd, _HEADER.size + self.slots * _RECORD.size)
+        except BaseException:
+            os.close(self._fd)
+            raise
+
+    def close(self):
+        '''
+        Close the state file
+        '''
+        self._map.close()
+        os.close(self._fd)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _update(self, key, func):
+        '''
+        Find or create the record of a series and update it under a lock
+
+        Args:
+            key (str): The series key
+            func (callable): Called as func(record) with the record tuple (keyhash, time, value, mean, variance, count),
+                             returns (new record tuple, result)
+
+        Returns:
+            any: The result of func
+        '''
+        h = _keyHash(key)
+        slot = h % self.slots
+        with self._lock:
+            for _ in range(self.slots):
+                offset = _HEADER.size + slot * _RECORD.size
+                fcntl.lockf(self._fd, fcntl.LOCK_EX, _RECORD.size, offset)
+                try:
+                    rec = _RECORD.unpack_from(self._map, offset)
+                    if rec[0] == 0:
+                        rec = (h, 0.0, 0.0, 0.0, 0.0, 0)
+                    if rec[0] == h:
+                        rec, result = func(rec)
+                        _RECORD.pack_into(self._map, offset, *rec)
+                        return result
+                finally:
+                    fcntl.lockf(self._fd, fcntl.LOCK_UN, _RECORD.size, offset)
+                slot = (slot + 1) % self.slots
+        raise ValueError("{} is full".format(self.path))
+
+    def counterRate(self, key, value, now=None, counterMax=None):
+        '''
+        Store a counter sample and compute the rate since the previous sample
+
+        Args:
+            key (str): The series key
+            value (num): Current counter value
+            now (float): Time of the sample, defaults to time.time()
+            counterMax (num): Value at which the counter wraps to 0 (e.g. 2**32), None if it doesn't wrap
+
+        Returns:
+            float: Increase per second since the previous sample, None for the first sample,
+                   or when the counter was reset
+        '''
+        if now is None:
+            now = time.time()
+
+        def update(rec):
+            h, last, lastValue, mean, var, count = rec
+            rate = None
+            if count > 0 and now > last:
+                delta = value - lastValue
+                if delta < 0 and counterMax is not None:
+                    delta += counterMax
+                if delta >= 0:
+                    rate = delta / (now - last)
+            return (h, now, value, mean, var, count + 1), rate
+        return self._update(key, update)
+
+    def ewma(self, key, value, alpha=0.3, now=None):
+        '''
+        Get the exponentially weighted baseline of a series, then add a sample to it
+
+        Args:
+            key (str): The series key
+            value (num): The sample
+            alpha (float): Weight of the new sample, between 0 and 1
+            now (float): Time of the sample, defaults to time.time()
+
+        Returns:
+            (float, float, int): Baseline mean and standard deviation before this sample, and the number of earlier samples
+        '''
+        if now is None:
+            now = time.time()
+
+        def update(rec):
+            h, last, lastValue, mean, var, count = rec
+            result = (mean, var ** 0.5, count)
+            if count == 0:
+                mean, var = float(value), 0.0
+            else:
+                diff = value - mean
+                incr = alpha * diff
+                mean += incr
+                var = (1 - alpha) * (var + diff * incr)
+            return (h, now, value, mean, var, count + 1), result
+        return self._update(key, update)
@@ -0,0 +1,51 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from unittest import TestCase
+
+PKGDIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+BENCH = os.path.join(PKGDIR, 'benchmarks', 'bench.py')
+
+
+def runBench(*args):
+    return subprocess.run([sys.executable, BENCH, '--quick', '--filter', 'evalEnum_matcher'] + list(args), cwd=PKGDIR,
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+
+
+class TestBenchmarks(TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.baseline = os.path.join(self.tmp.name, 'baseline.json')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def writeBaseline(self, seconds):
+        with open(self.baseline, 'w') as f:
+            json.dump({'results': {'evalEnum_matcher1000': {'seconds': seconds, 'values': 1, 'number': 1}}}, f)
+
+    def test_results(self):
+        output = os.path.join(self.tmp.name, 'results.json')
+        proc = runBench('--baseline', self.baseline, '--save-baseline', '--output', output)
+        self.assertEqual(proc.returncode, 0, proc.stderr)
+        with open(output) as f:
+            results = json.load(f)
+        self.assertGreater(results['results']['evalEnum_matcher1000']['seconds'], 0)
+        self.assertNotIn('evalListNumberAsc_1000', results['results'])
+        with open(self.baseline) as f:
+            self.assertEqual(json.load(f), results)
+
+    def test_regression(self):
+        self.writeBaseline(1e-12)
+        proc = runBench('--baseline', self.baseline)
+        self.assertEqual(proc.returncode, 1)
+        self.assertIn("REGRESSION evalEnum_matcher1000", proc.stdout)
+
+    def test_noRegression(self):
+        self.writeBaseline(10.0)
+        proc = runBench('--baseline', self.baseline, '--threshold', '0.1')
+        self.assertEqual(proc.returncode, 0, proc.stdout)
+        self.assertIn("OK no regressions above 10%", proc.stdout)
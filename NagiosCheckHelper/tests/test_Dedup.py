@@ -0,0 +1,94 @@
+from unittest import TestCase, skipUnless
+
+from NagiosCheckHelper import NagErrors, NagEval, NagBands, NagRange
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class TestDedup(TestCase):
+
+    def test_listEnum(self):
+        values = ["ONLINE"] * 2000 + ["DEGRADED"] * 37 + ["FAULTED", "SPARE"]
+        eo = NagErrors()
+        neval = NagEval(eo)
+        result = neval.evalListEnum(values, okValues=["ONLINE"], warningValues=["DEGRADED"], criticalValues=["FAULTED"], dedup=True)
+        self.assertEqual(result, "UNKNOWN")
+        self.assertEqual(eo.warning, ["value is DEGRADED (x37)"])
+        self.assertEqual(eo.critical, ["value is FAULTED"])
+        self.assertEqual(eo.unknown, ["value SPARE not found"])
+
+        plain = NagEval(NagErrors()).evalListEnum(values, okValues=["ONLINE"], warningValues=["DEGRADED"], criticalValues=["FAULTED"])
+        self.assertEqual(result, plain)
+
+    def test_listEnumPostfix(self):
+        eo = NagErrors()
+        NagEval(eo).evalListEnum(iter(["DEGRADED", "ONLINE", "DEGRADED"]), okValues=["ONLINE"], warningValues=["DEGRADED"],
+                                 prefixText="disk ", postfixText=" on nas1", dedup=True)
+        self.assertEqual(eo.warning, ["disk value is DEGRADED on nas1 (x2)"])
+
+    def test_listNumber(self):
+        values = [10, 95, 10, 99, 95, 95, 10]
+        eo = NagErrors()
+        neval = NagEval(eo)
+        self.assertEqual(neval.evalListNumberAsc(values, warningAbove=90, criticalAbove=98, numberUnits="%", dedup=True), "CRITICAL")
+        self.assertEqual(eo.warning, ["95% is > 90% (x3)"])
+        self.assertEqual(eo.critical, ["99% is > 98%"])
+
+        eo = NagErrors()
+        self.assertEqual(NagEval(eo).evalListNumberDesc(values, warningBelow=20, dedup=True), "WARNING")
+        self.assertEqual(eo.warning, ["10 is < 20 (x3)"])
+
+        eo = NagErrors()
+        self.assertEqual(NagEval(eo).evalListRange(values, warningRange=NagRange("50"), dedup=True), "WARNING")
+        self.assertEqual(eo.warning, ["95 is outside 50 (x3)", "99 is outside 50"])
+
+    @skipUnless(numpy is not None, "numpy is not installed")
+    def test_listNumberVector(self):
+        arr = numpy.array([5] * 500 + [7] * 300 + [1] * 200)
+        eo = NagErrors()
+        self.assertEqual(NagEval(eo).evalListNumberAsc(arr, warningAbove=4, criticalAbove=6, dedup=True), "CRITICAL")
+        self.assertEqual(eo.warning, ["5 is > 4 (x500)"])
+        self.assertEqual(eo.critical, ["7 is > 6 (x300)"])
+
+    def test_listNumberPerfAggregate(self):
+        eo = NagErrors()
+        values = [5] * 500 + [7] * 300 + [1] * 200
+        self.assertEqual(NagEval(eo).evalListNumberAsc(values, warningAbove=4, perfLabel="load", perfAggregate="max", dedup=True), "WARNING")
+        self.assertEqual(eo.warning, ["5 is > 4 (x500)", "7 is > 4 (x300)"])
+        self.assertEqual(eo.renderPerfData(), "'load'=7;4")
+
+    def test_listBands(self):
+        bands = NagBands([10, 20], ["OK", "WARNING", "CRITICAL"])
+        eo = NagErrors()
+        self.assertEqual(NagEval(eo).evalListBands([15, 15, 25, 5], bands, dedup=True), "CRITICAL")
+        self.assertEqual(len(eo.warning), 1)
+        self.assertTrue(eo.warning[0].endswith(" (x2)"))
+        self.assertEqual(len(eo.critical), 1)
+
+    def test_empty(self):
+        eo = NagErrors()
+        self.assertEqual(NagEval(eo).evalListEnum(iter([]), okValues=["ONLINE"], dedup=True), "UNKNOWN")
+        self.assertEqual(eo.unknown, ["list is Empty"])
+        self.assertEqual(NagEval(eo).evalListNumberAsc([], warningAbove=1, dedup=True), "UNKNOWN")
+
+    def test_shortCircuit(self):
+        eo = NagErrors()
+        neval = NagEval(eo)
+        self.assertEqual(neval.evalListNumberAsc([99, 99, 1, 50], warningAbove=40, criticalAbove=90, shortCircuit=True, dedup=True), "CRITICAL")
+        self.assertEqual(eo.critical, ["99 is > 90 (x2)"])
+        self.assertEqual(eo.warning, [])
+        self.assertEqual(neval.lastSkipped, 2)
+
+    def test_unhashable(self):
+        eo = NagErrors()
+        neval = NagEval(eo)
+        self.assertEqual(neval.evalListEnum([['a'], ['b'], ['b']], okValues=[['a']], warningValues=[['b']], dedup=True), "WARNING")
+        self.assertEqual(eo.warning, ["value is ['b']", "value is ['b']"])
+
+        eo = NagErrors()
+        values = iter([['a'], ['c']])
+        self.assertEqual(NagEval(eo).evalListEnum(values, okValues=[['a']], dedup=True), "UNKNOWN")
+        self.assertEqual(eo.unknown, ["value ['c'] not found"])
@@ -0,0 +1,58 @@
+import os
+import subprocess
+import sys
+import tempfile
+from unittest import TestCase, skipIf
+
+PKGDIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Optional cumulative import time budget in microseconds, as reported by python -X importtime with
+# warm bytecode. Wall clock timings vary too much between machines for a fixed default, so the
+# budget test only runs when it is set; benchmarks/bench.py compares the import time with a baseline
+IMPORT_BUDGET_US = os.environ.get('NAGIOSCHECKHELPER_IMPORT_BUDGET_US')
+
+
+def importTime(module, env=None):
+    '''
+    Measure the cold import time of a module in a fresh interpreter
+
+    Args:
+        module (str): Module to import
+        env (dict): Environment of the interpreter, defaults to os.environ
+
+    Returns:
+        (int, list of str's): Cumulative import time in microseconds, modules imported
+    '''
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import sys, {}; print(" ".join(sys.modules))'.format(module)],
+                          cwd=PKGDIR, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, check=True)
+    cumulative = None
+    for line in proc.stderr.splitlines():
+        fields = line.split('|')
+        if len(fields) == 3 and fields[2].strip() == module:
+            cumulative = int(fields[1])
+    return cumulative, proc.stdout.split()
+
+
+@skipIf(sys.version_info < (3, 7), "-X importtime requires python 3.7")
+class TestImportTime(TestCase):
+
+    def test_noHeavyImports(self):
+        cumulative, modules = importTime('NagiosCheckHelper')
+        for heavy in ('click', 'numpy', 'asyncio', 'concurrent.futures', 'socket', 'threading'):
+            self.assertNotIn(heavy, modules)
+
+    def test_listDoesNotImportNumpy(self):
+        script = ('import sys; from NagiosCheckHelper import NagErrors, NagEval; '
+                  'NagEval(NagErrors()).evalListNumberAsc(list(range(1000)), warningAbove=2000); print("numpy" in sys.modules)')
+        proc = subprocess.run([sys.executable, '-c', script], cwd=PKGDIR, stdout=subprocess.PIPE, universal_newlines=True, check=True)
+        self.assertEqual(proc.stdout.strip(), "False")
+
+    @skipIf(IMPORT_BUDGET_US is None, "NAGIOSCHECKHELPER_IMPORT_BUDGET_US is not set")
+    def test_importBudget(self):
+        # compiling the sources would dominate, so the bytecode is written to a private cache and
+        # warmed up first, even if PYTHONDONTWRITEBYTECODE is set or __pycache__ is stale
+        with tempfile.TemporaryDirectory() as pycache:
+            env = dict(os.environ, PYTHONPYCACHEPREFIX=pycache)
+            env.pop('PYTHONDONTWRITEBYTECODE', None)
+            importTime('NagiosCheckHelper', env)
+            best = min([importTime('NagiosCheckHelper', env)[0] for _ in range(5)])
+        self.assertLess(best, int(IMPORT_BUDGET_US), "import NagiosCheckHelper took {}us".format(best))
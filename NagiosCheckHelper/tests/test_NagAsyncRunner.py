@@ -0,0 +1,64 @@
+import asyncio
+import time
+from unittest import TestCase
+
+from NagiosCheckHelper import NagErrors
+from NagiosCheckHelper.runner import NagAsyncRunner
+
+class TestNagAsyncRunner(TestCase):
+
+    def test_concurrent(self):
+        state = {'running': 0, 'peak': 0}
+
+        async def probe(value):
+            state['running'] += 1
+            state['peak'] = max(state['peak'], state['running'])
+            await asyncio.sleep(0.05)
+            state['running'] -= 1
+            return value
+
+        eo = NagErrors()
+        runner = NagAsyncRunner(eo, concurrency=4)
+        for i in range(8):
+            runner.addProbe('probe{}'.format(i), probe, lambda neval, result: neval.evalNumberAsc(result, warningAbove=5, prefixText="probe "), args=(i,))
+        start = time.monotonic()
+        results = runner.run()
+        self.assertLess(time.monotonic() - start, 0.35)
+        self.assertEqual(state['peak'], 4)
+        self.assertEqual(results['probe7'], 7)
+        self.assertEqual(eo.warning, ["probe 6 is > 5", "probe 7 is > 5"])
+        self.assertEqual(eo.getExitCode(), 1)
+
+    def test_timeout(self):
+        async def slow():
+            await asyncio.sleep(5)
+
+        async def fast():
+            return 1
+
+        eo = NagErrors()
+        runner = NagAsyncRunner(eo, timeout=0.05)
+        runner.addProbe('slow', slow, lambda neval, result: neval.evalNumberAsc(result, warningAbove=0))
+        runner.addProbe('fast', fast, lambda neval, result: neval.evalNumberAsc(result, warningAbove=0))
+        results = runner.run()
+        self.assertEqual(results, {'slow': None, 'fast': 1})
+        self.assertEqual(eo.unknown, ["slow timed out after 0.05s"])
+        self.assertEqual(eo.warning, ["1 is > 0"])
+        self.assertEqual(eo.getExitCode(), 3)
+
+    def test_failures(self):
+        async def broken():
+            raise ValueError("connection refused")
+
+        async def ok():
+            return "x"
+
+        def badEval(neval, result):
+            raise KeyError("missing")
+
+        eo = NagErrors()
+        runner = NagAsyncRunner(eo)
+        runner.addProbe('broken', broken)
+        runner.addProbe('ok', ok, badEval)
+        runner.run()
+        self.assertEqual(eo.unknown, ["broken failed: connection refused", "ok evaluation failed: 'missing'"])
@@ -0,0 +1,144 @@
+import os
+import pickle
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from unittest import TestCase
+
+from NagiosCheckHelper import NagErrors, NagEval
+from NagiosCheckHelper.cache import NagCache
+
+
+class TestNagCache(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.calls = []
+        self.delay = 0
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def probe(self, value):
+        self.calls.append(value)
+        time.sleep(self.delay)
+        return {'value': value}
+
+    def test_fresh(self):
+        cache = NagCache(self.tmpdir.name, ttl=60)
+        e1 = cache.get('zpool', self.probe, ('tank',))
+        e2 = cache.get('zpool', self.probe, ('tank',))
+        e3 = cache.get('zpool', self.probe, ('other',))
+        self.assertEqual(e1.value, {'value': 'tank'})
+        self.assertEqual(e2.value, {'value': 'tank'})
+        self.assertEqual(e3.value, {'value': 'other'})
+        self.assertFalse(e2.stale)
+        self.assertLess(e2.age, 5)
+        self.assertEqual(self.calls, ['tank', 'other'])
+
+    def test_expired(self):
+        cache = NagCache(self.tmpdir.name, ttl=0)
+        cache.get('zpool', self.probe, ('tank',))
+        cache.get('zpool', self.probe, ('tank',))
+        self.assertEqual(self.calls, ['tank', 'tank'])
+
+    def test_staleWhileRevalidate(self):
+        cache = NagCache(self.tmpdir.name, ttl=0.1)
+        cache.get('zpool', self.probe, ('tank',))
+        time.sleep(0.15)
+        self.delay = 0.5
+        refresher = threading.Thread(target=cache.get, args=('zpool', self.probe, ('tank',)))
+        refresher.start()
+        while len(self.calls) < 2:
+            time.sleep(0.01)
+        entry = cache.get('zpool', self.probe, ('tank',))
+        self.assertTrue(entry.stale)
+        refresher.join()
+        self.assertEqual(len(self.calls), 2)
+
+    def test_singleFlight(self):
+        cache = NagCache(self.tmpdir.name, ttl=60, staleTtl=0)
+        results = []
+        self.delay = 0.2
+        threads = [threading.Thread(target=lambda: results.append(cache.get('zpool', self.probe, ('tank',)))) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual([r.value for r in results], [{'value': 'tank'}] * 4)
+
+    def test_evict(self):
+        cache = NagCache(self.tmpdir.name, ttl=60, maxBytes=300)
+        for i in range(10):
+            cache.get('blob', lambda i: 'x' * 100, (i,))
+        files = [f for f in os.listdir(self.tmpdir.name) if f.endswith('.cache')]
+        self.assertLessEqual(sum([os.path.getsize(os.path.join(self.tmpdir.name, f)) for f in files]), 300)
+        self.assertTrue(os.path.exists(cache.path('blob', (9,))))
+        locks = [f for f in os.listdir(self.tmpdir.name) if f.endswith('.lock')]
+        self.assertEqual(sorted(locks), sorted([f + '.lock' for f in files]))
+
+    def test_lockFileRemoved(self):
+        cache = NagCache(self.tmpdir.name, ttl=60)
+        path = cache.path('probe')
+        holder = cache._lock(path, blocking=False)
+        locked = threading.Event()
+        release = threading.Event()
+
+        def wait():
+            fd = cache._lock(path, blocking=True)
+            locked.set()
+            release.wait(5)
+            cache._unlock(fd)
+
+        waiter = threading.Thread(target=wait)
+        waiter.start()
+        time.sleep(0.1)
+        # what evict() does while a refresh waits for the lock
+        os.unlink(path + '.lock')
+        cache._unlock(holder)
+        self.assertTrue(locked.wait(5))
+        self.assertIsNone(cache._lock(path, blocking=False))
+        release.set()
+        waiter.join()
+        fd = cache._lock(path, blocking=False)
+        self.assertIsNotNone(fd)
+        cache._unlock(fd)
+
+    def test_unloadableEntry(self):
+        cache = NagCache(self.tmpdir.name, ttl=60)
+        path = cache.path('probe')
+        # an entry pickled by an older version of a probe, whose class no longer exists
+        with open(path, 'wb') as f:
+            f.write(pickle.dumps((time.time(), OrderedDict()), 0).replace(b'collections', b'gone_module'))
+        self.assertEqual(cache.get('probe', lambda: 'fresh').value, 'fresh')
+        with open(path, 'wb') as f:
+            pickle.dump((time.time(), 1, 2), f)
+        self.assertEqual(cache.get('probe', lambda: 'fresh again').value, 'fresh again')
+        self.assertEqual(cache.get('probe', lambda: 'unused').value, 'fresh again')
+
+    def test_evalDataAge(self):
+        eo = NagErrors()
+        ev = NagEval(eo)
+        self.assertEqual(ev.evalDataAge(10, 60), "OK")
+        self.assertEqual(ev.evalDataAge(125.4, 60, prefixText="zpool "), "UNKNOWN")
+        self.assertEqual(eo.unknown, ["zpool data is 125s old, older than 60s"])
+
+    def test_privateDirectory(self):
+        path = os.path.join(self.tmpdir.name, 'probes')
+        NagCache(path)
+        self.assertEqual(os.stat(path).st_mode & 0o777, 0o700)
+
+        os.chmod(path, 0o777)
+        with self.assertRaises(PermissionError):
+            NagCache(path)
+        os.chmod(path, 0o750)
+        with self.assertRaises(PermissionError):
+            NagCache(path)
+
+        link = os.path.join(self.tmpdir.name, 'link')
+        os.chmod(path, 0o700)
+        os.symlink(path, link)
+        with self.assertRaises(PermissionError):
+            NagCache(link)
@@ -0,0 +1,176 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+from unittest import TestCase
+
+from NagiosCheckHelper import NagErrors
+from NagiosCheckHelper.deadline import NagDeadline
+from NagiosCheckHelper.graph import NagCheckGraph
+
+PKGDIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+HANGING_GRAPH = '''
+import time
+from NagiosCheckHelper import NagErrors
+from NagiosCheckHelper.deadline import NagDeadline
+from NagiosCheckHelper.graph import NagCheckGraph
+nerr = NagErrors()
+graph = NagCheckGraph(nerr, deadline=NagDeadline(nerr, 0.3, alarm=False))
+graph.add("api", lambda neval: time.sleep(5))
+graph.run()
+nerr.printStatus()
+nerr.doExit()
+'''
+
+
+def value(v, warningAbove=None, criticalAbove=None, prefixText=""):
+    def check(neval):
+        neval.evalNumberAsc(v, warningAbove=warningAbove, criticalAbove=criticalAbove, prefixText=prefixText)
+        return v
+    return check
+
+
+class TestNagCheckGraph(TestCase):
+
+    def test_dependencies(self):
+        order = []
+
+        def record(name, v):
+            def check(neval):
+                order.append(name)
+                return v
+            return check
+
+        eo = NagErrors()
+        graph = NagCheckGraph(eo)
+        graph.add("ping", record("ping", 1))
+        graph.add("auth", record("auth", "token"), after=["ping"])
+        graph.add("volumes", lambda neval: graph.results["auth"] + "/volumes", after=["auth"])
+        graph.add("disks", record("disks", 3), after=["ping"])
+        self.assertEqual(graph.run(), "OK")
+        self.assertEqual(order[0], "ping")
+        self.assertEqual(graph.results["volumes"], "token/volumes")
+        self.assertEqual(graph.statuses, {"ping": "OK", "auth": "OK", "volumes": "OK", "disks": "OK"})
+        self.assertEqual(graph.skipped, [])
+
+    def test_parallel(self):
+        barrier = threading.Barrier(3, timeout=2)
+
+        def check(neval):
+            barrier.wait()
+            return True
+
+        graph = NagCheckGraph(NagErrors(), workers=3)
+        for i in range(3):
+            graph.add("branch{}".format(i), check)
+        self.assertEqual(graph.run(), "OK")
+        self.assertEqual(graph.results, {"branch0": True, "branch1": True, "branch2": True})
+
+    def test_skipDependents(self):
+        calls = []
+
+        def slow(neval):
+            calls.append("slow")
+            time.sleep(5)
+
+        eo = NagErrors()
+        graph = NagCheckGraph(eo)
+        graph.add("ping", value(1, criticalAbove=0, prefixText="host down "))
+        graph.add("auth", slow, after=["ping"])
+        graph.add("volumes", slow, after=["auth"])
+        graph.add("pools", slow, after=["ping"])
+        graph.add("local", value(5, warningAbove=4, prefixText="local "))
+        start = time.monotonic()
+        self.assertEqual(graph.run(), "UNKNOWN")
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertEqual(calls, [])
+        self.assertEqual(graph.skipped, ["auth", "volumes", "pools"])
+        self.assertEqual(eo.critical, ["host down 1 is > 0"])
+        self.assertEqual(eo.warning, ["local 5 is > 4"])
+        self.assertEqual(eo.unknown, ["ping failed, skipped 3 dependent checks: auth, volumes, pools"])
+
+    def test_failStatus(self):
+        eo = NagErrors()
+        graph = NagCheckGraph(eo)
+        graph.add("api", value(5, warningAbove=4), failStatus="WARNING")
+        graph.add("data", value(1), after=["api"])
+        graph.add("cache", value(5, warningAbove=4))
+        graph.add("stats", value(1), after=["cache"])
+        self.assertEqual(graph.run(), "UNKNOWN")
+        self.assertEqual(graph.skipped, ["data"])
+        self.assertEqual(graph.statuses["stats"], "OK")
+        self.assertEqual(eo.unknown, ["api failed, skipped 1 dependent check: data"])
+
+    def test_exception(self):
+        def broken(neval):
+            raise RuntimeError("401 unauthorized")
+
+        eo = NagErrors()
+        graph = NagCheckGraph(eo)
+        graph.add("auth", broken, failStatus="UNKNOWN")
+        graph.add("volumes", value(1), after=["auth"])
+        self.assertEqual(graph.run(), "UNKNOWN")
+        self.assertEqual(eo.unknown, ["auth failed: 401 unauthorized", "auth failed, skipped 1 dependent check: volumes"])
+        self.assertIsNone(graph.results["auth"])
+
+    def test_exit(self):
+        def doExit(neval):
+            neval.errObj.addCritical("pool degraded")
+            neval.errObj.doExit()
+
+        for deadline in (None, 5):
+            eo = NagErrors()
+            graph = NagCheckGraph(eo, deadline=NagDeadline(eo, deadline, alarm=False) if deadline else None)
+            graph.add("legacy", lambda neval: sys.exit(2))
+            graph.add("pool", doExit)
+            graph.add("volumes", value(1), after=["legacy"])
+            graph.add("fast", value(1))
+            ret = []
+            # run in a thread, so a regression fails the test instead of hanging it
+            runner = threading.Thread(target=lambda: ret.append(graph.run()), daemon=True)
+            runner.start()
+            runner.join(5)
+            self.assertEqual(ret, ["UNKNOWN"])
+            self.assertEqual(graph.statuses, {"legacy": "UNKNOWN", "pool": "UNKNOWN", "fast": "OK"})
+            self.assertEqual(eo.critical, ["pool degraded"])
+            self.assertCountEqual(eo.unknown[:2], ["legacy exited", "pool exited"])
+            self.assertEqual(eo.unknown[2:], ["legacy failed, skipped 1 dependent check: volumes"])
+
+    def test_add(self):
+        graph = NagCheckGraph(NagErrors())
+        graph.add("a", value(1))
+        with self.assertRaises(ValueError):
+            graph.add("a", value(1))
+        with self.assertRaises(ValueError):
+            graph.add("b", value(1), after=["c"])
+
+    def test_deadline(self):
+        release = threading.Event()
+
+        def hang(neval):
+            release.wait(5)
+
+        eo = NagErrors()
+        deadline = NagDeadline(eo, 0.2, alarm=False)
+        graph = NagCheckGraph(eo, deadline=deadline)
+        graph.add("fast", value(1))
+        graph.add("api", hang)
+        graph.add("volumes", value(1), after=["api"])
+        start = time.monotonic()
+        self.assertEqual(graph.run(), "UNKNOWN")
+        release.set()
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertEqual(graph.statuses, {"fast": "OK"})
+        self.assertEqual(deadline.tasks, [])
+        self.assertEqual(eo.unknown, ["api did not finish within the deadline of 0.2s",
+                                      "deadline of 0.2s reached, skipped 1 check: volumes"])
+
+    def test_deadlineExit(self):
+        start = time.monotonic()
+        proc = subprocess.run([sys.executable, '-c', HANGING_GRAPH], cwd=PKGDIR, stdout=subprocess.PIPE,
+                              universal_newlines=True, timeout=20)
+        self.assertLess(time.monotonic() - start, 2)
+        self.assertEqual(proc.returncode, 3)
+        self.assertIn("api did not finish within the deadline of 0.3s", proc.stdout)
@@ -0,0 +1,80 @@
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from unittest import TestCase
+
+from NagiosCheckHelper import NagEval
+from NagiosCheckHelper.client import runCheck
+from NagiosCheckHelper.daemon import NagCheckServer
+
+PKGDIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def checkLoad(nerr, argv):
+    NagEval(nerr).evalNumberAsc(float(argv[0]), warningAbove=1, criticalAbove=2, prefixText="load ")
+
+
+def checkPrints(nerr, argv):
+    nerr.addWarning("printed")
+    nerr.printStatus()
+    nerr.doExit()
+
+
+def checkCrash(nerr, argv):
+    raise RuntimeError("boom")
+
+
+class TestNagCheckServer(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.socketPath = os.path.join(self.tmpdir.name, 'check.sock')
+        self.server = NagCheckServer(self.socketPath, {'load': checkLoad, 'prints': checkPrints, 'crash': checkCrash})
+        self.server.addCheck('load2', 'NagiosCheckHelper.tests.test_NagCheckServer:checkLoad')
+        self.thread = threading.Thread(target=self.server.serveForever)
+        self.thread.start()
+        for _ in range(100):
+            if os.path.exists(self.socketPath):
+                break
+            time.sleep(0.01)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.thread.join()
+        self.tmpdir.cleanup()
+
+    def test_runCheck(self):
+        self.assertEqual(runCheck(self.socketPath, 'load', ['0.5']), ("OK\n", 0))
+        self.assertEqual(runCheck(self.socketPath, 'load2', ['1.5']), ("WARNING load 1.5 is > 1\r\n\n", 1))
+        self.assertEqual(runCheck(self.socketPath, 'load', ['3']), ("CRITICAL load 3.0 is > 2\r\n\n", 2))
+
+    def test_freshErrors(self):
+        runCheck(self.socketPath, 'load', ['3'])
+        self.assertEqual(runCheck(self.socketPath, 'load', ['0']), ("OK\n", 0))
+
+    def test_printStatus(self):
+        self.assertEqual(runCheck(self.socketPath, 'prints', []), ("WARNING printed\r\n\n", 1))
+
+    def test_crash(self):
+        output, code = runCheck(self.socketPath, 'crash', [])
+        self.assertEqual(code, 3)
+        self.assertEqual(output, "UNKNOWN check crash failed: RuntimeError: boom\r\n\n")
+        self.assertEqual(runCheck(self.socketPath, 'load', ['0']), ("OK\n", 0))
+
+    def test_unknownCheck(self):
+        self.assertEqual(runCheck(self.socketPath, 'nope', []), ("UNKNOWN unknown check nope\r\n\n", 3))
+
+    def test_client(self):
+        proc = subprocess.run([sys.executable, '-m', 'NagiosCheckHelper.client', '-s', self.socketPath, 'load', '1.5'],
+                              cwd=PKGDIR, stdout=subprocess.PIPE, universal_newlines=True)
+        self.assertEqual(proc.returncode, 1)
+        self.assertEqual(proc.stdout, "WARNING load 1.5 is > 1\n\n")
+
+    def test_clientNoServer(self):
+        proc = subprocess.run([sys.executable, '-m', 'NagiosCheckHelper.client', '-s', self.socketPath + '.missing', 'load'],
+                              cwd=PKGDIR, stdout=subprocess.PIPE, universal_newlines=True)
+        self.assertEqual(proc.returncode, 3)
+        self.assertTrue(proc.stdout.startswith("UNKNOWN check server"))
@@ -0,0 +1,158 @@
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from unittest import TestCase, skipUnless
+
+from NagiosCheckHelper import NagErrors, NagEval
+from NagiosCheckHelper.deadline import NagDeadline
+from NagiosCheckHelper.runner import NagAsyncRunner
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+PKGDIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+HANGING_CHECK = '''
+import time
+from NagiosCheckHelper import NagErrors, NagEval
+from NagiosCheckHelper.deadline import NagDeadline
+nerr = NagErrors()
+neval = NagEval(nerr)
+with NagDeadline(nerr, 0.2, grace=0.1) as deadline:
+    neval.evalNumberAsc(95, warningAbove=90, prefixText="cpu ")
+    with deadline.task("api"):
+        time.sleep(30)
+nerr.printStatus()
+nerr.doExit()
+'''
+
+
+class TestNagDeadline(TestCase):
+
+    def test_remaining(self):
+        deadline = NagDeadline(NagErrors(), 10, alarm=False)
+        self.assertFalse(deadline.expired())
+        self.assertGreater(deadline.remaining(), 9)
+        self.assertEqual(deadline.timeout(2), 2)
+        self.assertGreater(deadline.timeout(), 9)
+        self.assertLessEqual(deadline.timeout(60), 10)
+
+    def test_check(self):
+        eo = NagErrors()
+        self.assertTrue(NagDeadline(eo, 10, alarm=False).check("disks"))
+        self.assertFalse(NagDeadline(eo, 0, alarm=False).check("disks"))
+        self.assertEqual(eo.unknown, ["disks skipped, deadline of 0s reached"])
+        self.assertEqual(NagDeadline(eo, 0, alarm=False).remaining(), 0.0)
+
+    def test_listStopsAtDeadline(self):
+        eo = NagErrors()
+        neval = NagEval(eo, NagDeadline(eo, 0, alarm=False))
+        self.assertEqual(neval.evalListNumberAsc(iter(range(1000)), warningAbove=990), "UNKNOWN")
+        self.assertEqual(eo.unknown, ["deadline of 0s reached after 256 values"])
+        self.assertEqual(eo.warning, [])
+        self.assertIsNone(neval.lastSkipped)
+
+        eo = NagErrors()
+        neval = NagEval(eo, NagDeadline(eo, 0, alarm=False))
+        self.assertEqual(neval.evalListEnum(iter(["OK"] * 300), okValues=["OK"]), "UNKNOWN")
+        self.assertIsNone(neval.lastSkipped)
+
+    @skipUnless(numpy is not None, "numpy is not installed")
+    def test_vectorStopsAtDeadline(self):
+        eo = NagErrors()
+        neval = NagEval(eo, NagDeadline(eo, 0, alarm=False))
+        self.assertEqual(neval.evalListNumberAsc(list(range(1000)), warningAbove=990), "UNKNOWN")
+        self.assertEqual(eo.unknown, ["deadline of 0s reached after 0 values"])
+        self.assertEqual(eo.warning, [])
+        self.assertEqual(neval.lastSkipped, 1000)
+
+    def test_parallel(self):
+        eo = NagErrors()
+        neval = NagEval(eo, NagDeadline(eo, 0, alarm=False))
+        self.assertEqual(neval.evalListParallel(list(range(2000)), 'evalListNumberAsc', warningAbove=10), "UNKNOWN")
+        self.assertEqual(eo.unknown, ["deadline of 0s reached after 0 values"])
+        self.assertEqual(eo.warning, [])
+        self.assertEqual(neval.lastSkipped, 2000)
+
+        def slow(neval, value):
+            time.sleep(0.02)
+            return neval.evalNumberAsc(value, warningAbove=1000)
+
+        eo = NagErrors()
+        neval = NagEval(eo, NagDeadline(eo, 0.2, alarm=False))
+        start = time.monotonic()
+        self.assertEqual(neval.evalListParallel(list(range(400)), slow, workers=4, chunkSize=100), "UNKNOWN")
+        # 2s without the deadline
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertEqual(eo.unknown[-1], "deadline of 0.2s reached after 0 values")
+        self.assertEqual(neval.lastSkipped, 400)
+
+        eo = NagErrors()
+        neval = NagEval(eo, NagDeadline(eo, 60, alarm=False))
+        self.assertEqual(neval.evalListParallel(list(range(2000)), 'evalListNumberAsc', warningAbove=1998), "WARNING")
+        self.assertEqual(eo.warning, ["1999 is > 1998"])
+        self.assertEqual(neval.lastSkipped, 0)
+
+    def test_listWithinDeadline(self):
+        eo = NagErrors()
+        neval = NagEval(eo, NagDeadline(eo, 60, alarm=False))
+        self.assertEqual(neval.evalListNumberAsc(range(1000), warningAbove=998), "WARNING")
+        self.assertEqual(eo.warning, ["999 is > 998"])
+
+    def test_fire(self):
+        out = []
+        eo = NagErrors(output=out.append)
+        deadline = NagDeadline(eo, 5, alarm=False)
+        eo.addCritical("disk full")
+        with deadline.task("api"):
+            with self.assertRaises(SystemExit) as cm:
+                deadline.fire()
+        self.assertEqual(cm.exception.code, 3)
+        self.assertTrue(deadline.fired)
+        self.assertEqual(deadline.tasks, [])
+        self.assertIn("api did not finish within the deadline of 5s", out[0])
+        self.assertIn("disk full", out[0])
+
+    def test_cancel(self):
+        eo = NagErrors()
+        with NagDeadline(eo, 0.05, grace=0.05):
+            pass
+        time.sleep(0.15)
+        self.assertEqual(eo.getExitCode(), 0)
+
+    def test_alarm(self):
+        start = time.monotonic()
+        proc = subprocess.run([sys.executable, '-c', HANGING_CHECK], cwd=PKGDIR, stdout=subprocess.PIPE,
+                              universal_newlines=True, timeout=20)
+        self.assertLess(time.monotonic() - start, 10)
+        self.assertEqual(proc.returncode, 3)
+        self.assertIn("api did not finish within the deadline of 0.2s", proc.stdout)
+        self.assertIn("cpu 95 is > 90", proc.stdout)
+
+    def test_runner(self):
+        async def slow():
+            await asyncio.sleep(5)
+
+        async def fast():
+            return 1
+
+        eo = NagErrors()
+        deadline = NagDeadline(eo, 0.1, alarm=False)
+        runner = NagAsyncRunner(eo, timeout=10, deadline=deadline)
+        runner.addProbe('slow', slow)
+        runner.addProbe('fast', fast, lambda neval, result: neval.evalNumberAsc(result, warningAbove=0))
+        start = time.monotonic()
+        results = runner.run()
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertEqual(results, {'slow': None, 'fast': 1})
+        self.assertEqual(eo.unknown, ["slow did not finish within the deadline of 0.1s"])
+        self.assertEqual(eo.warning, ["1 is > 0"])
+
+        runner = NagAsyncRunner(eo, deadline=deadline)
+        runner.addProbe('late', fast)
+        runner.run()
+        self.assertEqual(eo.unknown[-1], "late skipped, deadline of 0.1s reached")
@@ -0,0 +1,62 @@
+from unittest import TestCase
+
+from NagiosCheckHelper import NagErrors, NagEval, NagEnumMatcher
+
+class TestNagEnumMatcher(TestCase):
+
+    def test_match(self):
+        m = NagEnumMatcher(okValues=['OKVal'], warningValues=['WarningVal'], criticalValues=['CriticalVal'], unknownValues=['UnknownVal'])
+        self.assertEqual(m.match('OKVal'), 'OK')
+        self.assertEqual(m.match('WarningVal'), 'WARNING')
+        self.assertEqual(m.match('CriticalVal'), 'CRITICAL')
+        self.assertEqual(m.match('UnknownVal'), 'UNKNOWN')
+        self.assertEqual(m.match('Junk'), None)
+
+    def test_precedence(self):
+        m = NagEnumMatcher(okValues=['a', 'b', 'c', 'd'], warningValues=['b', 'c', 'd'], criticalValues=['c', 'd'], unknownValues=['d'])
+        self.assertEqual(m.match('a'), 'OK')
+        self.assertEqual(m.match('b'), 'WARNING')
+        self.assertEqual(m.match('c'), 'CRITICAL')
+        self.assertEqual(m.match('d'), 'UNKNOWN')
+
+    def test_numbers(self):
+        m = NagEnumMatcher(okValues=[1], criticalValues=[2.0])
+        self.assertEqual(m.match(1.0), 'OK')
+        self.assertEqual(m.match(2), 'CRITICAL')
+
+    def test_unhashableValue(self):
+        m = NagEnumMatcher(okValues=[[1, 2]], warningValues=['a'])
+        self.assertEqual(m.statusMap, None)
+        self.assertEqual(m.match([1, 2]), 'OK')
+        self.assertEqual(m.match('a'), 'WARNING')
+        m = NagEnumMatcher(warningValues=['a'])
+        self.assertEqual(m.match([1, 2]), None)
+        self.assertEqual(m.match({'a': 1}), None)
+
+    def test_stringList(self):
+        m = NagEnumMatcher(okValues="ONLINE")
+        self.assertEqual(m.match("ON"), 'OK')
+
+
+class TestNagEval_matcher(TestCase):
+
+    def test_evalEnum(self):
+        m = NagEnumMatcher(okValues=['OKVal'], warningValues=['WarningVal'], criticalValues=['CriticalVal'], unknownValues=['UnknownVal'])
+        eo = NagErrors()
+        ev = NagEval(eo)
+        self.assertEqual(ev.evalEnum('OKVal', matcher=m), 'OK')
+        self.assertEqual(ev.evalEnum('WarningVal', matcher=m), 'WARNING')
+        self.assertEqual(ev.evalEnum('CriticalVal', matcher=m), 'CRITICAL')
+        self.assertEqual(ev.evalEnum('Junk', defaultStatus='WARNING', matcher=m), 'WARNING')
+        self.assertEqual(eo.warning, ["value is WarningVal", "value Junk not found"])
+        self.assertEqual(eo.critical, ["value is CriticalVal"])
+
+    def test_evalListEnum(self):
+        m = NagEnumMatcher(okValues=['OKVal'], warningValues=['WarningVal'], criticalValues=['CriticalVal'], unknownValues=['UnknownVal'])
+        eo = NagErrors()
+        ev = NagEval(eo)
+        ret = ev.evalListEnum(['OKVal', 'WarningVal', 'CriticalVal', 'WarningVal'], matcher=m, prefixText="disk ")
+        self.assertEqual(ret, 'CRITICAL')
+        self.assertEqual(eo.warning, ["disk value is WarningVal", "disk value is WarningVal"])
+        self.assertEqual(eo.critical, ["disk value is CriticalVal"])
+        self.assertEqual(ev.evalListEnum('UnknownVal', matcher=m), 'UNKNOWN')
@@ -1,6 +1,9 @@
+import io
+import json
+from contextlib import redirect_stdout
 from unittest import TestCase
 
-from NagiosCheckHelper import NagErrors
+from NagiosCheckHelper import NagErrors, NagEval, TEMPLATE_ABOVE
 
 class TestNagErrors(TestCase):
 
@@ -39,3 +42,154 @@ class TestNagErrors(TestCase):
         eo = NagErrors()
         self.assertEqual(eo.formatStatus('WARNING', ['String1']), "WARNING String1\r\n")
         self.assertEqual(eo.formatStatus('WARNING', ['String1', 'String2']), "WARNING:\r\n    String1\r\n    String2\r\n")
+
+    def test_addTemplateRecord(self):
+        eo = NagErrors()
+        eo.addTemplateRecord('warning', TEMPLATE_ABOVE, 45, 40, "sec", "Test ", " Units")
+        self.assertEqual(len(eo.warning), 1)
+        self.assertEqual(eo.warning[0], "Test 45sec is > 40sec Units")
+        self.assertEqual(eo.records['warning'][0].value, 45)
+        self.assertEqual(eo.records['warning'][0].threshold, 40)
+        self.assertEqual(eo.getExitCode(), 1)
+
+    def test_recordViews(self):
+        eo = NagErrors()
+        eo.addCritical('Critical Error')
+        eo.critical.append('Another Error')
+        eo.addRecord('junk', 'Unknown Error')
+        self.assertEqual(eo.critical, ['Critical Error', 'Another Error'])
+        self.assertEqual(eo.critical[1:], ['Another Error'])
+        self.assertEqual(list(eo.unknown), ['Unknown Error'])
+        eo.critical = []
+        self.assertEqual(len(eo.critical), 0)
+        self.assertEqual(eo.getExitCode(), 3)
+        self.assertEqual(eo.formatStatus('UNKNOWN', eo.unknown), "UNKNOWN Unknown Error\r\n")
+
+    def test_recordViewsList(self):
+        eo = NagErrors()
+        eo.addCritical('disk full')
+        eo.addWarning('load high')
+        self.assertEqual(eo.critical + eo.warning, ['disk full', 'load high'])
+        self.assertEqual(['x'] + eo.critical, ['x', 'disk full'])
+        eo.critical.extend(['a', 'b'])
+        eo.warning.extend(eo.warning)
+        self.assertEqual(eo.critical, ['disk full', 'a', 'b'])
+        self.assertEqual(eo.getCount('warning'), 2)
+        copy = eo.critical.copy()
+        copy.append('c')
+        self.assertEqual(len(eo.critical), 3)
+        self.assertIn('a', eo.critical)
+        self.assertEqual(eo.critical.index('b'), 2)
+        self.assertEqual(json.dumps(eo.critical.copy()), '["disk full", "a", "b"]')
+        self.assertFalse(eo.critical == None)
+        self.assertTrue(eo.critical != 5)
+        self.assertNotEqual(eo.critical, ['disk full'])
+
+    def test_recordViewsAppendCounts(self):
+        eo = NagErrors(maxRecords=2)
+        for i in range(5):
+            eo.addCritical("error {}".format(i))
+        eo.critical += ["late"]
+        self.assertEqual(eo.getCount('critical'), 6)
+        self.assertEqual(eo.critical, ["error 0", "error 1"])
+
+    def test_renderStatus(self):
+        eo = NagErrors()
+        self.assertEqual(eo.renderStatus(), "OK\n")
+        eo.addWarning('Warning 1')
+        eo.addWarning('Warning 2')
+        eo.addUnknown('Unknown 1')
+        self.assertEqual(eo.renderStatus(), "UNKNOWN Unknown 1\r\n\nWARNING:\r\n    Warning 1\r\n    Warning 2\r\n\n")
+
+    def test_renderStatus_maxBytes(self):
+        eo = NagErrors()
+        for i in range(1000):
+            eo.addWarning('Warning {}'.format(i))
+        for i in range(10):
+            eo.addCritical('Critical {}'.format(i))
+        out = eo.renderStatus(maxBytes=300)
+        self.assertLessEqual(len(out.encode('utf-8')), 300)
+        self.assertTrue(out.startswith("CRITICAL:\r\n    Critical 0\r\n"))
+        self.assertIn("    Critical 9\r\n\nWARNING:\r\n    Warning 0\r\n", out)
+        shown = out.count("    Warning ")
+        self.assertTrue(out.endswith("... and {} more\r\n\n".format(1000 - shown)))
+        self.assertEqual(eo.renderStatus(maxBytes=10**6), eo.renderStatus())
+
+    def test_renderStatus_tinyBudget(self):
+        eo = NagErrors()
+        eo.addCritical('x' * 100)
+        eo.addWarning('Warning')
+        out = eo.renderStatus(maxBytes=40)
+        self.assertLessEqual(len(out.encode('utf-8')), 40)
+        self.assertTrue(out.startswith("CRITICAL xxx"))
+        self.assertTrue(out.endswith("... and 1 more\r\n\n"))
+
+    def test_renderStatus_budgetBelowFirstRecord(self):
+        eo = NagErrors()
+        eo.addCritical('a' * 300)
+        self.assertEqual(eo.renderStatus(maxBytes=100), "CRITICAL " + "a" * 71 + "\r\n\n")
+        self.assertEqual(eo.renderStatus(maxBytes=16), "CRITICAL\n")
+        self.assertEqual(eo.renderStatus(maxBytes=27), "CRITICAL\r\n... and 1 more\r\n\n")
+        eo.addWarning('Warning')
+        eo.addWarning('Warning')
+        for maxBytes in range(9, 80):
+            out = eo.renderStatus(maxBytes=maxBytes)
+            self.assertLessEqual(len(out.encode('utf-8')), maxBytes)
+            self.assertTrue(out.startswith("CRITICAL"), out)
+            shown = 1 if out.startswith("CRITICAL a") else 0
+            if "more" in out:
+                self.assertTrue(out.endswith("... and {} more\r\n\n".format(3 - shown)), out)
+
+    def test_printStatus(self):
+        eo = NagErrors(outputLimit=60)
+        for i in range(100):
+            eo.addWarning('Warning {}'.format(i))
+        buf = io.StringIO()
+        with redirect_stdout(buf):
+            eo.printStatus()
+        self.assertEqual(buf.getvalue(), eo.renderStatus(60))
+
+    def test_maxRecords_first(self):
+        eo = NagErrors(maxRecords=3)
+        ev = NagEval(eo)
+        ev.evalListNumberAsc(list(range(100)), warningAbove=50, criticalAbove=90)
+        self.assertEqual(eo.getCount('critical'), 9)
+        self.assertEqual(eo.getCount('warning'), 40)
+        self.assertEqual(eo.critical, ["91 is > 90", "92 is > 90", "93 is > 90"])
+        self.assertEqual(len(eo.warning), 3)
+        self.assertEqual(eo.getExitCode(), 2)
+        self.assertEqual(eo.renderStatus(),
+            "CRITICAL:\r\n    91 is > 90\r\n    92 is > 90\r\n    93 is > 90\r\n    ... and 6 more\r\n\n"
+            "WARNING:\r\n    51 is > 50\r\n    52 is > 50\r\n    53 is > 50\r\n    ... and 37 more\r\n\n")
+
+    def test_maxRecords_worst(self):
+        eo = NagErrors(maxRecords=2, keepRecords='worst')
+        ev = NagEval(eo)
+        ev.evalListNumberDesc([5, 1, 7, 3, 1, 9, 20], warningBelow=10)
+        self.assertEqual(eo.getCount('warning'), 6)
+        self.assertEqual(eo.warning, ["1 is < 10", "1 is < 10"])
+        eo.addWarning("text records have no excess")
+        self.assertEqual(eo.getCount('warning'), 7)
+        self.assertEqual(len(eo.warning), 2)
+        eo.addCritical("first")
+        eo.addCritical("second")
+        eo.addCritical("third")
+        self.assertEqual(eo.critical, ["first", "second"])
+
+    def test_maxRecords_zero(self):
+        eo = NagErrors(maxRecords=0)
+        eo.addUnknown("Unknown")
+        self.assertEqual(len(eo.unknown), 0)
+        self.assertEqual(eo.getExitCode(), 3)
+        self.assertEqual(eo.renderStatus(), "UNKNOWN:\r\n    ... and 1 more\r\n\n")
+
+    def test_keepRecords_invalid(self):
+        with self.assertRaises(ValueError):
+            NagErrors(keepRecords='last')
+
+    def test_output(self):
+        written = []
+        eo = NagErrors(output=written.append)
+        eo.addWarning('Warning')
+        eo.printStatus()
+        self.assertEqual(written, ["WARNING Warning\r\n\n"])
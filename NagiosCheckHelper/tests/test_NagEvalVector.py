@@ -0,0 +1,102 @@
+import random
+from unittest import TestCase, skipUnless
+
+from NagiosCheckHelper import NagErrors, NagEval
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def scalarList(method, values, **kwargs):
+    eo = NagErrors()
+    ev = NagEval(eo)
+    ret = "OK"
+    rvals = {"OK": 0, "WARNING": 1, "CRITICAL": 2, "UNKNOWN": 3}
+    for value in values:
+        r = getattr(ev, method)(value, **kwargs)
+        if rvals[r] > rvals[ret]:
+            ret = r
+    return ret, eo
+
+
+@skipUnless(numpy is not None, "numpy is not installed")
+class TestNagEval_vectorParity(TestCase):
+
+    def assertParity(self, listMethod, scalarMethod, values, **kwargs):
+        eo = NagErrors()
+        ev = NagEval(eo)
+        ev.vectorMinSize = 1
+        ret = getattr(ev, listMethod)(values, **kwargs)
+        sret, seo = scalarList(scalarMethod, values, **kwargs)
+        self.assertEqual(ret, sret)
+        self.assertEqual(eo.critical, seo.critical)
+        self.assertEqual(eo.warning, seo.warning)
+        self.assertEqual(eo.unknown, seo.unknown)
+        self.assertEqual(eo.getExitCode(), seo.getExitCode())
+
+    def test_asc_ints(self):
+        rnd = random.Random(1)
+        values = [rnd.randint(-100, 100) for _ in range(2000)]
+        self.assertParity('evalListNumberAsc', 'evalNumberAsc', values, warningAbove=40, criticalAbove=80, numberUnits="%", prefixText="disk ", postfixText=" used")
+
+    def test_asc_mixed(self):
+        rnd = random.Random(2)
+        values = [rnd.randint(0, 100) if i % 2 else rnd.random() * 100 for i in range(2000)]
+        self.assertParity('evalListNumberAsc', 'evalNumberAsc', values, warningAbove=40.5, criticalAbove=80)
+
+    def test_asc_bigInts(self):
+        values = [2 ** 53 + 1, 0.5]
+        self.assertParity('evalListNumberAsc', 'evalNumberAsc', values, criticalAbove=2 ** 53)
+        ev = NagEval(NagErrors())
+        ev.vectorMinSize = 1
+        self.assertIsNone(ev._asVector(values))
+        self.assertIsNotNone(ev._asVector([2 ** 53 + 1, 1]))
+
+    def test_asc_swappedTresholds(self):
+        values = list(range(100))
+        self.assertParity('evalListNumberAsc', 'evalNumberAsc', values, warningAbove=50, criticalAbove=40)
+
+    def test_asc_singleThreshold(self):
+        values = list(range(100))
+        self.assertParity('evalListNumberAsc', 'evalNumberAsc', values, warningAbove=50)
+        self.assertParity('evalListNumberAsc', 'evalNumberAsc', values, criticalAbove=50)
+        self.assertParity('evalListNumberAsc', 'evalNumberAsc', values)
+
+    def test_desc_ints(self):
+        rnd = random.Random(3)
+        values = [rnd.randint(-100, 100) for _ in range(2000)]
+        self.assertParity('evalListNumberDesc', 'evalNumberDesc', values, warningBelow=-10, criticalBelow=-50, numberUnits="GB")
+
+    def test_desc_swappedTresholds(self):
+        values = list(range(100))
+        self.assertParity('evalListNumberDesc', 'evalNumberDesc', values, warningBelow=40, criticalBelow=50)
+
+    def test_ndarray(self):
+        rnd = numpy.random.default_rng(4)
+        values = rnd.normal(size=5000)
+        self.assertParity('evalListNumberAsc', 'evalNumberAsc', values, warningAbove=1.0, criticalAbove=2.0)
+        self.assertParity('evalListNumberDesc', 'evalNumberDesc', values.astype(numpy.float32), warningBelow=-1.0, criticalBelow=-2.0)
+        self.assertParity('evalListNumberAsc', 'evalNumberAsc', numpy.arange(-50, 50, dtype=numpy.int16), warningAbove=10, criticalAbove=20)
+
+    def test_ndarray_emptyList(self):
+        eo = NagErrors()
+        ev = NagEval(eo)
+        ev.evalListNumberAsc(numpy.array([]), emptyStatus="WARNING")
+        self.assertEqual(eo.warning[0], "list is Empty")
+
+    def test_nonNumeric_fallback(self):
+        eo = NagErrors()
+        ev = NagEval(eo)
+        ev.vectorMinSize = 1
+        ev.evalListNumberAsc(["b", "a"], warningAbove="a")
+        self.assertEqual(eo.warning, ["b is > a"])
+
+
+class TestNagEval_vectorDefaults(TestCase):
+
+    def test_shortList_scalar(self):
+        eo = NagErrors()
+        ev = NagEval(eo)
+        self.assertEqual(ev._asVector([1, 2, 3]), None)
@@ -0,0 +1,121 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+from unittest import TestCase
+
+from NagiosCheckHelper import NagErrors, NagEval
+from NagiosCheckHelper import instrument
+from NagiosCheckHelper.graph import NagCheckGraph
+
+PKGDIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+SCRIPT = '''
+from NagiosCheckHelper import NagErrors, NagEval
+nerr = NagErrors()
+NagEval(nerr).evalListNumberAsc([1, 2, 95], warningAbove=90)
+nerr.printStatus()
+'''
+
+
+class TestNagInstrument(TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.plain = NagEval.__dict__['evalListNumberAsc']
+
+    def tearDown(self):
+        instrument.disable()
+        self.tmp.cleanup()
+
+    def test_disabled(self):
+        self.assertIs(instrument.active(), None)
+        self.assertIs(NagEval.evalListNumberAsc, self.plain)
+
+    def test_counts(self):
+        inst = instrument.enable(traceMemory=False)
+        nerr = NagErrors()
+        ev = NagEval(nerr)
+        ev.evalListNumberAsc([1, 2, 95], warningAbove=90)
+        ev.evalListEnum((v for v in ["a", "b"]), okValues=["a", "b"])
+        ev.evalNumberDesc(value=5, warningBelow=1)
+        with inst.phase('probe'):
+            pass
+        report = inst.report()
+        self.assertEqual(report['evaluators']['evalListNumberAsc']['calls'], 1)
+        self.assertEqual(report['evaluators']['evalListNumberAsc']['values'], 3)
+        self.assertEqual(report['evaluators']['evalListEnum']['values'], 2)
+        self.assertNotIn('evalNumberAsc', report['evaluators'])
+        self.assertEqual(report['evaluators']['evalNumberDesc']['calls'], 1)
+        self.assertIn('probe', report['phases'])
+        self.assertEqual(report['peakMemory'], None)
+
+    def test_threads(self):
+        inst = instrument.enable(traceMemory=False)
+        nerr = NagErrors()
+        barrier = threading.Barrier(4, timeout=10)
+
+        def overlapping(count):
+            # every sub-check is inside its evaluator before any value is consumed
+            barrier.wait()
+            for value in range(count):
+                yield value
+
+        graph = NagCheckGraph(nerr)
+        for i in range(4):
+            graph.add("check{}".format(i), lambda neval: neval.evalListNumberAsc(overlapping(20), warningAbove=100))
+        graph.run()
+        barrier = threading.Barrier(8, timeout=10)
+        threads = [threading.Thread(target=NagEval(nerr).evalListEnum, args=(overlapping(500),), kwargs={'okValues': [v for v in range(500)]}) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        NagEval(nerr).evalListParallel(list(range(100)), 'evalListNumberAsc', workers=4, warningAbove=200)
+        report = inst.report()
+        self.assertEqual(report['evaluators']['evalListNumberAsc']['calls'], 4)
+        self.assertEqual(report['evaluators']['evalListNumberAsc']['values'], 80)
+        self.assertEqual(report['evaluators']['evalListEnum']['calls'], 8)
+        self.assertEqual(report['evaluators']['evalListEnum']['values'], 4000)
+        self.assertEqual(report['evaluators']['evalListParallel']['calls'], 1)
+        self.assertEqual(report['evaluators']['evalListParallel']['values'], 100)
+        self.assertNotIn('evalNumberAsc', report['evaluators'])
+        self.assertEqual(nerr.getExitCode(), 0)
+
+    def test_printStatus(self):
+        sidecar = os.path.join(self.tmp.name, "check.json")
+        profile = os.path.join(self.tmp.name, "check.prof")
+        instrument.enable(sidecarPath=sidecar, profilePath=profile)
+        printed = []
+        nerr = NagErrors(output=printed.append)
+        NagEval(nerr).evalListNumberAsc([1, 2, 95], warningAbove=90)
+        nerr.printStatus()
+        perf = printed[0].split(" | ")[1].split("\r\n")[0].split()
+        labels = [p.split("=")[0] for p in perf]
+        self.assertEqual(labels[:3], ["'nch_eval_calls'", "'nch_eval_values'", "'nch_eval_time'"])
+        self.assertIn("'nch_peak_memory'", labels)
+        with open(sidecar) as f:
+            report = json.load(f)
+        self.assertEqual(report['evaluators']['evalListNumberAsc']['values'], 3)
+        self.assertIn('render', report['phases'])
+        self.assertGreater(os.path.getsize(profile), 0)
+
+    def test_uninstall(self):
+        instrument.enable(traceMemory=False)
+        self.assertIsNot(NagEval.evalListNumberAsc, self.plain)
+        instrument.disable()
+        self.assertIs(NagEval.evalListNumberAsc, self.plain)
+        self.assertIs(instrument.active(), None)
+
+    def test_environment(self):
+        sidecar = os.path.join(self.tmp.name, "env.json")
+        env = dict(os.environ, NAGIOSCHECKHELPER_INSTRUMENT='1', NAGIOSCHECKHELPER_INSTRUMENT_SIDECAR=sidecar)
+        proc = subprocess.run([sys.executable, '-c', SCRIPT], cwd=PKGDIR, env=env, stdout=subprocess.PIPE, universal_newlines=True)
+        self.assertIn("'nch_eval_calls'=1", proc.stdout)
+        with open(sidecar) as f:
+            self.assertEqual(json.load(f)['evaluators']['evalListNumberAsc']['calls'], 1)
+
+    def test_environmentDisabled(self):
+        self.assertIs(instrument.enableFromEnvironment({}), None)
+        self.assertIs(instrument.enableFromEnvironment({'NAGIOSCHECKHELPER_INSTRUMENT': '0'}), None)
@@ -0,0 +1,117 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from NagiosCheckHelper import NagErrors, NagEval
+from NagiosCheckHelper.logscan import NagLogScanner
+
+PATTERNS = {'error': r'\bERROR\b', 'timeout': 'timed out$'}
+
+
+class TestNagLogScanner(TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.log = os.path.join(self.tmp.name, "app.log")
+        self.state = os.path.join(self.tmp.name, "app.state")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, text, mode='a', path=None):
+        with open(path or self.log, mode) as f:
+            f.write(text)
+
+    def scanner(self, **kwargs):
+        return NagLogScanner(self.log, self.state, PATTERNS, **kwargs)
+
+    def test_incremental(self):
+        self.write("ERROR old\n", 'w')
+        self.assertEqual(self.scanner().scan(), {'error': 0, 'timeout': 0})
+        self.write("INFO ok\nERROR a\nERROR request timed out\n")
+        sc = self.scanner()
+        self.assertEqual(sc.scan(), {'error': 2, 'timeout': 1})
+        self.assertEqual(sc.bytesRead, len("INFO ok\nERROR a\nERROR request timed out\n"))
+        self.assertEqual(sc.scan(), {'error': 0, 'timeout': 0})
+        self.assertEqual(sc.bytesRead, 0)
+
+    def test_fromStart(self):
+        self.write("ERROR old\nERRORS are not errors\n", 'w')
+        self.assertEqual(self.scanner(fromStart=True).scan(), {'error': 1, 'timeout': 0})
+
+    def test_partialLine(self):
+        self.write("", 'w')
+        sc = self.scanner()
+        sc.scan()
+        self.write("ERROR a\nERR")
+        self.assertEqual(sc.scan(), {'error': 1, 'timeout': 0})
+        self.write("OR b\n")
+        self.assertEqual(sc.scan(), {'error': 1, 'timeout': 0})
+
+    def test_smallChunks(self):
+        lines = ["line {} {}\n".format(i, "ERROR" if i % 3 == 0 else "ok") for i in range(1000)]
+        self.write("".join(lines), 'w')
+        self.assertEqual(self.scanner(chunkSize=64, fromStart=True).scan(), {'error': 334, 'timeout': 0})
+
+    def test_truncated(self):
+        self.write("x" * 100 + "\n", 'w')
+        sc = self.scanner()
+        sc.scan()
+        self.write("ERROR after truncate\n", 'w')
+        self.assertEqual(sc.scan(), {'error': 1, 'timeout': 0})
+
+    def test_rotated(self):
+        self.write("start\n", 'w')
+        sc = self.scanner()
+        sc.scan()
+        self.write("ERROR before rotate\nERROR unterminated")
+        os.rename(self.log, self.log + ".1")
+        self.write("ERROR after rotate\n", 'w')
+        self.assertEqual(sc.scan(), {'error': 3, 'timeout': 0})
+        self.assertEqual(sc.scan(), {'error': 0, 'timeout': 0})
+
+    def test_inlineFlags(self):
+        self.write("Error a\nerror b\nWARN x\nwarning y\nok\n", 'w')
+        patterns = {'warn': 'WARN', 'error': '(?i)error', 'warning': '(?i)^warning'}
+        sc = NagLogScanner(self.log, self.state, patterns, fromStart=True)
+        self.assertEqual(len(sc._searches), 1)
+        self.assertEqual(sc.scan(), {'warn': 1, 'error': 2, 'warning': 1})
+        # verbose patterns can't be scoped, they are searched alone
+        os.unlink(self.state)
+        patterns = {'warn': 'WARN', 'error': '(?x) err or  # verbose'}
+        sc = NagLogScanner(self.log, self.state, patterns, fromStart=True)
+        self.assertEqual(len(sc._searches), 2)
+        self.assertEqual(sc.scan(), {'warn': 1, 'error': 1})
+
+    def test_backreferences(self):
+        self.write("aa x\nbb y\nab z\n", 'w')
+        patterns = {'x': r'(x)', 'double': r'(\w)\1'}
+        sc = NagLogScanner(self.log, self.state, patterns, fromStart=True)
+        self.assertEqual(sc.scan(), {'x': 1, 'double': 2})
+
+
+class TestNagEval_evalLogScan(TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.log = os.path.join(self.tmp.name, "app.log")
+        with open(self.log, 'w') as f:
+            f.write("ERROR a\nERROR b\nop timed out\n")
+        self.sc = NagLogScanner(self.log, os.path.join(self.tmp.name, "state"), PATTERNS, fromStart=True)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_thresholds(self):
+        eo = NagErrors()
+        ret = NagEval(eo).evalLogScan(self.sc, warningAbove={'error': 1, 'timeout': 5}, criticalAbove={'timeout': 0}, perf=True)
+        self.assertEqual(ret, "CRITICAL")
+        self.assertEqual(eo.warning, ["error lines 2 is > 1"])
+        self.assertEqual(eo.critical, ["timeout lines 1 is > 0"])
+        self.assertEqual(eo.renderPerfData(), "'error'=2;1 'timeout'=1;5;0")
+
+    def test_missing(self):
+        os.unlink(self.log)
+        eo = NagErrors()
+        self.assertEqual(NagEval(eo).evalLogScan(self.sc, warningAbove=1), "UNKNOWN")
+        self.assertTrue(eo.unknown[0].startswith("log {} not readable".format(self.log)))
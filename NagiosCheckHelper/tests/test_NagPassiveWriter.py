@@ -0,0 +1,137 @@
+import os
+import tempfile
+import threading
+import time
+from unittest import TestCase
+
+from NagiosCheckHelper import NagErrors
+from NagiosCheckHelper.passive import NagPassiveWriter, formatPassiveResult
+
+
+class FifoReader(object):
+    '''
+    Stand-in for the Nagios command pipe: a FIFO with a reader thread collecting the lines
+    '''
+    def __init__(self, path, delay=0):
+        os.mkfifo(path)
+        self.path = path
+        self.delay = delay
+        self.data = b""
+        self.fd = os.open(path, os.O_RDONLY | os.O_NONBLOCK)
+        self.reads = 0
+
+    def start(self):
+        self.stop = False
+        self.thread = threading.Thread(target=self.run)
+        self.thread.start()
+
+    def run(self):
+        while True:
+            try:
+                chunk = os.read(self.fd, 4096)
+            except BlockingIOError:
+                chunk = None
+            if chunk:
+                self.data += chunk
+                self.reads += 1
+                time.sleep(self.delay)
+            elif self.stop:
+                return
+            else:
+                time.sleep(0.001)
+
+    def finish(self):
+        self.stop = True
+        self.thread.join()
+        os.close(self.fd)
+        return self.data.decode('utf-8').splitlines(True)
+
+
+class TestFormatPassiveResult(TestCase):
+
+    def test_service(self):
+        self.assertEqual(formatPassiveResult("web1", "disk /", 2, "CRITICAL:\r\n    a\r\n    b\r\n\n", 1700000000),
+                         "[1700000000] PROCESS_SERVICE_CHECK_RESULT;web1;disk /;2;CRITICAL:\\n    a\\n    b\n")
+
+    def test_host(self):
+        self.assertEqual(formatPassiveResult("web1", None, 0, "OK\n", 1700000000.5),
+                         "[1700000000] PROCESS_HOST_CHECK_RESULT;web1;0;OK\n")
+
+
+class TestNagPassiveWriter(TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.fifo = os.path.join(self.tmp.name, "nagios.cmd")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def results(self, writer, count):
+        for i in range(count):
+            nerr = NagErrors()
+            if i % 2:
+                nerr.addWarning("sub {} is slow".format(i))
+            writer.add("host", "sub{}".format(i), nerr, timestamp=1700000000)
+
+    def test_fifo(self):
+        reader = FifoReader(self.fifo)
+        reader.start()
+        with NagPassiveWriter(self.fifo) as writer:
+            self.results(writer, 3)
+        lines = reader.finish()
+        self.assertEqual(lines, ["[1700000000] PROCESS_SERVICE_CHECK_RESULT;host;sub0;0;OK\n",
+                                 "[1700000000] PROCESS_SERVICE_CHECK_RESULT;host;sub1;1;WARNING sub 1 is slow\n",
+                                 "[1700000000] PROCESS_SERVICE_CHECK_RESULT;host;sub2;0;OK\n"])
+        self.assertEqual(writer.pending, [])
+
+    def test_backPressure(self):
+        # more than a pipe holds, read slowly: flush has to wait for the reader
+        reader = FifoReader(self.fifo, delay=0.001)
+        writer = NagPassiveWriter(self.fifo, timeout=30)
+        self.results(writer, 3000)
+        reader.start()
+        self.assertEqual(writer.flush(), 3000)
+        lines = reader.finish()
+        self.assertEqual(len(lines), 3000)
+        self.assertEqual(lines[2999], "[1700000000] PROCESS_SERVICE_CHECK_RESULT;host;sub2999;1;WARNING sub 2999 is slow\n")
+        self.assertTrue(all(line.startswith("[1700000000] PROCESS_SERVICE_CHECK_RESULT;") for line in lines))
+
+    def test_stalled(self):
+        # nobody reads: whole batches are written until the pipe is full, the rest stays pending
+        reader = FifoReader(self.fifo)
+        writer = NagPassiveWriter(self.fifo, timeout=0.2)
+        self.results(writer, 5000)
+        written = writer.flush()
+        self.assertGreater(written, 0)
+        self.assertEqual(len(writer.pending), 5000 - written)
+        self.assertEqual(writer.pending[0][1], "sub{}".format(written))
+        reader.start()
+        writer.timeout = 30
+        self.assertEqual(writer.flush(), 5000 - written)
+        self.assertEqual(len(reader.finish()), 5000)
+
+    def test_noReader(self):
+        os.mkfifo(self.fifo)
+        writer = NagPassiveWriter(self.fifo)
+        self.results(writer, 2)
+        with self.assertRaises(OSError):
+            writer.flush()
+        self.assertEqual(len(writer.pending), 2)
+
+    def test_spool(self):
+        writer = NagPassiveWriter(spoolDir=self.tmp.name)
+        self.results(writer, 2)
+        self.assertEqual(writer.flush(), 2)
+        files = sorted(f for f in os.listdir(self.tmp.name))
+        self.assertEqual(len(files), 2)
+        self.assertEqual(len(files[0]), 7)
+        self.assertEqual(files[1], files[0] + ".ok")
+        with open(os.path.join(self.tmp.name, files[0])) as f:
+            text = f.read()
+        self.assertIn("host_name=host\nservice_description=sub1\n", text)
+        self.assertIn("return_code=1\noutput=WARNING sub 1 is slow\n", text)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            NagPassiveWriter()
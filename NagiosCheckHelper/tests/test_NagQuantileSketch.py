@@ -0,0 +1,114 @@
+import json
+import pickle
+import random
+import statistics
+from unittest import TestCase, skipUnless
+
+from NagiosCheckHelper import NagErrors, NagEval
+from NagiosCheckHelper.sketch import NagQuantileSketch, parseAggregate
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class TestNagQuantileSketch(TestCase):
+
+    def test_exactSmall(self):
+        sk = NagQuantileSketch(seed=1)
+        sk.update(range(1, 101))
+        self.assertEqual(sk.quantile(0.95), 95)
+        self.assertEqual(sk.aggregate('median'), 50)
+        self.assertEqual(sk.aggregate('min'), 1)
+        self.assertEqual(sk.aggregate('max'), 100)
+        self.assertEqual(sk.aggregate('count'), 100)
+        self.assertEqual(sk.aggregate('sum'), 5050)
+        self.assertAlmostEqual(sk.aggregate('mean'), 50.5)
+        self.assertAlmostEqual(sk.aggregate('stddev'), statistics.pstdev(range(1, 101)))
+
+    def test_boundedLarge(self):
+        rnd = random.Random(3)
+        values = [rnd.random() for _ in range(200000)]
+        sk = NagQuantileSketch(seed=2)
+        sk.update(iter(values))
+        self.assertLess(sum(len(level) for level in sk._levels), 3 * sk.k + 64)
+        for q in (0.5, 0.95, 0.99):
+            self.assertAlmostEqual(sk.quantile(q), q, delta=0.02)
+        self.assertAlmostEqual(sk.stddev, statistics.pstdev(values), places=6)
+
+    def test_merge(self):
+        rnd = random.Random(4)
+        parts = []
+        whole = []
+        for i in range(4):
+            values = [rnd.gauss(100, 10) for _ in range(20000)]
+            whole.extend(values)
+            sk = NagQuantileSketch(seed=i)
+            sk.update(values)
+            parts.append(sk)
+        merged = NagQuantileSketch(seed=9)
+        for sk in parts:
+            merged.merge(sk)
+        self.assertEqual(merged.count, 80000)
+        self.assertAlmostEqual(merged.mean, statistics.mean(whole), places=6)
+        self.assertAlmostEqual(merged.stddev, statistics.pstdev(whole), places=6)
+        self.assertAlmostEqual(merged.quantile(0.95), sorted(whole)[int(0.95 * (len(whole) - 1))], delta=1.0)
+
+    def test_serialize(self):
+        sk = NagQuantileSketch(seed=1)
+        sk.update(range(5000))
+        copy = NagQuantileSketch.fromDict(json.loads(json.dumps(sk.toDict())))
+        self.assertEqual(copy.quantile(0.9), sk.quantile(0.9))
+        self.assertEqual(copy.count, sk.count)
+        self.assertEqual(pickle.loads(pickle.dumps(sk)).quantile(0.9), sk.quantile(0.9))
+
+    def test_empty(self):
+        sk = NagQuantileSketch()
+        self.assertEqual(sk.quantile(0.5), None)
+        self.assertEqual(sk.aggregate('mean'), None)
+        self.assertEqual(sk.aggregate('count'), 0)
+
+    def test_parseAggregate(self):
+        self.assertEqual(parseAggregate('p99.9')[0], 'quantile')
+        self.assertAlmostEqual(parseAggregate('p99.9')[1], 0.999)
+        self.assertEqual(parseAggregate('max'), ('max', None))
+        with self.assertRaises(ValueError):
+            parseAggregate('p101')
+        with self.assertRaises(ValueError):
+            parseAggregate('average')
+
+
+class TestNagEval_evalAggregate(TestCase):
+
+    def test_percentileAsc(self):
+        eo = NagErrors()
+        ret = NagEval(eo).evalAggregateAsc((v for v in range(1, 101)), 'p95', warningAbove=90, criticalAbove=99,
+                                           prefixText="latency ", numberUnits="ms", perfLabel="latency_p95")
+        self.assertEqual(ret, "WARNING")
+        self.assertEqual(eo.warning, ["latency p95 95ms is > 90ms"])
+        self.assertEqual(eo.renderPerfData(), "'latency_p95'=95ms;90;99")
+
+    @skipUnless(numpy is not None, "numpy is not installed")
+    def test_numpyExact(self):
+        eo = NagErrors()
+        ev = NagEval(eo)
+        self.assertEqual(ev.evalAggregateAsc(numpy.arange(1, 101), 'p95', warningAbove=94), "WARNING")
+        self.assertEqual(eo.warning, ["p95 95 is > 94"])
+
+    def test_meanDesc(self):
+        eo = NagErrors()
+        self.assertEqual(NagEval(eo).evalAggregateDesc([1, 2, 3], 'mean', criticalBelow=5), "CRITICAL")
+        self.assertEqual(eo.critical, ["mean 2.0 is < 5"])
+
+    def test_sketchInput(self):
+        sk = NagQuantileSketch()
+        sk.update([5, 5, 5])
+        ev = NagEval(NagErrors())
+        self.assertEqual(ev.evalAggregateAsc(sk, 'stddev', warningAbove=1), "OK")
+        self.assertEqual(ev.evalAggregateAsc(sk, 'max', warningAbove=4), "WARNING")
+
+    def test_empty(self):
+        eo = NagErrors()
+        self.assertEqual(NagEval(eo).evalAggregateAsc(iter([]), 'p95', warningAbove=1), "UNKNOWN")
+        self.assertEqual(eo.unknown, ["list is Empty"])
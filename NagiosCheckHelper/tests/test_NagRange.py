@@ -0,0 +1,163 @@
+from unittest import TestCase, skipUnless
+
+from NagiosCheckHelper import NagErrors, NagEval, NagRange, NagBands
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class TestNagRange(TestCase):
+
+    def test_parse(self):
+        cases = {
+            "10": (0, 10, False),
+            "10:": (10, float('inf'), False),
+            "~:10": (float('-inf'), 10, False),
+            "10:20": (10, 20, False),
+            "@10:20": (10, 20, True),
+            "-5.5:0": (-5.5, 0, False),
+            5: (0, 5, False),
+        }
+        for text, (start, end, inside) in cases.items():
+            r = NagRange(text)
+            self.assertEqual((r.start, r.end, r.inside), (start, end, inside), text)
+
+    def test_invalid(self):
+        for text in ("abc", "20:10", "1:x", ""):
+            with self.assertRaises(ValueError):
+                NagRange(text)
+
+    def test_alert(self):
+        r = NagRange("10")
+        self.assertEqual([r.alert(v) for v in (-1, 0, 10, 11)], [True, False, False, True])
+        r = NagRange("10:")
+        self.assertEqual([r.alert(v) for v in (9, 10, 1000)], [True, False, False])
+        r = NagRange("~:10")
+        self.assertEqual([r.alert(v) for v in (-1000, 10, 11)], [False, False, True])
+        r = NagRange("@10:20")
+        self.assertEqual([r.alert(v) for v in (9, 10, 20, 21)], [False, True, True, False])
+
+    def test_compile(self):
+        self.assertIs(NagRange.compile("10:20"), NagRange.compile("10:20"))
+        r = NagRange("5")
+        self.assertIs(NagRange.compile(r), r)
+
+    def test_excess(self):
+        self.assertEqual(NagRange("10:20").excess(5), 5)
+        self.assertEqual(NagRange("10:20").excess(26), 6)
+        self.assertEqual(NagRange("10:20").excess(15), 0)
+        self.assertEqual(NagRange("@10:20").excess(12), 2)
+        self.assertEqual(NagRange("@~:20").excess(-100), 120)
+
+
+class TestNagEval_evalRange(TestCase):
+
+    def test_evalRange(self):
+        eo = NagErrors()
+        ev = NagEval(eo)
+        self.assertEqual(ev.evalRange(15, warningRange="10:20", criticalRange="5:30"), "OK")
+        self.assertEqual(ev.evalRange(25, warningRange="10:20", criticalRange="5:30", numberUnits="C"), "WARNING")
+        self.assertEqual(ev.evalRange(35, warningRange="10:20", criticalRange="5:30"), "CRITICAL")
+        self.assertEqual(ev.evalRange(15, criticalRange="@10:20", prefixText="temp "), "CRITICAL")
+        self.assertEqual(eo.warning, ["25C is outside 10:20"])
+        self.assertEqual(eo.critical, ["35 is outside 5:30", "temp 15 is inside @10:20"])
+
+    def test_perfData(self):
+        eo = NagErrors()
+        ev = NagEval(eo)
+        ev.evalRange(15, warningRange="10:20", criticalRange="~:30", numberUnits="%", perfLabel="x")
+        self.assertEqual(eo.renderPerfData(), "'x'=15%;10:20;~:30")
+
+    def test_evalListRange(self):
+        eo = NagErrors()
+        ev = NagEval(eo)
+        self.assertEqual(ev.evalListRange([1, 15, 25, 35], warningRange="10:20", criticalRange="5:30"), "CRITICAL")
+        self.assertEqual(eo.warning, ["25 is outside 10:20"])
+        self.assertEqual(eo.critical, ["1 is outside 5:30", "35 is outside 5:30"])
+
+    @skipUnless(numpy is not None, "numpy is not installed")
+    def test_evalListRange_vector(self):
+        values = list(range(-50, 50))
+        eo = NagErrors()
+        NagEval(eo).evalListRange(values, warningRange="-10:10", criticalRange="@30:40")
+        veo = NagErrors()
+        ev = NagEval(veo)
+        ev.vectorMinSize = 1
+        ev.evalListRange(values, warningRange="-10:10", criticalRange="@30:40")
+        self.assertEqual(veo.warning, eo.warning)
+        self.assertEqual(veo.critical, eo.critical)
+
+
+class TestNagBands(TestCase):
+
+    def test_classify(self):
+        bands = NagBands([80, 90], ["OK", "WARNING", "CRITICAL"])
+        self.assertEqual([bands.classify(v) for v in (0, 80, 85, 90, 90.5)], ["OK", "OK", "WARNING", "WARNING", "CRITICAL"])
+        self.assertEqual(bands.describe(0), "~:80")
+        self.assertEqual(bands.describe(1), "80:90")
+        self.assertEqual(bands.describe(2), "90:")
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            NagBands([1, 2], ["OK", "WARNING"])
+        with self.assertRaises(ValueError):
+            NagBands([2, 1], ["OK", "WARNING", "OK"])
+        with self.assertRaises(ValueError):
+            NagBands([1], ["OK", "BAD"])
+
+    def test_evalBands(self):
+        bands = NagBands([10, 20, 80, 90], ["CRITICAL", "WARNING", "OK", "WARNING", "CRITICAL"])
+        eo = NagErrors()
+        ev = NagEval(eo)
+        self.assertEqual(ev.evalBands(50, bands), "OK")
+        self.assertEqual(ev.evalBands(15, bands, numberUnits="%"), "WARNING")
+        self.assertEqual(ev.evalListBands([50, 5, 95, 85], bands), "CRITICAL")
+        self.assertEqual(eo.warning, ["15% is in 10:20", "85 is in 80:90"])
+        self.assertEqual(eo.critical, ["5 is in ~:10", "95 is in 90:"])
+
+    @skipUnless(numpy is not None, "numpy is not installed")
+    def test_evalListBands_vector(self):
+        bands = NagBands([10, 20, 80, 90], ["CRITICAL", "WARNING", "OK", "UNKNOWN", "CRITICAL"])
+        values = list(range(0, 100, 3))
+        eo = NagErrors()
+        ret = NagEval(eo).evalListBands(values, bands)
+        veo = NagErrors()
+        vret = NagEval(veo).evalListBands(numpy.array(values), bands)
+        self.assertEqual(vret, ret)
+        self.assertEqual(ret, "UNKNOWN")
+        self.assertEqual(veo.warning, eo.warning)
+        self.assertEqual(veo.critical, eo.critical)
+        self.assertEqual(veo.unknown, eo.unknown)
+
+    def test_evalListBands_nan(self):
+        bands = NagBands([80, 90], ["OK", "WARNING", "CRITICAL"])
+        nan = float('nan')
+        for values in ([nan, 1.0], [nan] + [1.0] * 300):
+            eo = NagErrors()
+            self.assertEqual(NagEval(eo).evalListBands(values, bands), "OK")
+            self.assertEqual(eo.critical, [])
+        self.assertEqual(bands.classify(nan), "OK")
+
+    @skipUnless(numpy is not None, "numpy is not installed")
+    def test_evalListBands_nanVector(self):
+        bands = NagBands([10, 90], ["CRITICAL", "OK", "WARNING"])
+        values = [float('nan'), 5.0, 50.0, 95.0, float('nan')]
+        eo = NagErrors()
+        ret = NagEval(eo).evalListBands(values, bands)
+        veo = NagErrors()
+        vret = NagEval(veo).evalListBands(numpy.array(values), bands)
+        self.assertEqual(vret, ret)
+        self.assertEqual(veo.critical, eo.critical)
+        self.assertEqual(veo.warning, eo.warning)
+        self.assertEqual(eo.critical, ["nan is in ~:10", "5.0 is in ~:10", "nan is in ~:10"])
+
+    def test_keepWorst(self):
+        eo = NagErrors(maxRecords=2, keepRecords='worst')
+        NagEval(eo).evalListRange([91, 500, 95, 1000], criticalRange='0:90')
+        self.assertEqual(sorted(eo.critical), ["1000 is outside 0:90", "500 is outside 0:90"])
+        bands = NagBands([80, 90], ["OK", "WARNING", "CRITICAL"])
+        eo = NagErrors(maxRecords=2, keepRecords='worst')
+        NagEval(eo).evalListBands([91, 500, 95, 1000, 85], bands)
+        self.assertEqual(sorted(eo.critical), ["1000 is in 90:", "500 is in 90:"])
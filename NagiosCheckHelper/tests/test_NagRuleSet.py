@@ -0,0 +1,64 @@
+from unittest import TestCase
+
+from NagiosCheckHelper import NagErrors, NagEval, NagBands
+from NagiosCheckHelper.rules import NagRuleSet
+
+RULES = [
+    {'match': 'cpu', 'kind': 'asc', 'warningAbove': 80, 'criticalAbove': 90, 'units': '%', 'perf': True},
+    {'match': 'free_*', 'kind': 'desc', 'warningBelow': 20, 'criticalBelow': 10, 'units': 'GB', 'label': '{name}: '},
+    {'match': 'temp_*', 'kind': 'range', 'warningRange': '10:40', 'criticalRange': '0:50'},
+    {'match': 'raid', 'kind': 'enum', 'okValues': ['ONLINE'], 'warningValues': ['DEGRADED'], 'criticalValues': ['FAULTED']},
+    {'match': 'load', 'kind': 'bands', 'bands': NagBands([1, 2], ["OK", "WARNING", "CRITICAL"])},
+    {'match': 'free_tmp', 'kind': 'asc', 'criticalAbove': 0},
+]
+
+
+class TestNagRuleSet(TestCase):
+
+    def test_evaluate(self):
+        rs = NagRuleSet(RULES)
+        eo = NagErrors()
+        ret = rs.evaluate(eo, {'cpu': 85, 'free_root': 5, 'free_var': 50, 'temp_cpu': 45, 'raid': ['ONLINE', 'DEGRADED'], 'load': 0.5, 'other': 1})
+        self.assertEqual(ret, "CRITICAL")
+        self.assertEqual(eo.warning, ["cpu 85% is > 80%", "temp_cpu 45 is outside 10:40", "raid value is DEGRADED"])
+        self.assertEqual(eo.critical, ["free_root: 5GB is < 10GB"])
+        self.assertEqual(eo.renderPerfData(), "'cpu'=85%;80;90")
+
+    def test_sameAsEvaluators(self):
+        eo = NagErrors()
+        NagRuleSet(RULES).evaluate(NagEval(eo), {'cpu': [95, 50], 'load': [1.5, 3]})
+        seo = NagErrors()
+        ev = NagEval(seo)
+        ev.evalListNumberAsc([95, 50], warningAbove=80, criticalAbove=90, numberUnits='%', prefixText="cpu ")
+        ev.evalListBands([1.5, 3], NagBands([1, 2], ["OK", "WARNING", "CRITICAL"]), prefixText="load ")
+        self.assertEqual(eo.critical, seo.critical)
+        self.assertEqual(eo.warning, seo.warning)
+
+    def test_exactBeforePattern(self):
+        rs = NagRuleSet(RULES)
+        self.assertEqual(rs.lookup('free_tmp')[0], 'evalListNumberAsc')
+        self.assertEqual(rs.lookup('free_home')[0], 'evalListNumberDesc')
+        self.assertIs(rs.lookup('free_home'), rs.lookup('free_home'))
+        self.assertEqual(rs.lookup('nothing'), None)
+
+    def test_unmatchedMissing(self):
+        rs = NagRuleSet(RULES, unmatchedStatus="WARNING", missingStatus="UNKNOWN")
+        eo = NagErrors()
+        ret = rs.evaluate(eo, {'cpu': 10, 'raid': 'ONLINE', 'load': 0, 'free_tmp': 0, 'bogus': 1})
+        self.assertEqual(ret, "WARNING")
+        self.assertEqual(eo.warning, ["no rule for metric bogus"])
+        self.assertEqual(eo.unknown, [])
+
+    def test_missing(self):
+        rs = NagRuleSet(RULES, missingStatus="UNKNOWN")
+        eo = NagErrors()
+        self.assertEqual(rs.evaluate(eo, {'cpu': 10}), "UNKNOWN")
+        self.assertEqual(eo.unknown, ["metric raid is missing", "metric load is missing", "metric free_tmp is missing"])
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            NagRuleSet([{'match': 'x', 'kind': 'bogus'}])
+        with self.assertRaises(ValueError):
+            NagRuleSet([{'match': 'x', 'kind': 'asc', 'warningBelow': 1}])
+        with self.assertRaises(ValueError):
+            NagRuleSet([{'kind': 'asc'}])
@@ -0,0 +1,100 @@
+import multiprocessing
+import os
+import tempfile
+from unittest import TestCase
+
+from NagiosCheckHelper import NagErrors, NagEval
+from NagiosCheckHelper.state import NagStateStore
+
+
+def _countSamples(path, key, n):
+    with NagStateStore(path) as store:
+        for i in range(n):
+            store.ewma(key, 1.0)
+
+
+class TestNagStateStore(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'state.db')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_counterRate(self):
+        with NagStateStore(self.path, slots=16) as store:
+            self.assertEqual(store.counterRate('eth0', 100, now=1000), None)
+            self.assertEqual(store.counterRate('eth0', 700, now=1010), 60.0)
+            self.assertEqual(store.counterRate('eth1', 5, now=1010), None)
+            self.assertEqual(store.counterRate('eth0', 100, now=1020), None)
+            self.assertEqual(store.counterRate('eth0', 200, now=1030), 10.0)
+        self.assertEqual(os.path.getsize(self.path), 16 + 16 * 48)
+
+    def test_counterWrap(self):
+        with NagStateStore(self.path) as store:
+            store.counterRate('c', 2**32 - 10, now=0, counterMax=2**32)
+            self.assertEqual(store.counterRate('c', 10, now=10, counterMax=2**32), 2.0)
+
+    def test_persistent(self):
+        with NagStateStore(self.path) as store:
+            store.counterRate('eth0', 100, now=1000)
+        with NagStateStore(self.path, slots=10) as store:
+            self.assertEqual(store.slots, 4096)
+            self.assertEqual(store.counterRate('eth0', 200, now=1100), 1.0)
+
+    def test_full(self):
+        with NagStateStore(self.path, slots=2) as store:
+            store.counterRate('a', 1)
+            store.counterRate('b', 1)
+            with self.assertRaises(ValueError):
+                store.counterRate('c', 1)
+
+    def test_badFile(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'x' * 100)
+        with self.assertRaises(ValueError):
+            NagStateStore(self.path)
+
+    def test_ewma(self):
+        with NagStateStore(self.path) as store:
+            self.assertEqual(store.ewma('q', 10.0, alpha=0.5), (0.0, 0.0, 0))
+            self.assertEqual(store.ewma('q', 20.0, alpha=0.5), (10.0, 0.0, 1))
+            mean, stddev, count = store.ewma('q', 20.0, alpha=0.5)
+            self.assertEqual((mean, stddev, count), (15.0, 5.0, 2))
+
+    def test_processes(self):
+        procs = [multiprocessing.Process(target=_countSamples, args=(self.path, 'shared', 200)) for _ in range(4)]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join()
+        with NagStateStore(self.path) as store:
+            self.assertEqual(store.ewma('shared', 1.0)[2], 800)
+
+
+class TestNagEval_stateful(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.store = NagStateStore(os.path.join(self.tmpdir.name, 'state.db'))
+
+    def tearDown(self):
+        self.store.close()
+        self.tmpdir.cleanup()
+
+    def test_evalCounterRate(self):
+        eo = NagErrors()
+        ev = NagEval(eo)
+        self.assertEqual(ev.evalCounterRate(self.store, 'errors', 10, warningAbove=5, perSeconds=60, now=0), "OK")
+        self.assertEqual(ev.evalCounterRate(self.store, 'errors', 20, warningAbove=5, perSeconds=60, now=60, numberUnits="/min"), "WARNING")
+        self.assertEqual(eo.warning, ["10.0/min is > 5/min"])
+
+    def test_evalEwmaDeviation(self):
+        eo = NagErrors()
+        ev = NagEval(eo)
+        for i, v in enumerate([10, 12, 10, 12, 10, 12]):
+            self.assertEqual(ev.evalEwmaDeviation(self.store, 'q', v, warningDeviation=3, criticalDeviation=6, now=i), "OK")
+        self.assertEqual(ev.evalEwmaDeviation(self.store, 'q', 50, warningDeviation=3, criticalDeviation=6, prefixText="queue "), "CRITICAL")
+        self.assertTrue(eo.critical[0].startswith("queue 50 deviation "))
+        self.assertTrue(eo.critical[0].endswith(" sigma is > 6 sigma"))
@@ -0,0 +1,89 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from NagiosCheckHelper import NagErrors, NagEval
+from NagiosCheckHelper.window import NagWindowStore
+
+
+class TestNagWindowStore(TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "cpu.window")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_window(self):
+        with NagWindowStore(self.path, 600) as w:
+            for i in range(20):
+                stats = w.add(i, i % 2, now=1000 + 60 * i)
+            # the window ending at 2140 holds the samples after 1540, i >= 10
+            self.assertEqual(stats.count, 10)
+            self.assertEqual(stats.total, sum(range(10, 20)))
+            self.assertEqual(stats.statusCounts, (5, 5, 0, 0))
+            self.assertEqual([s[1] for s in w.samples(now=2140)], list(range(10, 20)))
+            self.assertEqual(w.stats(now=3000).count, 0)
+
+    def test_persistent(self):
+        with NagWindowStore(self.path, 300, capacity=16) as w:
+            w.add(5, now=100)
+            w.add(7, now=160)
+        size = os.path.getsize(self.path)
+        with NagWindowStore(self.path, 300) as w:
+            self.assertEqual(w.capacity, 16)
+            self.assertEqual(w.stats(now=200).mean, 6)
+            w.add(9, now=220)
+        self.assertEqual(os.path.getsize(self.path), size)
+
+    def test_capacity(self):
+        with NagWindowStore(self.path, 10000, capacity=4) as w:
+            for i in range(10):
+                stats = w.add(i, now=i)
+            self.assertEqual(stats.count, 4)
+            self.assertEqual(stats.total, 6 + 7 + 8 + 9)
+
+    def test_invalid(self):
+        with open(self.path, 'wb') as f:
+            f.write(b"x" * 100)
+        with self.assertRaises(ValueError):
+            NagWindowStore(self.path, 60)
+
+
+class TestNagEval_window(TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.window = NagWindowStore(os.path.join(self.tmp.name, "w"), 600)
+
+    def tearDown(self):
+        self.window.close()
+        self.tmp.cleanup()
+
+    def test_count(self):
+        ev = NagEval(NagErrors())
+        results = []
+        for i, value in enumerate([95, 50, 95, 95, 50, 50, 95, 95]):
+            eo = NagErrors()
+            ev.errObj = eo
+            results.append(ev.evalWindowCount(self.window, value, warningAbove=80, criticalAbove=90, warningCount=2, criticalCount=4,
+                                              prefixText="cpu ", numberUnits="%", now=60 * i))
+        self.assertEqual(results, ["OK", "OK", "WARNING", "WARNING", "WARNING", "WARNING", "CRITICAL", "CRITICAL"])
+        self.assertEqual(eo.critical, ["cpu 5 of 8 samples in the last 600s are > 90%"])
+
+    def test_countBelow(self):
+        eo = NagErrors()
+        ev = NagEval(eo)
+        self.assertEqual(ev.evalWindowCount(self.window, 1, warningBelow=5, now=0), "WARNING")
+        self.assertEqual(eo.warning, ["1 of 1 samples in the last 600s are < 5"])
+
+    def test_average(self):
+        eo = NagErrors()
+        ev = NagEval(eo)
+        self.assertEqual(ev.evalWindowAverage(self.window, 100, warningAbove=60, now=0), "WARNING")
+        self.assertEqual(ev.evalWindowAverage(self.window, 0, warningAbove=60, now=60), "OK")
+        self.assertEqual(ev.evalWindowAverage(self.window, 0, warningAbove=60, criticalBelow=40, perfLabel="avg", now=120), "CRITICAL")
+        self.assertEqual(eo.warning, ["600s average 100.0 is > 60"])
+        self.assertEqual(eo.critical, ["600s average 33.33 is < 40"])
+        self.assertEqual(eo.renderPerfData(), "'avg'=33.33;60")
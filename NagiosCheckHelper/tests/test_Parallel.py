@@ -0,0 +1,99 @@
+import pickle
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+
+from NagiosCheckHelper import NagErrors, NagEval
+
+
+def isOdd(neval, value):
+    if value % 2:
+        neval.errObj.addWarning("{} is odd".format(value))
+        return "WARNING"
+    return "OK"
+
+
+class TestNagErrors_merge(TestCase):
+
+    def test_merge(self):
+        a = NagErrors()
+        a.addWarning('a1')
+        a.addPerfData('a', 1)
+        b = NagErrors(maxRecords=1)
+        b.addWarning('b1')
+        b.addWarning('b2')
+        b.addCritical('b3')
+        b.addPerfData('b', 2)
+        a.merge(b)
+        self.assertEqual(a.warning, ['a1', 'b1'])
+        self.assertEqual(a.getCount('warning'), 3)
+        self.assertEqual(a.critical, ['b3'])
+        self.assertEqual(a.renderPerfData(), "'a'=1 'b'=2")
+        self.assertEqual(a.getExitCode(), 2)
+
+    def test_pickle(self):
+        eo = NagErrors(maxRecords=5, keepRecords='worst')
+        NagEval(eo).evalListNumberAsc([1, 20, 30], warningAbove=10, numberUnits="s")
+        eo2 = pickle.loads(pickle.dumps(eo))
+        self.assertEqual(eo2.warning, eo.warning)
+        self.assertEqual(eo2.getExitCode(), 1)
+        eo2.addCritical('after')
+        self.assertEqual(eo2.getExitCode(), 2)
+
+    def test_threads(self):
+        eo = NagErrors(maxRecords=10, keepRecords='worst')
+
+        def work():
+            for i in range(2000):
+                eo.addTemplateRecord('warning', "{value}", i, 0)
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(eo.getCount('warning'), 8000)
+        self.assertEqual(eo.warning[:4], ['1999'] * 4)
+
+
+class TestNagEval_evalListParallel(TestCase):
+
+    def serial(self, method, values, **kwargs):
+        eo = NagErrors()
+        return getattr(NagEval(eo), method)(values, **kwargs), eo
+
+    def test_threads(self):
+        values = [random.Random(1).randint(0, 100) for _ in range(1000)]
+        sret, seo = self.serial('evalListNumberAsc', values, warningAbove=50, criticalAbove=90)
+        eo = NagErrors()
+        ret = NagEval(eo).evalListParallel(values, 'evalListNumberAsc', workers=3, warningAbove=50, criticalAbove=90)
+        self.assertEqual(ret, sret)
+        self.assertEqual(eo.critical, seo.critical)
+        self.assertEqual(eo.warning, seo.warning)
+
+    def test_processes(self):
+        values = ['ONLINE'] * 50 + ['DEGRADED'] + ['ONLINE'] * 50 + ['FAULTED']
+        sret, seo = self.serial('evalListEnum', values, okValues=['ONLINE'], warningValues=['DEGRADED'], criticalValues=['FAULTED'])
+        eo = NagErrors()
+        ret = NagEval(eo).evalListParallel(values, 'evalListEnum', workers=2, useProcesses=True, okValues=['ONLINE'], warningValues=['DEGRADED'], criticalValues=['FAULTED'])
+        self.assertEqual(ret, sret)
+        self.assertEqual(eo.critical, seo.critical)
+        self.assertEqual(eo.warning, seo.warning)
+
+    def test_callable(self):
+        eo = NagErrors()
+        with ThreadPoolExecutor(2) as executor:
+            ret = NagEval(eo).evalListParallel(range(10), isOdd, executor=executor, chunkSize=3)
+        self.assertEqual(ret, "WARNING")
+        self.assertEqual(eo.warning, ["1 is odd", "3 is odd", "5 is odd", "7 is odd", "9 is odd"])
+
+    def test_empty(self):
+        eo = NagErrors()
+        self.assertEqual(NagEval(eo).evalListParallel([], isOdd, emptyStatus="WARNING"), "WARNING")
+        self.assertEqual(NagEval(eo).evalListParallel([], 'evalListNumberAsc', emptyStatus="CRITICAL"), "CRITICAL")
+        self.assertEqual(eo.warning, ["list is Empty"])
+        self.assertEqual(eo.critical, ["list is Empty"])
+
+    def test_perfLabel(self):
+        with self.assertRaises(ValueError):
+            NagEval(NagErrors()).evalListParallel([1], 'evalListNumberAsc', perfLabel='x')
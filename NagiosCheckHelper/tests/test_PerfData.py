@@ -0,0 +1,107 @@
+from unittest import TestCase, skipUnless
+
+from NagiosCheckHelper import NagErrors, NagEval
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+class TestNagErrors_perfData(TestCase):
+
+    def test_addPerfData(self):
+        eo = NagErrors()
+        eo.addPerfData('load', 1.5)
+        eo.addPerfData("it's", 45, '%', 80, 90, 0, 100)
+        eo.addPerfData('free', 10, 'GB', '20:', '10:')
+        self.assertEqual(eo.renderPerfData(), "'load'=1.5 'it''s'=45%;80;90;0;100 'free'=10GB;20:;10:")
+        self.assertEqual(eo.renderStatus(), "OK | 'load'=1.5 'it''s'=45%;80;90;0;100 'free'=10GB;20:;10:\n")
+
+    def test_renderStatus(self):
+        eo = NagErrors()
+        eo.addPerfData('a', 1)
+        eo.addWarning('Warning 1')
+        self.assertEqual(eo.renderStatus(), "WARNING Warning 1 | 'a'=1\r\n\n")
+        eo.addWarning('Warning 2')
+        self.assertEqual(eo.renderStatus(), "WARNING: | 'a'=1\r\n    Warning 1\r\n    Warning 2\r\n\n")
+
+    def test_perfLimit(self):
+        eo = NagErrors(perfLimit=3)
+        eo.addPerfData('a', 1)
+        eo.addPerfDataList('b', [1, 2, 3, 4])
+        eo.addPerfData('c', 1)
+        self.assertEqual(len(eo.perfdata), 3)
+        self.assertEqual(eo.perfDropped, 3)
+        self.assertEqual(eo.renderPerfData(), "'a'=1 'b_0'=1 'b_1'=2")
+
+    def test_maxBytes(self):
+        eo = NagErrors()
+        eo.addPerfDataList('value', list(range(1000)))
+        for i in range(1000):
+            eo.addWarning('Warning {}'.format(i))
+        out = eo.renderStatus(maxBytes=1000)
+        self.assertLessEqual(len(out.encode('utf-8')), 1000)
+        self.assertTrue(out.startswith("WARNING: | 'value_0'=0 'value_1'=1"))
+
+
+class TestNagEval_perfData(TestCase):
+
+    def test_evalNumber(self):
+        eo = NagErrors()
+        ev = NagEval(eo)
+        ev.evalNumberAsc(45, warningAbove=80, criticalAbove=90, numberUnits="%", perfLabel="cpu")
+        ev.evalNumberDesc(5, warningBelow=20, criticalBelow=10, numberUnits="GB", perfLabel="free")
+        ev.evalNumberAsc(3, numberUnits=" files", perfLabel="files")
+        self.assertEqual(eo.renderPerfData(), "'cpu'=45%;80;90 'free'=5GB;20:;10: 'files'=3")
+        self.assertEqual(eo.getExitCode(), 2)
+
+    def test_evalListNumber(self):
+        eo = NagErrors()
+        ev = NagEval(eo)
+        ev.evalListNumberAsc([1, 5, 3], warningAbove=4, numberUnits="s", perfLabel="t")
+        self.assertEqual(eo.renderPerfData(), "'t_0'=1s;4 't_1'=5s;4 't_2'=3s;4")
+        self.assertEqual(len(eo.warning), 1)
+
+    def test_evalListNumber_aggregate(self):
+        eo = NagErrors()
+        ev = NagEval(eo)
+        values = [1, 5, 3, 3]
+        for agg, expect in (('min', 1), ('max', 5), ('sum', 12), ('mean', 3.0), ('count', 4)):
+            eo.perfdata = []
+            ev.evalListNumberDesc(values, criticalBelow=2, perfLabel="v", perfAggregate=agg)
+            self.assertEqual(eo.perfdata, [("v", expect, "", None, "2:", None, None)])
+
+    def test_evalListNumber_vector(self):
+        eo = NagErrors()
+        ev = NagEval(eo)
+        ev.vectorMinSize = 1
+        ev.evalListNumberAsc([1, 5, 3], warningAbove=4, perfLabel="t", perfAggregate='max')
+        self.assertEqual(eo.renderPerfData(), "'t'=5;4")
+
+    def test_evalListNumber_single(self):
+        eo = NagErrors()
+        ev = NagEval(eo)
+        ev.evalListNumberAsc(7, warningAbove=4, perfLabel="t")
+        self.assertEqual(eo.renderPerfData(), "'t'=7;4")
+
+    def test_evalListNumber_vectorParity(self):
+        values = [69.66, 65, -97] * 100
+        rendered = []
+        for vectorMinSize in (256, len(values) + 1):
+            eo = NagErrors()
+            ev = NagEval(eo)
+            ev.vectorMinSize = vectorMinSize
+            ev.evalListNumberAsc(values, warningAbove=80, perfLabel='x')
+            self.assertEqual([type(p[1]) for p in eo.perfdata[:3]], [float, int, int])
+            rendered.append(eo.renderPerfData())
+        self.assertEqual(rendered[0], rendered[1])
+        self.assertTrue(rendered[0].startswith("'x_0'=69.66;80 'x_1'=65;80 'x_2'=-97;80"))
+
+    @skipUnless(numpy is not None, "numpy is not installed")
+    def test_addPerfDataList_array(self):
+        eo = NagErrors(perfLimit=2)
+        eo.addPerfDataList('x', numpy.array([[1, 2], [3, 4]]))
+        self.assertEqual(eo.perfdata[0][1], 1)
+        self.assertIs(type(eo.perfdata[0][1]), int)
+        self.assertEqual(eo.renderPerfData(), "'x_0'=1 'x_1'=2")
+        self.assertEqual(eo.perfDropped, 2)
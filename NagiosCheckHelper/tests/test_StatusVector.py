@@ -0,0 +1,80 @@
+from array import array
+from unittest import TestCase, skipUnless
+
+from NagiosCheckHelper import NagErrors, NagEval, NagBands
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class TestNagEval_classify(TestCase):
+
+    def setUp(self):
+        self.eo = NagErrors()
+        self.ev = NagEval(self.eo)
+
+    def tearDown(self):
+        # classifying never creates records
+        self.assertEqual(self.eo.getExitCode(), 0)
+        self.assertEqual(self.eo.warning, [])
+        self.assertEqual(self.eo.critical, [])
+
+    def test_numberAsc(self):
+        codes, idx = self.ev.classifyListNumberAsc([20, 45, 55, 10], warningAbove=40, criticalAbove=50)
+        self.assertEqual(codes, array('b', [0, 1, 2, 0]))
+        self.assertEqual(idx, [1, 2])
+
+    def test_numberDescIterable(self):
+        codes, idx = self.ev.classifyListNumberDesc((v for v in [5, 15, 25]), warningBelow=20, criticalBelow=10)
+        self.assertEqual(codes, array('b', [2, 1, 0]))
+        self.assertEqual(idx, [0, 1])
+
+    @skipUnless(numpy is not None, "numpy is not installed")
+    def test_numpy(self):
+        values = numpy.array([20, 45, 55, 10])
+        codes, idx = self.ev.classifyListNumberAsc(values, warningAbove=40, criticalAbove=50)
+        self.assertEqual(codes.dtype, numpy.int8)
+        self.assertEqual(codes.tolist(), [0, 1, 2, 0])
+        self.assertEqual(idx.tolist(), [1, 2])
+
+    @skipUnless(numpy is not None, "numpy is not installed")
+    def test_vectorMatchesScalar(self):
+        values = list(range(1000))
+        vcodes, vidx = self.ev.classifyListRange(values, "100:900", "50:950")
+        self.ev.vectorMinSize = 10 ** 6
+        scodes, sidx = self.ev.classifyListRange(values, "100:900", "50:950")
+        self.assertIsInstance(scodes, array)
+        self.assertEqual(vcodes.tolist(), scodes.tolist())
+        self.assertEqual(vidx.tolist(), sidx)
+
+    def test_enum(self):
+        codes, idx = self.ev.classifyListEnum(["ONLINE", "DEGRADED", "junk", "FAULTED"], okValues=["ONLINE"],
+                                              warningValues=["DEGRADED"], criticalValues=["FAULTED"])
+        self.assertEqual(codes, array('b', [0, 1, 3, 2]))
+        self.assertEqual(idx, [1, 2, 3])
+
+    def test_bands(self):
+        bands = NagBands([1, 2], ["OK", "WARNING", "CRITICAL"])
+        codes, idx = self.ev.classifyListBands([0.5, 1.5, 3], bands)
+        self.assertEqual(codes, array('b', [0, 1, 2]))
+
+    @skipUnless(numpy is not None, "numpy is not installed")
+    def test_bandsNumpy(self):
+        bands = NagBands([1, 2], ["OK", "WARNING", "CRITICAL"])
+        codes, idx = self.ev.classifyListBands(numpy.array([0.5, 1.5, 3]), bands)
+        self.assertEqual(codes.tolist(), [0, 1, 2])
+        self.assertEqual(idx.tolist(), [1, 2])
+
+    def test_bandsNan(self):
+        bands = NagBands([1, 2], ["OK", "WARNING", "CRITICAL"])
+        for count in (3, 300):
+            codes, idx = self.ev.classifyListBands([float('nan')] * count, bands)
+            self.assertEqual(list(codes), [0] * count)
+            self.assertEqual(len(idx), 0)
+
+    def test_empty(self):
+        codes, idx = self.ev.classifyListNumberAsc([], warningAbove=1)
+        self.assertEqual(len(codes), 0)
+        self.assertEqual(idx, [])
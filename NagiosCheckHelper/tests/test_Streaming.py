@@ -0,0 +1,133 @@
+from array import array
+from unittest import TestCase
+
+from NagiosCheckHelper import NagErrors, NagEval, NagBands
+
+
+def counted(values, seen):
+    for value in values:
+        seen.append(value)
+        yield value
+
+
+class TestNagEval_iterables(TestCase):
+
+    def test_generatorAsc(self):
+        eo = NagErrors()
+        ev = NagEval(eo)
+        self.assertEqual(ev.evalListNumberAsc((v for v in [20, 45, 55]), warningAbove=40, criticalAbove=50), "CRITICAL")
+        self.assertEqual(eo.warning, ["45 is > 40"])
+        self.assertEqual(eo.critical, ["55 is > 50"])
+
+    def test_sameAsList(self):
+        values = [5, 15, 25, 1, 30]
+        for wrap in (tuple, iter, lambda v: array('i', v), lambda v: (x for x in v)):
+            eo = NagErrors()
+            leo = NagErrors()
+            self.assertEqual(NagEval(eo).evalListNumberDesc(wrap(values), warningBelow=20, criticalBelow=10),
+                             NagEval(leo).evalListNumberDesc(values, warningBelow=20, criticalBelow=10))
+            self.assertEqual(eo.warning, leo.warning)
+            self.assertEqual(eo.critical, leo.critical)
+
+    def test_emptyGenerator(self):
+        eo = NagErrors()
+        self.assertEqual(NagEval(eo).evalListNumberAsc(iter([]), warningAbove=1), "UNKNOWN")
+        self.assertEqual(NagEval(eo).evalListEnum(iter([]), emptyStatus="WARNING"), "WARNING")
+        self.assertEqual(eo.unknown, ["list is Empty"])
+
+    def test_enumLines(self):
+        lines = iter(["ONLINE", "DEGRADED", "ONLINE"])
+        eo = NagErrors()
+        self.assertEqual(NagEval(eo).evalListEnum(lines, okValues=["ONLINE"], warningValues=["DEGRADED"]), "WARNING")
+        self.assertEqual(eo.warning, ["value is DEGRADED"])
+
+    def test_bandsTuple(self):
+        eo = NagErrors()
+        bands = NagBands([1, 2], ["OK", "WARNING", "CRITICAL"])
+        self.assertEqual(NagEval(eo).evalListBands((0.5, 1.5), bands), "WARNING")
+
+    def test_stringIsScalar(self):
+        eo = NagErrors()
+        self.assertEqual(NagEval(eo).evalListEnum("DEGRADED", warningValues=["DEGRADED"]), "WARNING")
+        self.assertEqual(eo.warning, ["value is DEGRADED"])
+
+    def test_perfAggregate(self):
+        eo = NagErrors()
+        NagEval(eo).evalListNumberAsc((v for v in [1, 2, 6]), warningAbove=5, perfLabel="x", perfAggregate='mean', shortCircuit=True)
+        self.assertEqual(eo.renderPerfData(), "'x'=3.0;5")
+
+    def test_perfList(self):
+        eo = NagErrors()
+        NagEval(eo).evalListNumberAsc((v for v in [1, 2]), perfLabel="x")
+        self.assertEqual(eo.renderPerfData(), "'x_0'=1 'x_1'=2")
+
+
+class TestNagEval_shortCircuit(TestCase):
+
+    def test_stopsAtCritical(self):
+        seen = []
+        eo = NagErrors()
+        ev = NagEval(eo)
+        ret = ev.evalListNumberAsc(counted([1, 45, 60, 70, 80], seen), warningAbove=40, criticalAbove=50, shortCircuit=True)
+        self.assertEqual(ret, "CRITICAL")
+        self.assertEqual(seen, [1, 45, 60])
+        self.assertEqual(eo.critical, ["60 is > 50"])
+        self.assertEqual(ev.lastSkipped, None)
+
+    def test_skippedCount(self):
+        ev = NagEval(NagErrors())
+        ev.evalListNumberAsc([1, 60, 70, 80], warningAbove=40, criticalAbove=50, shortCircuit=True)
+        self.assertEqual(ev.lastSkipped, 2)
+        ev.evalListNumberAsc([1, 60, 70, 80], warningAbove=40, criticalAbove=50)
+        self.assertEqual(ev.lastSkipped, 0)
+
+    def test_warningOnly(self):
+        ev = NagEval(NagErrors())
+        self.assertEqual(ev.evalListNumberAsc([1, 45, 70], warningAbove=40, shortCircuit=True), "WARNING")
+        self.assertEqual(ev.lastSkipped, 1)
+
+    def test_enum(self):
+        ev = NagEval(NagErrors())
+        # unknown values can still make it worse than CRITICAL
+        ev.evalListEnum(["a", "FAULTED", "b"], okValues=["a", "b"], criticalValues=["FAULTED"], shortCircuit=True)
+        self.assertEqual(ev.lastSkipped, 0)
+        ev.evalListEnum(["a", "FAULTED", "b"], unknownValueStatus="OK", okValues=["a"], criticalValues=["FAULTED"], shortCircuit=True)
+        self.assertEqual(ev.lastSkipped, 1)
+
+    def test_bands(self):
+        ev = NagEval(NagErrors())
+        bands = NagBands([1, 2], ["OK", "WARNING", "CRITICAL"])
+        self.assertEqual(ev.evalListBands([0, 3, 1.5, 5], bands, shortCircuit=True), "CRITICAL")
+        self.assertEqual(ev.lastSkipped, 2)
+
+    def test_vectorized(self):
+        values = [1, 45] * 300 + list(range(1000))
+        results = []
+        for vectorMinSize in (256, len(values) + 1):
+            eo = NagErrors()
+            ev = NagEval(eo)
+            ev.vectorMinSize = vectorMinSize
+            ret = ev.evalListNumberAsc(values, warningAbove=40, criticalAbove=50, shortCircuit=True)
+            results.append((ret, list(eo.critical), list(eo.warning), ev.lastSkipped))
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(results[0][1], ["51 is > 50"])
+        self.assertEqual(results[0][3], 948)
+
+        ev = NagEval(NagErrors())
+        ev.evalListNumberAsc(list(range(1000)), criticalAbove=5, shortCircuit=True)
+        self.assertEqual(ev.errObj.critical, ["6 is > 5"])
+        self.assertEqual(ev.lastSkipped, 993)
+
+    def test_bandsVectorized(self):
+        bands = NagBands([1, 2], ["OK", "WARNING", "CRITICAL"])
+        values = [0, 1.5] * 500 + [3, 0]
+        results = []
+        for vectorMinSize in (256, len(values) + 1):
+            eo = NagErrors()
+            ev = NagEval(eo)
+            ev.vectorMinSize = vectorMinSize
+            ret = ev.evalListBands(values, bands, shortCircuit=True)
+            results.append((ret, list(eo.critical), len(eo.warning), ev.lastSkipped))
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(results[0][0], "CRITICAL")
+        self.assertEqual(results[0][2:], (500, 1))
@@ -0,0 +1,203 @@
+import fcntl
+import os
+import struct
+import time
+from _thread import RLock
+
+_MAGIC = b'NCHWINDW'
+# magic, version, capacity, oldest slot, samples in window, sum of values, samples per status (OK, WARNING, CRITICAL, UNKNOWN)
+_HEADER = struct.Struct('<8sIIQQd4Q')
+# time, value, status code
+_RECORD = struct.Struct('<ddQ')
+
+
+class NagWindowStats(object):
+    '''
+
+    Summary of the samples in a NagWindowStore window
+
+    Args:
+        count (int): Number of samples
+        total (float): Sum of the sample values
+        statusCounts (tuple of int's): Number of samples per status code (OK, WARNING, CRITICAL, UNKNOWN)
+
+    Attributes:
+        count (int): Number of samples
+        total (float): Sum of the sample values
+        mean (float): Mean of the sample values, None if there are none
+        statusCounts (tuple of int's): Number of samples per status code (OK, WARNING, CRITICAL, UNKNOWN)
+    '''
+    __slots__ = ('count', 'total', 'mean', 'statusCounts')
+
+    def __init__(self, count, total, statusCounts):
+        self.count = count
+        self.total = total
+        self.mean = total / count if count > 0 else None
+        self.statusCounts = tuple(statusCounts)
+
+    def atLeast(self, code):
+        '''
+        Count the samples with at least a status
+
+        Args:
+            code (int): Status code, 0 (OK) to 3 (UNKNOWN)
+
+        Returns:
+            int: Number of samples with that status or worse
+        '''
+        return sum(self.statusCounts[code:])
+
+
+class NagWindowStore(object):
+    '''
+
+    The NagWindowStore object keeps the samples of one series from the last window seconds in a ring buffer file
+
+    The file has a fixed size: a header with the running sum and per-status counts of the samples
+    in the window, followed by capacity fixed-size records. Adding a sample writes one record and
+    the header, and drops the samples that left the window from the running totals, so each
+    sample costs O(1) amortized however long the window is. The file is locked while it is
+    updated, so concurrent check processes can share a store.
+
+    Args:
+        path (str): Path of the window file, created if needed
+        window (num): Length of the window in seconds
+        capacity (int): Maximum number of samples in the window, only used when creating the file
+
+    Attributes:
+        path (str): Path of the window file
+        window (num): Length of the window in seconds
+        capacity (int): Maximum number of samples in the window, the oldest are dropped beyond it
+    '''
+    def __init__(self, path, window, capacity=1024):
+        self.path = path
+        self.window = window
+        self._lock = RLock()
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX)
+            try:
+                if os.fstat(self._fd).st_size == 0:
+                    os.ftruncate(self._fd, _HEADER.size + capacity * _RECORD.size)
+                    os.pwrite(self._fd, _HEADER.pack(_MAGIC, 1, capacity, 0, 0, 0.0, 0, 0, 0, 0), 0)
+                header = _HEADER.unpack(os.pread(self._fd, _HEADER.size, 0))
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN)
+            if header[0] != _MAGIC or header[1] != 1:
+                raise ValueError("{} is not a NagWindowStore file".format(path))
+            self.capacity = header[2]
+        except BaseException:
+            os.close(self._fd)
+            raise
+
+    def close(self):
+        '''
+        Close the window file
+        '''
+        os.close(self._fd)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _record(self, slot):
+        return _RECORD.unpack(os.pread(self._fd, _RECORD.size, _HEADER.size + slot * _RECORD.size))
+
+    def _update(self, sample, now):
+        '''
+        Drop the samples that left the window, optionally add a sample, under a lock
+
+        Args:
+            sample (tuple): (value, status code) to add, None to only drop old samples
+            now (float): Current time
+
+        Returns:
+            NagWindowStats: The samples in the window
+        '''
+        start = now - self.window
+        with self._lock:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX)
+            try:
+                header = _HEADER.unpack(os.pread(self._fd, _HEADER.size, 0))
+                head, count, total = header[3], header[4], header[5]
+                statusCounts = list(header[6:])
+                dirty = False
+                while count > 0:
+                    t, value, code = self._record(head)
+                    if t > start and (sample is None or count < self.capacity):
+                        break
+                    total -= value
+                    statusCounts[code] -= 1
+                    head = (head + 1) % self.capacity
+                    count -= 1
+                    dirty = True
+                if count == 0:
+                    # drop the rounding error of the running sum
+                    total = 0.0
+                if sample is not None:
+                    value, code = sample
+                    os.pwrite(self._fd, _RECORD.pack(now, value, code), _HEADER.size + (head + count) % self.capacity * _RECORD.size)
+                    total += value
+                    statusCounts[code] += 1
+                    count += 1
+                    dirty = True
+                if dirty:
+                    os.pwrite(self._fd, _HEADER.pack(_MAGIC, 1, self.capacity, head, count, total, *statusCounts), 0)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN)
+        return NagWindowStats(count, total, statusCounts)
+
+    def add(self, value, code=0, now=None):
+        '''
+        Add a sample
+
+        Args:
+            value (num): The sample
+            code (int): Status code of the sample, 0 (OK) to 3 (UNKNOWN)
+            now (float): Time of the sample, defaults to time.time()
+
+        Returns:
+            NagWindowStats: The samples in the window, including this one
+        '''
+        if now is None:
+            now = time.time()
+        return self._update((float(value), code), now)
+
+    def stats(self, now=None):
+        '''
+        Summarize the samples in the window
+
+        Args:
+            now (float): End of the window, defaults to time.time()
+
+        Returns:
+            NagWindowStats: The samples in the window
+        '''
+        if now is None:
+            now = time.time()
+        return self._update(None, now)
+
+    def samples(self, now=None):
+        '''
+        Read the samples in the window
+
+        Args:
+            now (float): End of the window, defaults to time.time()
+
+        Returns:
+            List of (float, float, int): (time, value, status code) of each sample, oldest first
+        '''
+        if now is None:
+            now = time.time()
+        start = now - self.window
+        with self._lock:
+            fcntl.lockf(self._fd, fcntl.LOCK_SH)
+            try:
+                header = _HEADER.unpack(os.pread(self._fd, _HEADER.size, 0))
+                head, count = header[3], header[4]
+                records = [self._record((head + i) % self.capacity) for i in range(count)]
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN)
+        return [r for r in records if r[0] > start]
@@ -0,0 +1,278 @@
+'''
+Benchmarks of the NagiosCheckHelper hot paths
+
+    python benchmarks/bench.py                          # run and compare with benchmarks/baseline.json
+    python benchmarks/bench.py --output results.json    # also write the results
+    python benchmarks/bench.py --save-baseline          # make the results the new baseline
+    python benchmarks/bench.py --full --threshold 0.1   # include 10^7 values, fail above +10%
+
+Each benchmark reports the best time per call over several repeats. The exit code is 1 if a
+benchmark is slower than the baseline by more than the threshold. Baselines are only comparable
+on the machine (and python/numpy versions) they were recorded on.
+'''
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from functools import partial
+
+BENCHDIR = os.path.dirname(os.path.abspath(__file__))
+PKGDIR = os.path.dirname(BENCHDIR)
+sys.path.insert(0, PKGDIR)
+
+from NagiosCheckHelper import NagErrors, NagEval, NagEnumMatcher  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(BENCHDIR, 'baseline.json')
+
+
+def nullWriter(text):
+    pass
+
+
+def enumLists(size):
+    '''
+    Build large enum lists, with the tested values near the end of each list
+
+    Args:
+        size (int): Number of values per list
+
+    Returns:
+        dict: okValues, warningValues, criticalValues, unknownValues
+    '''
+    return dict(('{}Values'.format(status), ['{}{}'.format(status, i) for i in range(size)])
+                for status in ('ok', 'warning', 'critical', 'unknown'))
+
+
+def benchEvalEnum(size):
+    lists = enumLists(size)
+    neval = NagEval(NagErrors(maxRecords=0))
+    value = 'ok{}'.format(size - 1)
+    return lambda: neval.evalEnum(value, **lists)
+
+
+def benchEvalEnumMatcher(size):
+    matcher = NagEnumMatcher(**enumLists(size))
+    neval = NagEval(NagErrors(maxRecords=0))
+    value = 'ok{}'.format(size - 1)
+    return lambda: neval.evalEnum(value, matcher=matcher)
+
+
+def benchEvalListEnum(count, size):
+    lists = enumLists(size)
+    rnd = random.Random(1)
+    values = ['ok{}'.format(rnd.randrange(size)) if rnd.random() < 0.99 else 'warning1' for _ in range(count)]
+
+    def run():
+        NagEval(NagErrors(maxRecords=100)).evalListEnum(values, **lists)
+    return run
+
+
+def benchEvalListNumber(count, method, vector):
+    rnd = random.Random(2)
+    values = [rnd.randint(0, 10000) for _ in range(count)]
+    kwargs = {'warningAbove': 9990, 'criticalAbove': 9999} if method == 'evalListNumberAsc' else {'warningBelow': 10, 'criticalBelow': 1}
+
+    def run():
+        neval = NagEval(NagErrors(maxRecords=100))
+        if not vector:
+            neval.vectorMinSize = count + 1
+        getattr(neval, method)(values, **kwargs)
+    return run
+
+
+def recordErrors(count):
+    nerr = NagErrors(output=nullWriter)
+    for i in range(count):
+        nerr.addTemplateRecord('critical' if i % 3 == 0 else 'warning', "{prefix}{value}{units} is > {threshold}{units}{postfix}", i, 90, "%", "disk{} ".format(i))
+    return nerr
+
+
+def benchFormatStatus(count):
+    lines = ["disk{} usage {}% is > 90%".format(i, i % 100) for i in range(count)]
+    nerr = NagErrors()
+    return lambda: nerr.formatStatus("CRITICAL", lines)
+
+
+def benchPrintStatus(count, outputLimit):
+    nerr = recordErrors(count)
+    return lambda: nerr.printStatus(outputLimit)
+
+
+def importTime(repeat=5):
+    '''
+    Measure the best cold import time of the package in fresh interpreters
+
+    Args:
+        repeat (int): Number of interpreters to start
+
+    Returns:
+        float: Cumulative import time in seconds, as reported by python -X importtime
+    '''
+    best = None
+    for _ in range(repeat):
+        proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import NagiosCheckHelper'], cwd=PKGDIR,
+                              stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, check=True)
+        for line in proc.stderr.splitlines():
+            fields = line.split('|')
+            if len(fields) == 3 and fields[2].strip() == 'NagiosCheckHelper':
+                us = int(fields[1])
+                best = us if best is None else min(best, us)
+    return best / 1e6
+
+
+def benchmarks(full):
+    '''
+    Get the benchmarks
+
+    Args:
+        full (bool): Include the slowest sizes
+
+    Returns:
+        List of (str, callable, int): Name, function building the benchmarked callable, and the number of values it handles
+    '''
+    sizes = [10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6] + ([10 ** 7] if full else [])
+    ret = [
+        ('evalEnum_lists1000', partial(benchEvalEnum, 1000), 1),
+        ('evalEnum_matcher1000', partial(benchEvalEnumMatcher, 1000), 1),
+        ('evalListEnum_10000x1000', partial(benchEvalListEnum, 10000, 1000), 10000),
+    ]
+    for method in ('evalListNumberAsc', 'evalListNumberDesc'):
+        for size in sizes:
+            ret.append(('{}_{}'.format(method, size), partial(benchEvalListNumber, size, method, True), size))
+            if size <= 10 ** 5:
+                ret.append(('{}_scalar_{}'.format(method, size), partial(benchEvalListNumber, size, method, False), size))
+    for count in (100, 10000):
+        ret.append(('formatStatus_{}'.format(count), partial(benchFormatStatus, count), count))
+        ret.append(('printStatus_{}'.format(count), partial(benchPrintStatus, count, None), count))
+        ret.append(('printStatus_{}_limit4096'.format(count), partial(benchPrintStatus, count, 4096), count))
+    return ret
+
+
+def timeCall(func, minTime, repeat):
+    '''
+    Time a callable like timeit: calls are grouped so each repeat takes at least minTime
+
+    Args:
+        func (callable): The benchmarked callable
+        minTime (float): Minimum seconds per repeat
+        repeat (int): Number of repeats
+
+    Returns:
+        (float, int): Best seconds per call and the number of calls per repeat
+    '''
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= minTime or number >= 1 << 20:
+            break
+        number *= 10 if elapsed < minTime / 10 else 2
+    best = elapsed / number
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best, number
+
+
+def run(names=None, full=False, minTime=0.2, repeat=5):
+    '''
+    Run the benchmarks
+
+    Args:
+        names (List of str's): Only run benchmarks whose name contains one of these, None for all
+        full (bool): Include the slowest sizes
+        minTime (float): Minimum seconds per repeat
+        repeat (int): Number of repeats
+
+    Returns:
+        dict: Machine readable results
+    '''
+    try:
+        import numpy
+        numpyVersion = numpy.__version__
+    except ImportError:
+        numpyVersion = None
+    results = {}
+    for name, build, values in benchmarks(full):
+        if names and not any(n in name for n in names):
+            continue
+        seconds, number = timeCall(build(), minTime, repeat)
+        results[name] = {'seconds': seconds, 'values': values, 'number': number}
+        sys.stderr.write("{:40} {:12.3f}us\n".format(name, seconds * 1e6))
+    if not names or any(n in 'import' for n in names):
+        results['import'] = {'seconds': importTime(repeat), 'values': 1, 'number': 1}
+        sys.stderr.write("{:40} {:12.3f}us\n".format('import', results['import']['seconds'] * 1e6))
+    return {'python': platform.python_version(), 'numpy': numpyVersion, 'machine': platform.machine(),
+            'time': int(time.time()), 'results': results}
+
+
+def compare(results, baseline, threshold):
+    '''
+    Compare results with a baseline
+
+    Args:
+        results (dict): Output of run
+        baseline (dict): Output of an earlier run
+        threshold (float): Allowed slowdown, 0.25 for 25%
+
+    Returns:
+        List of (str, float, float, float): Name, baseline seconds, seconds and ratio of each regression
+    '''
+    regressions = []
+    for name, result in sorted(results['results'].items()):
+        base = baseline['results'].get(name)
+        if base is None or base['seconds'] <= 0:
+            continue
+        ratio = result['seconds'] / base['seconds']
+        if ratio > 1 + threshold:
+            regressions.append((name, base['seconds'], result['seconds'], ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the NagiosCheckHelper hot paths")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="baseline to compare with (default: %(default)s)")
+    parser.add_argument('--threshold', type=float, default=float(os.environ.get('NAGIOSCHECKHELPER_BENCH_THRESHOLD', '0.25')),
+                        help="allowed slowdown before failing, 0.25 for 25%% (default: %(default)s)")
+    parser.add_argument('--output', help="write the results as JSON to this file")
+    parser.add_argument('--save-baseline', action='store_true', help="write the results to the baseline instead of comparing")
+    parser.add_argument('--full', action='store_true', help="include 10^7 values")
+    parser.add_argument('--quick', action='store_true', help="fewer and shorter repeats, for smoke tests")
+    parser.add_argument('--filter', action='append', help="only run benchmarks whose name contains this, can be repeated")
+    args = parser.parse_args(argv)
+
+    if args.quick:
+        results = run(args.filter, args.full, minTime=0.01, repeat=2)
+    else:
+        results = run(args.filter, args.full)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        return 0
+    if not os.path.exists(args.baseline):
+        sys.stderr.write("no baseline {}, use --save-baseline to create it\n".format(args.baseline))
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.threshold)
+    for name, base, seconds, ratio in regressions:
+        sys.stdout.write("REGRESSION {}: {:.3f}us -> {:.3f}us (+{:.0%})\n".format(name, base * 1e6, seconds * 1e6, ratio - 1))
+    if regressions:
+        return 1
+    sys.stdout.write("OK no regressions above {:.0%} against {}\n".format(args.threshold, args.baseline))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())